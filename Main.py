@@ -5,20 +5,24 @@ This was a project for my portfolio to show competency using pathfinding
 algorithms. Google's style guide was used throughout this doc, reference:
 http://google.github.io/styleguide/pyguide.html
 """
+import functools
 import sys
-from typing import Optional, List, Tuple, Any, Iterator
-import math
-import random as rand
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
 import pygame
+import maze_io
+import recording
+import solver
+from grid import WALL, PATH, START, EXIT, Grid
 
 
 # ------------
 #  Type Alias
 # ------------
-MazeType = List[List["Cell"]]  # "Cell" refers to a Cell class object
-MazeRowType = List["Cell"]
+MazeType = "Maze"  # "Maze" refers to a Maze class object
 DefaultMaze = List[List[int]]
 ColorType = Tuple[int, int, int]
+PathType = solver.PathType
 
 
 # ------------
@@ -38,13 +42,12 @@ class Mem(object):
         self.val = value
 
 
-class Cell(object):
-    """Used to create each "cell" in the maze.
+class Maze(Grid):
+    """Grid of the maze shown on screen.
 
-    Keeps track of all the attributes a cell has and that needs to be know
-    by the pathfinding algorithms. Example: Is the cell a wall, vaild path,
-    been visited, the exit and so on. Also evenly postisions each cell and
-    handles drawing each cell with the update() method.
+    Adds a color layer on top of the cell states of Grid. Colors are stored
+    as one byte per cell indexing into PALETTE, the same flat layout as the
+    states, so the whole maze costs two bytes per cell.
 
     Correlation table for state and color:
         Start of maze:
@@ -61,123 +64,167 @@ class Cell(object):
             color = VALID_PATH_COLOR
 
     Attributes:
-        size: Tuple containing width and height of the cell.
-        row: Row location of cell in maze.
-        col: Column location of cell in maze.
-        margin: Spacing to have between cells.
-        visited: Value indicating if a cell has been previously checked by a
-            pathfinding algorithm.
-        f: Total cost of cell. (used in A*)
-        g: Number of cells away from start cell. (used in A*)
-        h: Straight line distance to maze exit. (used in A*)
-        parent: Used in A* to get shotest path.
-        state: Used to determine if a cell is a wall, valid path, the exit,
-            or the start of the maze.
-        color: The color to fill the cell with. This should be tied to the
-            state of the cell.
-        obj: Contains the pygame "Rect" object reference for the cell.
+        colors: bytearray with the PALETTE index to fill each cell with.
+        dirty: Set of flat indices of cells whose color changed since they
+            were last drawn.
     """
 
-    def __init__(self, x_offset: int, y_offset: int, x: int, y: int,
-                 size: Tuple[int, int], margin: int, state: int) -> None:
-        """Inits Cell with values need to create Cell objects."""
-        self.size = size
-        self.row = y
-        self.col = x
-        self.margin = margin
-        self.visited = 0
-        self.f = 0
-        self.g = 0
-        self.h = 0
-        self.parent = None
-        self.state = state
-        if state == 0:
-            self.color = WALL_COLOR
-        elif state == 1:
-            self.color = VALID_PATH_COLOR
-        elif state == 2:
-            self.color = START_COLOR
-        elif state == 3:
-            self.color = EXIT_COLOR
-
-        self.obj = pygame.Rect((self.size[0] + self.margin) * x + x_offset,
-                               (self.size[1] + self.margin) * y + y_offset,
-                               self.size[0], self.size[1])
+    def __init__(self, width: int, height: int, state: Any = None) -> None:
+        """Inits Maze with each cell colored by its state."""
+        super().__init__(width, height, state)
+        self.colors = bytearray(self.state)
+        self.dirty = set()
+
+    def set_color(self, row: int, col: int, color: ColorType) -> None:
+        """Sets the color of the cell at (row, col), must be in PALETTE."""
+        index = row * self.width + col
+        code = PALETTE_INDEX[color]
+
+        if self.colors[index] != code:
+            self.colors[index] = code
+            self.dirty.add(index)
+
+    def paint(self, row: int, col: int, state: int) -> None:
+        """Sets the state of the cell at (row, col) and its matching color."""
+        index = row * self.width + col
+        self.set(row, col, state)
+
+        if self.colors[index] != state:
+            self.colors[index] = state
+            self.dirty.add(index)
+
+
+def line_cells(start: Tuple[int, int],
+               end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+    """Yields the (row, col) cells on a Bresenham line, both ends included."""
+    row, col = start
+    rows = abs(end[0] - row)
+    cols = abs(end[1] - col)
+    row_step = 1 if end[0] > row else -1
+    col_step = 1 if end[1] > col else -1
+    error = cols - rows
 
-    def update(self) -> None:
-        """Handles user inputs and pygame drawing of cells.
+    while True:
+        yield row, col
 
-        Will skip user inputs if a pathfinding algorithm is running. When
-        drawing the maze start/exit, will clear previous maze start/exit since
-        only one is allowed of each.
+        if (row, col) == end:
+            return
 
-        Controls for cells:
-            Left mouse click = Draw maze wall
-            Right mouse click = Draw maze path
-            Shift + Left mouse click = Draw maze start
-            Shift + Right mouse click = Draw maze exit
-        """
-        if not solver_running.val:
+        doubled = 2 * error
 
-            if self.obj.collidepoint(pygame.mouse.get_pos()):
+        if doubled > -rows:
+            error -= rows
+            col += col_step
 
-                if pygame.mouse.get_pressed()[0] == 1:
+        if doubled < cols:
+            error += cols
+            row += row_step
 
-                    if (pygame.key.get_pressed()[pygame.K_RSHIFT] == 1 or
-                            pygame.key.get_pressed()[pygame.K_LSHIFT] == 1):
 
-                        if self.state == 3:
-                            maze_exit.val = False
+def block_colors(maze: MazeType, stride: int) -> bytearray:
+    """Colors each stride by stride block of cells of maze as one.
 
-                        if not maze_start.val:
-                            start_cell = (
-                                maze[maze_start.val[0]][maze_start.val[1]])
+    A block takes the color of its highest ranked cell in COLOR_RANKS, so
+    the search and the path still show when zoomed far out. Cells are
+    turned into one bit per rank and a block row is OR-ed together as big
+    integers, first its rows and then every stride-th byte of the result,
+    so the work is done a row at a time instead of a cell at a time.
 
-                            start_cell.state = 1
-                            start_cell.color = VALID_PATH_COLOR
+    Args:
+        maze: Maze shown on screen.
+        stride: Cells per block side.
 
-                        self.state = 2
-                        self.color = START_COLOR
-                        maze_start.val = (self.row, self.col)
+    Returns:
+        bytearray with the PALETTE index of each block, in rows of
+        ceil(maze.width / stride) blocks.
+    """
+    colors = maze.colors
+    width = maze.width
+    blocks_w = -(-width // stride)
+    padding = bytes(blocks_w * stride - width)
+    blocks = bytearray()
+
+    for top in range(0, maze.size, stride * width):
+        bits = 0
 
-                    else:
+        for start in range(top, min(top + stride * width, maze.size), width):
+            bits |= int.from_bytes(
+                colors[start:start + width].translate(RANK_BITS), 'big')
 
-                        if self.state == 2:
-                            maze_start.val = False
+        line = bits.to_bytes(width, 'big') + padding
+        bits = 0
 
-                        if self.state == 3:
-                            maze_exit.val = False
+        for col in range(stride):
+            bits |= int.from_bytes(line[col::stride], 'big')
 
-                        self.state = 0
-                        self.color = WALL_COLOR
+        blocks += bits.to_bytes(blocks_w, 'big').translate(TOP_RANK)
 
-                if pygame.mouse.get_pressed()[2] == 1:
+    return blocks
 
-                    if self.state == 2:
-                        maze_start.val = False
 
-                    if self.state == 3:
-                        maze_exit.val = False
+def paint_cell(maze: MazeType, row: int, col: int, button: int,
+               shift: bool) -> None:
+    """Handles a mouse button on a cell.
 
-                    if (pygame.key.get_pressed()[pygame.K_RSHIFT] == 1 or
-                            pygame.key.get_pressed()[pygame.K_LSHIFT] == 1):
+    When drawing the maze start/exit, will clear previous maze start/exit
+    since only one is allowed of each.
 
-                        if not maze_exit.val:
-                            exit_cell = (
-                                maze[maze_exit.val[0]][maze_exit.val[1]])
+    Controls for cells:
+        Left mouse click = Draw maze wall
+        Right mouse click = Draw maze path
+        Shift + Left mouse click = Draw maze start
+        Shift + Right mouse click = Draw maze exit
+
+    Args:
+        maze: Maze the cell belongs to.
+        row: Row location of cell in maze.
+        col: Column location of cell in maze.
+        button: pygame mouse button held, 1 for left and 3 for right.
+        shift: True if a shift key is held.
+    """
+    state = maze.get(row, col)
 
-                            exit_cell.state = 1
-                            exit_cell.color = VALID_PATH_COLOR
+    if button == 1:
 
-                        self.state = 3
-                        self.color = EXIT_COLOR
-                        maze_exit.val = (self.row, self.col)
+        if shift:
 
-                    else:
-                        self.state = 1
-                        self.color = VALID_PATH_COLOR
+            if state == EXIT:
+                maze_exit.val = False
 
-        pygame.draw.rect(screen, self.color, self.obj)
+            if maze_start.val:
+                maze.paint(maze_start.val[0], maze_start.val[1], PATH)
+
+            maze.paint(row, col, START)
+            maze_start.val = (row, col)
+
+        else:
+
+            if state == START:
+                maze_start.val = False
+
+            if state == EXIT:
+                maze_exit.val = False
+
+            maze.paint(row, col, WALL)
+
+    if button == 3:
+
+        if state == START:
+            maze_start.val = False
+
+        if state == EXIT:
+            maze_exit.val = False
+
+        if shift:
+
+            if maze_exit.val:
+                maze.paint(maze_exit.val[0], maze_exit.val[1], PATH)
+
+            maze.paint(row, col, EXIT)
+            maze_exit.val = (row, col)
+
+        else:
+            maze.paint(row, col, PATH)
 
 
 class Btn(object):
@@ -194,15 +241,20 @@ class Btn(object):
         w: The width of the button.
         h: The height of the button.
         margin: Space between buttons.
+        horizontal: True to lay the buttons out in a row instead of a column.
+        rows: Buttons per column, extra buttons wrap into a new column to the
+            right. All buttons go in one column if None.
         objs: A list of the pygame "Rect" obj for each button.
         state: List of bool state of each button.
         colors: List of fill colors of each button.
     """
 
     def __init__(self, labels: List[str], x: int, y: int, w: int, h: int,
-                 margin: int) -> None:
+                 margin: int, horizontal: bool = False,
+                 rows: Optional[int] = None) -> None:
         """Inits Btn with the values need to build the button group."""
         self.labels = []
+        self.texts = list(labels)
         self.objs = []
         self.states = []
         self.colors = []
@@ -211,10 +263,21 @@ class Btn(object):
         self.w = w
         self.h = h
         self.margin = margin
+        self.horizontal = horizontal
 
         for i in enumerate(labels):
             self.labels.append(font.render(i[1], True, (33, 33, 33)))
-            self.objs.append(pygame.Rect(x, y + (h + margin) * i[0], w, h))
+
+            if horizontal:
+                self.objs.append(
+                    pygame.Rect(x + (w + margin) * i[0], y, w, h))
+
+            else:
+                col, row = divmod(i[0], rows or len(labels))
+                self.objs.append(
+                    pygame.Rect(x + (w + margin) * col,
+                                y + (h + margin) * row, w, h))
+
             self.states.append(False)
             self.colors.append(NOT_SELECTED)
 
@@ -225,9 +288,336 @@ class Btn(object):
             font_h = self.labels[i].get_rect().height
             pygame.draw.rect(screen, self.colors[i], self.objs[i])
             screen.blit(self.labels[i],
-                        (self.x + (self.w - font_w) // 2,
-                         (self.y + i *
-                          (self.h + self.margin) + self.h // 2) - font_h // 2))
+                        (self.objs[i].centerx - font_w // 2,
+                         self.objs[i].centery - font_h // 2))
+
+    def selected(self) -> str:
+        """Returns the label text of the selected button."""
+        return self.texts[self.states.index(True)]
+
+
+class Hud(object):
+    """On screen panel of solver and drawing counters.
+
+    Frame counters are summed between two draws of the panel and shown per
+    frame, so the numbers stay readable while the solver runs.
+
+    Attributes:
+        rect: The pygame "Rect" the panel is drawn in.
+        stats: SolveStats of the running or last solve, None before the
+            first solve.
+        frames: Frames drawn since the panel was last drawn.
+        cells: Cells drawn since the panel was last drawn.
+        search_time: Seconds spent in the solver since the panel was last
+            drawn.
+        render_time: Seconds spent coloring and drawing since the panel was
+            last drawn.
+        next_draw: time.perf_counter() time the panel is due to be drawn.
+    """
+
+    def __init__(self, x: int, y: int, w: int, h: int) -> None:
+        """Inits Hud with all counters at zero."""
+        self.rect = pygame.Rect(x, y, w, h)
+        self.stats = None
+        self.frames = 0
+        self.cells = 0
+        self.search_time = 0.0
+        self.render_time = 0.0
+        self.next_draw = 0.0
+
+    def due(self) -> bool:
+        """True if the panel should be drawn again."""
+        return time.perf_counter() >= self.next_draw
+
+    def update(self, fps: float) -> pygame.Rect:
+        """Draws the panel and starts counting the next frames.
+
+        Args:
+            fps: Frames per second measured by the pygame clock.
+
+        Returns:
+            The pygame "Rect" that was drawn.
+        """
+        frames = max(self.frames, 1)
+        stats = self.stats or solver.SolveStats()
+        lines = ['Expanded: {:,}'.format(stats.expanded),
+                 'Open List: {:,}'.format(stats.frontier),
+                 'Peak Frontier: {:,}'.format(stats.peak_frontier),
+                 'Heap Ops: {:,}'.format(stats.heap_ops),
+                 'Cells Drawn: {:,.0f}/frame'.format(self.cells / frames),
+                 'Search: {:.1f} ms/frame'.format(
+                     1000 * self.search_time / frames),
+                 'Render: {:.1f} ms/frame'.format(
+                     1000 * self.render_time / frames),
+                 'FPS: {:.0f}'.format(fps)]
+        pygame.draw.rect(screen, SCREEN_BG_COLOR, self.rect)
+        screen.blit(hud_header, (self.rect.x, self.rect.y))
+
+        for i, line in enumerate(lines, 1):
+            screen.blit(font.render(line, True, TEXT_COLOR),
+                        (self.rect.x, self.rect.y + 22 * i))
+
+        self.frames = 0
+        self.cells = 0
+        self.search_time = 0.0
+        self.render_time = 0.0
+        self.next_draw = time.perf_counter() + HUD_INTERVAL
+
+        return self.rect
+
+
+class Viewport(object):
+    """Window onto the maze that can be panned and zoomed.
+
+    Only the cells inside the window are drawn and they are found from the
+    zoom level and the pan position every time, nothing is kept per cell.
+    The visible cells are copied into an 8 bit surface colored by PALETTE,
+    one pixel per cell, which is then scaled up to the zoom level. Zoomed
+    out past one pixel per cell each pixel shows a square block of cells,
+    see block_colors().
+
+    Attributes:
+        rect: The pygame "Rect" of the screen area the maze is drawn in.
+        zoom: Index into ZOOMS of the zoom level.
+        x: Column at the left edge of rect, can be fractional or negative.
+        y: Row at the top edge of rect, can be fractional or negative.
+        moved: True if the view changed since it was last drawn.
+        blocks: Color of each block of cells at the zoom level, None when
+            zoomed in or before it is first needed.
+        blocks_of: Maze and cells per block side blocks was made for.
+    """
+
+    def __init__(self, x: int, y: int, w: int, h: int) -> None:
+        """Inits Viewport at one pixel per cell showing the top left cell."""
+        self.rect = pygame.Rect(x, y, w, h)
+        self.zoom = ZOOMS.index((1, 1))
+        self.x = 0.0
+        self.y = 0.0
+        self.moved = True
+        self.blocks = None
+        self.blocks_of = None
+
+    def pitch(self) -> float:
+        """Pixels per cell, below 1 when zoomed out past a pixel per cell."""
+        pixels, stride = ZOOMS[self.zoom]
+
+        return pixels / stride
+
+    def origin(self, maze: MazeType) -> Tuple[int, int, int, int]:
+        """Finds the first visible cell of maze.
+
+        Returns:
+            Tuple of the row and column of the first visible cell and the x
+            and y of the screen pixel its top left corner is drawn at.
+        """
+        pitch = self.pitch()
+        stride = ZOOMS[self.zoom][1]
+        row = min(max(int(self.y), 0), maze.height) // stride * stride
+        col = min(max(int(self.x), 0), maze.width) // stride * stride
+
+        return (row, col, self.rect.x + round((col - self.x) * pitch),
+                self.rect.y + round((row - self.y) * pitch))
+
+    def cell_at(self, maze: MazeType,
+                pos: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """Finds the cell of maze under a pixel of the pygame screen.
+
+        Worked out from the zoom level and the pan position instead of
+        testing every cell. The margin to the right of and below a cell
+        counts as part of that cell.
+
+        Args:
+            maze: Maze shown on screen.
+            pos: (x, y) pixel position, like from a pygame mouse event.
+
+        Returns:
+            (row, col) of the cell, None if there is no cell at pos.
+        """
+        pixels, stride = ZOOMS[self.zoom]
+        row, col, left, top = self.origin(maze)
+
+        if (not self.rect.collidepoint(pos) or pos[0] < left or
+                pos[1] < top):
+            return None
+
+        row += (pos[1] - top) // pixels * stride
+        col += (pos[0] - left) // pixels * stride
+
+        if row >= maze.height or col >= maze.width:
+            return None
+
+        return row, col
+
+    def draw(self, maze: MazeType) -> pygame.Rect:
+        """Draws the visible cells of maze.
+
+        Args:
+            maze: Maze shown on screen.
+
+        Returns:
+            The pygame "Rect" that was drawn.
+        """
+        pixels, stride = ZOOMS[self.zoom]
+        row, col, left, top = self.origin(maze)
+        rows = range(row, min(maze.height, row + stride * -(
+            (top - self.rect.bottom) // pixels)), stride)
+        cols = range(col, min(maze.width, col + stride * -(
+            (left - self.rect.right) // pixels)), stride)
+        screen.fill(MAZE_BG_COLOR, self.rect)
+
+        if stride == 1:
+            self.blocks = None
+            colors = maze.colors
+            width = maze.width
+
+        else:
+            colors = self.overview(maze, stride)
+            width = -(-maze.width // stride)
+            row //= stride
+            col //= stride
+
+        maze.dirty.clear()
+        count_w = len(cols)
+        count_h = len(rows)
+
+        if count_w and count_h:
+            data = b''.join([colors[r * width + col:r * width + col + count_w]
+                             for r in range(row, row + count_h)])
+            cells = pygame.image.frombuffer(data, (count_w, count_h), 'P')
+            cells.set_palette(PALETTE)
+            w = count_w * pixels
+            h = count_h * pixels
+
+            if pixels > 1:
+                cells = pygame.transform.scale(cells, (w, h))
+
+            screen.set_clip(self.rect)
+            screen.blit(cells, (left, top))
+
+            if pixels >= MARGIN_ZOOM:
+
+                for x in range(left + pixels - CELL_MARGIN, left + w, pixels):
+                    screen.fill(MAZE_BG_COLOR, (x, top, CELL_MARGIN, h))
+
+                for y in range(top + pixels - CELL_MARGIN, top + h, pixels):
+                    screen.fill(MAZE_BG_COLOR, (left, y, w, CELL_MARGIN))
+
+            screen.set_clip(None)
+
+        hud.cells += count_w * count_h
+        self.moved = False
+
+        return self.rect
+
+    def draw_cells(self, maze: MazeType) -> List[pygame.Rect]:
+        """Draws only the cells of maze whose color changed.
+
+        For zoom levels of a pixel per cell or more, when the view itself
+        has not moved since it was last drawn. Changed cells out of view are
+        skipped.
+
+        Args:
+            maze: Maze shown on screen.
+
+        Returns:
+            List of the pygame "Rect" objects that were drawn.
+        """
+        pixels = ZOOMS[self.zoom][0]
+        row, col, left, top = self.origin(maze)
+        size = pixels - CELL_MARGIN if pixels >= MARGIN_ZOOM else pixels
+        rects = []
+
+        for index in maze.dirty:
+            r, c = divmod(index, maze.width)
+            rect = pygame.Rect(left + (c - col) * pixels,
+                               top + (r - row) * pixels, size,
+                               size).clip(self.rect)
+
+            if rect:
+                screen.fill(PALETTE[maze.colors[index]], rect)
+                rects.append(rect)
+
+        maze.dirty.clear()
+        hud.cells += len(rects)
+
+        return rects
+
+    def overview(self, maze: MazeType, stride: int) -> bytearray:
+        """Returns the PALETTE index of each stride by stride block of maze.
+
+        Made by block_colors() at a new zoom level or after the colors were
+        rewritten in bulk (setting blocks to None), otherwise kept up to date
+        from the dirty cells of maze.
+        """
+        if self.blocks is None or self.blocks_of != (maze, stride):
+            self.blocks = block_colors(maze, stride)
+            self.blocks_of = (maze, stride)
+            return self.blocks
+
+        blocks = self.blocks
+        colors = maze.colors
+        width = maze.width
+        blocks_w = -(-width // stride)
+
+        for index in maze.dirty:
+            row, col = divmod(index, width)
+            block = row // stride * blocks_w + col // stride
+
+            if RANK_BITS[colors[index]] >= RANK_BITS[blocks[block]]:
+                blocks[block] = colors[index]
+                continue
+
+            # A cell lost rank, look at the whole block again.
+            row -= row % stride
+            col -= col % stride
+            span = min(stride, width - col)
+            bits = 0
+
+            for r in range(row, min(row + stride, maze.height)):
+                for bit in colors[r * width + col:r * width + col + span
+                                  ].translate(RANK_BITS):
+                    bits |= bit
+
+            blocks[block] = TOP_RANK[bits]
+
+        return blocks
+
+    def fit(self, maze: MazeType) -> None:
+        """Zooms in as far as the whole maze fits and centers it."""
+        side = min(self.rect.w, self.rect.h)
+        size = max(maze.width, maze.height)
+        self.zoom = 0
+
+        for i, (pixels, stride) in enumerate(ZOOMS):
+            if size * pixels <= side * stride:
+                self.zoom = i
+
+        pitch = self.pitch()
+        self.x = (maze.width - self.rect.w / pitch) / 2
+        self.y = (maze.height - self.rect.h / pitch) / 2
+        self.moved = True
+
+    def pan(self, maze: MazeType, dx: int, dy: int) -> None:
+        """Moves the view by dx, dy pixels, keeping half of it on maze."""
+        pitch = self.pitch()
+        half_w = self.rect.w / pitch / 2
+        half_h = self.rect.h / pitch / 2
+        self.x = min(max(self.x - dx / pitch, -half_w), maze.width - half_w)
+        self.y = min(max(self.y - dy / pitch, -half_h), maze.height - half_h)
+        self.moved = True
+
+    def zoom_at(self, maze: MazeType, pos: Tuple[int, int],
+                steps: int) -> None:
+        """Zooms in by steps levels, out if negative.
+
+        The cell under the screen pixel pos stays in place.
+        """
+        before = self.pitch()
+        self.zoom = min(max(self.zoom + steps, 0), len(ZOOMS) - 1)
+        after = self.pitch()
+        self.x += (pos[0] - self.rect.x) * (1 / before - 1 / after)
+        self.y += (pos[1] - self.rect.y) * (1 / before - 1 / after)
+        self.pan(maze, 0, 0)
 
 
 # ------------
@@ -262,24 +652,52 @@ def keyboard_event(maze: MazeType, event: Any) -> MazeType:
     Handels following keyboard inputs:
     R = Resets the maze.
     C = Clears the maze.
+    P = Replays the last solve.
     Spacebar = Starts the selected pathfinding algorithm.
 
+    F = Fits the whole maze in the view, also while a solver is running.
+
+    While a solver is running only these are handled:
+    Spacebar = Stops the solver.
+    Enter = Pauses or resumes the solver.
+    Right arrow = Runs the paused solver for one frame.
+
     Args:
-        maze: 2D list of Cell class objects.
+        maze: Maze shown on screen.
         event: Pygame event object.
 
     Returns:
         Updated maze.
     """
+    if event.key == pygame.K_f:
+        view.fit(maze)
+
+    if solve_task.val is not None:
+        if event.key == pygame.K_SPACE:
+            solve_task.val.cancel()
+            finish_solve(maze)
+
+        elif event.key == pygame.K_RETURN:
+            solve_paused.val = not solve_paused.val
+
+        elif event.key == pygame.K_RIGHT and solve_paused.val:
+            solve_single.val = True
+
+        return maze
 
     if event.key == pygame.K_r:
         maze = reset(maze)
 
     if event.key == pygame.K_c:
         maze = clear(maze)
+        last_trace.val = None
 
-    if event.key == pygame.K_SPACE:
+    if event.key == pygame.K_p and last_trace.val:
         solver_running.val = True
+        replay(maze, last_trace.val)
+        solver_running.val = False
+
+    if event.key == pygame.K_SPACE:
 
         if not maze_start.val:
             popup('No Maze Start!', EXIT_COLOR)
@@ -287,161 +705,253 @@ def keyboard_event(maze: MazeType, event: Any) -> MazeType:
         elif not maze_exit.val:
             popup('No Maze Exit!', EXIT_COLOR)
 
-        elif algo_btn.states[ALGO.index('Random Backtracking')]:
+        elif not solver.reachable(maze, maze_start.val, maze_exit.val):
+            popup('No Exit Found!', EXIT_COLOR)
 
-            if backtrack_solver(maze, maze_start.val[0], maze_start.val[1]):
-                popup('DONE!', START_COLOR)
+        else:
+            algorithm = algo_btn.selected()
+            solver_running.val = True
+            solve_paused.val = False
+            solve_recorder.val = recording.TraceRecorder(maze, algorithm)
+            solve_task.val = solver.SolveTask(
+                maze, maze_start.val, maze_exit.val, algorithm,
+                result_cache)
+            hud.stats = solve_task.val.stats
 
-            else:
-                popup('No Exit Found!', EXIT_COLOR)
+    return maze
 
-        elif algo_btn.states[ALGO.index('Breadth First')]:
 
-            if breadth_first(maze):
-                popup('DONE!', START_COLOR)
+def mouse_event(maze: MazeType, event: Any) -> None:
+    """Handles mouse events in pygame.
 
-            else:
-                popup('No Exit Found!', EXIT_COLOR)
+    Selects algorithm and speed buttons, zooms and pans the view and draws
+    on the maze. Each event is handled once: the cell under the mouse is
+    found by Viewport.cell_at() and a drag draws every cell on the line
+    from the previous mouse position, so fast drags leave no gaps. Drawing
+    is skipped while a pathfinding algorithm is running, zooming and panning
+    are not.
 
-        elif a_star(maze):
-            popup('DONE!', START_COLOR)
+    Controls for the view:
+        Mouse wheel = Zoom in and out at the mouse
+        Middle mouse drag = Pan
 
-        else:
-            popup('No Exit Found!', EXIT_COLOR)
+    Args:
+        maze: Maze shown on screen.
+        event: pygame event in MOUSE_EVENTS.
+    """
+    if event.type == pygame.MOUSEWHEEL:
+        view.zoom_at(maze, pygame.mouse.get_pos(), event.y)
+        return
 
-        solver_running.val = False
+    if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+        view.pan(maze, event.rel[0], event.rel[1])
 
-    return maze
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
 
+        for btn in (algo_btn, speed_btn):
 
-def mouse_event() -> None:
-    """Handles mouse events in pygame.
+            for i in range(len(btn.states)):
 
-    Mainly handels algorithm button selection since maze cell interactions is
-    handled by each class Cell object.
+                if btn.objs[i].collidepoint(event.pos):
 
-    Args:
-        event: Pygame event object.
-    """
+                    for j in range(len(btn.states)):
+                        btn.states[j] = False
+                        btn.colors[j] = NOT_SELECTED
+
+                    btn.states[i] = True
+                    btn.colors[i] = SELECTED
+                    full_redraw.val = True
+
+    if event.type == pygame.MOUSEBUTTONUP:
 
-    if pygame.mouse.get_pressed()[0] == 1:
+        if event.button == drag_button.val:
+            drag_button.val = None
+            drag_cell.val = None
 
-        for i in range(len(algo_btn.states)):
+        return
 
-            if algo_btn.objs[i].collidepoint(pygame.mouse.get_pos()):
+    if solver_running.val:
+        drag_button.val = None
+        return
 
-                for j in range(len(algo_btn.states)):
-                    algo_btn.states[j] = False
-                    algo_btn.colors[j] = NOT_SELECTED
+    if event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+        drag_button.val = event.button
+        drag_cell.val = None
 
-                algo_btn.states[i] = True
-                algo_btn.colors[i] = SELECTED
+    elif event.type != pygame.MOUSEMOTION or drag_button.val is None:
+        return
 
+    cell = view.cell_at(maze, event.pos)
 
-def maze_maker(size: int, default_maze: DefaultMaze) -> Iterator[MazeRowType]:
-    """Makes a maze row by row.
+    if cell is not None:
+        shift = bool(pygame.key.get_mods() & pygame.KMOD_SHIFT)
 
-    Could have returned whole maze but since this program is a portfolio
-    project I wanted practice with yield.
+        if drag_cell.val is None or shift:
+            paint_cell(maze, cell[0], cell[1], drag_button.val, shift)
+
+        else:
+            for row, col in line_cells(drag_cell.val, cell):
+                paint_cell(maze, row, col, drag_button.val, shift)
+
+    drag_cell.val = cell
+
+
+def maze_maker(size: int, default_maze: DefaultMaze) -> MazeType:
+    """Makes a maze from a 2D list of cell states.
 
     Args:
-        size: Sets the number of rows and Cells per row.
-        default_maze: Gives each Cell its starting state.
+        size: Sets the number of rows and cells per row.
+        default_maze: Gives each cell its starting state.
 
-    Yields:
-        Each row of the maze
+    Returns:
+        Maze with each cell state and color set.
     """
+    state = bytearray()
+
     for row in range(size):
-        maze_row = []
-        for col in range(size):
-            maze_row.append(
-                Cell(CELL_OFFSET_X, CELL_OFFSET_Y, col, row, CELL_SIZE,
-                     CELL_MARGIN, default_maze[row][col]))
+        state.extend(default_maze[row][:size])
 
-        yield maze_row
+    return Maze(size, size, state)
 
 
-def screen_update(fps: int) -> None:
+def maze_loader(path: str) -> MazeType:
+    """Loads a maze file to be shown on screen, see maze_io.py.
+
+    Sets the maze start and exit from the file and fits the maze in the
+    view, the grid size is taken from the file.
+
+    Args:
+        path: Binary or text maze file.
+
+    Returns:
+        Maze with each cell state and color set.
+    """
+    grid, start, exit_pos = maze_io.read(path)
+    new_maze = Maze(grid.width, grid.height, bytearray(grid.state))
+    maze_start.val = start or False
+    maze_exit.val = exit_pos or False
+    last_trace.val = None
+    view.fit(new_maze)
+    full_redraw.val = True
+
+    return new_maze
+
+
+def draw_background() -> pygame.Surface:
+    """Draws everything on screen that does not change to a new surface.
+
+    Returns:
+        pygame "Surface" the size of the screen with the instructions and the
+        maze background drawn on it.
+    """
+    background = pygame.Surface((SCREEN_W, SCREEN_H))
+    background.fill(SCREEN_BG_COLOR)
+    background.blit(instructions_header, (MAZE_BG_PADDING, 5))
+    background.blit(instructions_wall, (MAZE_BG_PADDING, 27))
+    background.blit(instructions_path, (MAZE_BG_PADDING, 49))
+    background.blit(instructions_start, (MAZE_BG_PADDING, 71))
+    background.blit(instructions_exit, (MAZE_BG_PADDING, 93))
+    background.blit(instructions_run, (MAZE_BG_PADDING, 115))
+    background.blit(instructions_reset, (MAZE_BG_PADDING, 137))
+    background.blit(instructions_clear, (MAZE_BG_PADDING, 159))
+    background.blit(instructions_pause, (HUD_X - 300, 137))
+    background.blit(instructions_replay, (HUD_X - 300, 159))
+    background.blit(instructions_zoom, (HUD_X, CELL_OFFSET_Y))
+    background.blit(instructions_pan, (HUD_X, CELL_OFFSET_Y + 22))
+    background.blit(instructions_fit, (HUD_X, CELL_OFFSET_Y + 44))
+    pygame.draw.rect(background, MAZE_BG_COLOR, maze_bg)
+
+    return background
+
+
+def screen_update(fps: int, draw_maze: bool = True) -> None:
     """Updates pygame screen and clock.
 
-    Draws objects on the pygame screen in order of execution. Also updates
-    pygame clock.
+    The visible part of the maze is drawn again only when the view was
+    zoomed or panned, or when a cell color changed. Zoomed in to a pixel per
+    cell or more, a few changed cells are drawn and sent to the display one
+    by one instead, see Viewport.draw_cells(). The whole screen is drawn
+    again from the cached background when "full_redraw" is set, like after
+    a popup covered part of it. The performance panel is drawn every
+    HUD_INTERVAL seconds. Also updates pygame clock.
 
     Args:
         fps: Frames per second.
+        draw_maze: False to leave the changed cells for a later frame.
     """
-    screen.fill(SCREEN_BG_COLOR)
-    screen.blit(instructions_header, (MAZE_BG_PADDING, 5))
-    screen.blit(instructions_wall, (MAZE_BG_PADDING, 27))
-    screen.blit(instructions_path, (MAZE_BG_PADDING, 49))
-    screen.blit(instructions_start, (MAZE_BG_PADDING, 71))
-    screen.blit(instructions_exit, (MAZE_BG_PADDING, 93))
-    screen.blit(instructions_run, (MAZE_BG_PADDING, 115))
-    screen.blit(instructions_reset, (MAZE_BG_PADDING, 137))
-    screen.blit(instructions_clear, (MAZE_BG_PADDING, 159))
-    algo_btn.update()
-    pygame.draw.rect(screen, MAZE_BG_COLOR, maze_bg)
-    for row in maze:
-        for cell in row:
-            cell.update()
+    began = time.perf_counter()
 
-    pygame.display.flip()
+    if full_redraw.val:
+        screen.blit(background, (0, 0))
+        algo_btn.update()
+        speed_btn.update()
+        view.draw(maze)
+        hud.update(clock.get_fps())
+        pygame.display.flip()
+        full_redraw.val = False
+
+    else:
+        rects = []
+
+        if view.moved:
+            rects.append(view.draw(maze))
+
+        elif maze.dirty and draw_maze:
+            if (ZOOMS[view.zoom][1] == 1 and
+                    len(maze.dirty) <= MAX_DIRTY_RECTS):
+                rects += view.draw_cells(maze)
+
+            else:
+                rects.append(view.draw(maze))
+
+        if hud.due():
+            rects.append(hud.update(clock.get_fps()))
+
+        if rects:
+            pygame.display.update(rects)
+
+    hud.frames += 1
+    hud.render_time += time.perf_counter() - began
     clock.tick(fps)
 
 
 def reset(reset_maze: MazeType) -> MazeType:
     """Resets maze to before a solver was run.
 
-    Resets each Cell in the maze, clearing visited status and changing
-    color back to default state color.
+    Changes the color of each cell back to the default color of its state.
 
     Args:
-        reset_maze: 2D list of Cell class objects to be reset.
+        reset_maze: Maze to be reset.
 
     Returns:
-        2D list of Cell class objects with their attributes reset.
+        Maze with its colors reset.
     """
-    for row in reset_maze:
-        for cell in row:
-            cell.visited = 0
-            cell.g = 0
-            cell.h = 0
-            cell.f = 0
-            cell.parent = None
-
-            if cell.state == 3:
-                cell.color = EXIT_COLOR
-
-            elif cell.state == 1:
-                cell.color = VALID_PATH_COLOR
+    reset_maze.colors[:] = reset_maze.state
+    view.blocks = None
+    full_redraw.val = True
 
     return reset_maze
 
 
 def clear(new_maze: MazeType) -> MazeType:
-    """Clears all Cells in maze except start and exit.
+    """Clears all cells in maze except start and exit.
 
     Args:
-        new_maze: 2D list of Cell class objects to be cleared.
+        new_maze: Maze to be cleared.
 
     Returns:
-        2D list of Cell class objects with their attributes cleared.
+        Maze with every other cell turned into a valid path.
     """
-    for row in new_maze:
-        for cell in row:
-
-            cell.g = 0
-            cell.h = 0
-            cell.f = 0
-            cell.parent = None
+    state = new_maze.state
 
-            if cell.state == 3:
-                cell.color = EXIT_COLOR
+    for i in range(new_maze.size):
+        if state[i] == WALL:
+            state[i] = PATH
 
-            elif cell.state != 2:
-                cell.visited = 0
-                cell.state = 1
-                cell.color = VALID_PATH_COLOR
+    new_maze.touch()
+    new_maze.colors[:] = state
+    view.blocks = None
+    full_redraw.val = True
 
     return new_maze
 
@@ -456,342 +966,301 @@ def popup(msg: str, bg_color: ColorType) -> None:
         bg_color: color of pygame "Rect" object.
     """
     text = font.render(msg, True, TEXT_COLOR)
-    popup_text = pygame.Rect(SCREEN_W // 2 - 75, SCREEN_H // 2 + 50, 150, 50)
+    popup_text = pygame.Rect(HUD_X // 2 - 75, SCREEN_H // 2 + 50, 150, 50)
     pygame.draw.rect(screen, bg_color, popup_text)
     screen.blit(
-        text, (SCREEN_W // 2 - text.get_rect().width // 2, SCREEN_H // 2 + 62))
+        text, (HUD_X // 2 - text.get_rect().width // 2, SCREEN_H // 2 + 62))
     pygame.display.flip()
     pygame.time.wait(1250)
+    full_redraw.val = True
 
 
-def color_path(maze: MazeType, path: List[str], color: ColorType) -> None:
-    """Colors each Cell along path.
-
-    Starts at the location of 'maze_start' and moves each direction in path
-    till the end of path. Along the way it colors each Cell to the arg "color".
+def color_path(maze: MazeType, path: PathType, color: ColorType,
+               fps: int) -> None:
+    """Colors each cell along path.
 
     Args:
-        maze: 2D list of Cell class objects.
-        path: List of strings indicating next direction to move in maze.
-        color: RGB to color each Cell in path.
+        maze: Maze shown on screen.
+        path: List of (row, col) positions from the maze start to the exit.
+        color: RGB to color each cell in path, must be in PALETTE.
+        fps: Frames per second to animate the path at, at 1x speed. 0 colors
+            the whole path at once.
     """
-    pos = maze_start.val
-
-    for i in path:
-
-        screen_update(45)
+    for pos in path[1:]:
+        maze.set_color(pos[0], pos[1], color)
 
-        if i == 'UL':
-            pos = (pos[0] - 1, pos[1] - 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'UR':
-            pos = (pos[0] - 1, pos[1] + 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'DL':
-            pos = (pos[0] + 1, pos[1] - 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'DR':
-            pos = (pos[0] + 1, pos[1] + 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'R':
-            pos = (pos[0], pos[1] + 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'L':
-            pos = (pos[0], pos[1] - 1)
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'U':
-            pos = (pos[0] - 1, pos[1])
-            maze[pos[0]][pos[1]].color = color
-            continue
-
-        if i == 'D':
-            pos = (pos[0] + 1, pos[1])
-            maze[pos[0]][pos[1]].color = color
-            continue
+        if fps:
+            solver_frame(fps)
 
     screen_update(60)
 
 
-def get_path_cell(maze: MazeType, path: List[str]) -> Optional[Cell]:
-    """Moves through each Cell in maze following path.
+def solver_frame(fps: int,
+                 event_handler: Callable[[], bool] = critical_event_handler
+                 ) -> bool:
+    """Counts one animation step of a solver and draws a frame when due.
 
-    Starts at the location of 'maze_start' and moves each direction in path
-    till the end of path.
+    How often a frame is drawn depends on the selected speed:
+        1x, 10x, 100x = A frame every 1, 10 or 100 steps at fps.
+        Max Speed = A frame every 1 / MAX_SPEED_FPS seconds, the solver runs
+            as many steps as fit in between.
+        Instant = No frames, events are still checked every
+            1 / MAX_SPEED_FPS seconds so the solver can be stopped.
 
     Args:
-        maze: 2D list of Cell class objects.
-        path: List of strings indicating next direction to move in maze.
+        fps: Frames per second of the step at 1x speed.
+        event_handler: Called to handle pygame events when a frame is due.
 
     Returns:
-        If path leads out of bounds for maze then None is returned. Otherwise
-        returns the Cell class object at the end of path in maze.
+        True if the user asked the solver to stop.
     """
-    pos = maze_start.val
-
-    for i in path:
-        if i == 'UL':
-            pos = (pos[0] - 1, pos[1] - 1)
-            continue
-
-        if i == 'UR':
-            pos = (pos[0] - 1, pos[1] + 1)
-            continue
-
-        if i == 'DL':
-            pos = (pos[0] + 1, pos[1] - 1)
-            continue
+    speed = speed_btn.selected()
 
-        if i == 'DR':
-            pos = (pos[0] + 1, pos[1] + 1)
-            continue
+    if speed in SPEED_STEPS:
+        frame_steps.val += 1
 
-        if i == 'R':
-            pos = (pos[0], pos[1] + 1)
-            continue
+        if frame_steps.val < SPEED_STEPS[speed]:
+            return False
 
-        if i == 'L':
-            pos = (pos[0], pos[1] - 1)
-            continue
+        frame_steps.val = 0
+        screen_update(fps)
+        return event_handler()
 
-        if i == 'U':
-            pos = (pos[0] - 1, pos[1])
-            continue
+    now = time.perf_counter()
 
-        if i == 'D':
-            pos = (pos[0] + 1, pos[1])
-            continue
+    if now < frame_deadline.val:
+        return False
 
-    if 0 <= pos[0] < MAZE_SIZE and 0 <= pos[1] < MAZE_SIZE:
+    frame_deadline.val = now + 1 / MAX_SPEED_FPS
 
-        return maze[pos[0]][pos[1]]
+    if speed == 'Max Speed':
+        screen_update(MAX_SPEED_FPS)
 
-    return None
+    return event_handler()
 
 
-def check_cell(cell: Optional[Cell]) -> str:
-    """Checks the Cell class object passed to it.
+def solver_step(maze: MazeType) -> int:
+    """Runs the solver for one frame and colors the cells it reached.
 
-    First checks if a Cell object was passed to it then checks its visited
-    value and state value.
+    How much of the search a frame shows depends on the selected speed:
+        1x, 10x, 100x = 1, 10 or 100 animation steps at the step's fps.
+        Max Speed, Instant = As many steps as fit in SEARCH_SHARE of a
+            1 / MAX_SPEED_FPS frame. Instant only draws the maze once the
+            solver is done.
+    A paused solver does not run unless a single frame was asked for.
 
     Args:
-        cell: Cell class object.
+        maze: Maze shown on screen.
 
     Returns:
-        A string corresponding to the state of Cell.
+        Frames per second to draw the frame at.
     """
-    if not cell:
-        return 'notValid'
+    task = solve_task.val
 
-    if cell.visited == 0:
-        if cell.state == 1:
-            return 'valid'
+    if solve_paused.val and not solve_single.val:
+        return MAX_SPEED_FPS
 
-        if cell.state == 2:
-            return 'start'
+    solve_single.val = False
+    speed = speed_btn.selected()
+    step_fps = SOLVER_FPS[task.algorithm]
+    until = None
+    fps = MAX_SPEED_FPS
 
-        if cell.state == 3:
-            return 'exit'
+    if speed in SPEED_STEPS:
+        frame_steps.val = 0
+        until = functools.partial(step_done, step_fps, SPEED_STEPS[speed])
 
-        return 'notValid'
+    began = time.perf_counter()
+    events = task.step(SEARCH_SHARE / MAX_SPEED_FPS, until)
+    stepped = time.perf_counter()
 
-    return 'visited'
+    for kind, index in events:
+        solve_recorder.val.record(kind, index)
+        color_event(maze, kind, index)
 
+    hud.search_time += stepped - began
+    hud.render_time += time.perf_counter() - stepped
 
-def backtrack_solver(maze: MazeType, row: int, col: int) -> bool:
-    """Pathfinding algorithm using backtracking recursion.
+    if until is not None and events and events[-1][0] in step_fps:
+        fps = step_fps[events[-1][0]]
 
-    This algorithm checks if the current Cell (row, col) is the exit of "maze"
-    and if not randomly chooses one of the 8 adjacent Cells (up, down, left,
-    right and the 4 diagonals) to check next. Will call itself recursively
-    passing the randomly selected row and col. Once it reaches a deadend or
-    a Cell that has already been visited it backtracks to the previous
-    recursive call and and chooses another adjacent Cell randomly but not one
-    it has already chosen.
+    if task.done:
+        finish_solve(maze)
+
+    return fps
+
+
+def step_done(step_fps: Dict[int, int], steps: int, kind: int,
+              index: int) -> bool:
+    """"until" callback of a solver step, counts the animation steps.
 
     Args:
-        maze: 2D list of Cell class objects.
-        row: Row of Cell to check.
-        col:  Column of Cell to check.
+        step_fps: The algorithm's SOLVER_FPS, its keys are the event kinds
+            that are animation steps.
+        steps: Animation steps per frame.
+        kind: Solver event kind.
+        index: Flat index of the cell the event is about.
 
     Returns:
-        Once it finds the exit, returns True, otherwise if all valid Cells
-        have been visited, returns False.
+        True once the frame has had all of its steps.
     """
-    if critical_event_handler():
-        solver_running.val = False
-        return False
-
-    if (0 <= row < MAZE_SIZE and 0 <= col < MAZE_SIZE and
-            maze[row][col].visited == 0 and maze[row][col].state > 0):
+    if kind in step_fps:
+        frame_steps.val += 1
 
-        maze[row][col].visited = 1
-        maze[row][col].color = START_COLOR
-        screen_update(30)
+    return frame_steps.val >= steps
 
-        if maze[row][col].state == 3:
-            return True
 
-        adj = [[0, 1], [0, -1], [1, 0], [-1, 0], [1, 1], [1, -1], [-1, 1],
-               [-1, -1]]
+def finish_solve(maze: MazeType) -> None:
+    """Shows the result of the finished or stopped solver.
 
-        rand.shuffle(adj)
+    Args:
+        maze: Maze shown on screen.
+    """
+    result = solve_task.val.result
+    algorithm = solve_task.val.algorithm
+    last_trace.val = solve_recorder.val.finish(result.path)
+    solve_task.val = None
+    solve_recorder.val = None
+    solve_paused.val = False
+    screen_update(60)
 
-        for i in enumerate(adj):
-            if backtrack_solver(maze, row + i[1][0], col + i[1][1]):
+    if result.found and result.stats.cached:
+        color_path(maze, result.path, START_COLOR, 0)
+        popup('DONE! (Cached)', START_COLOR)
 
-                return True
+    elif result.found:
+        if algorithm in PATH_FPS:
+            color_path(maze, result.path, START_COLOR, PATH_FPS[algorithm])
 
-            if not solver_running.val:
-                return False
+        popup('DONE!', START_COLOR)
 
-        maze[row][col].color = EXIT_COLOR
-        screen_update(20)  # Flash red to show backtracking.
-        maze[row][col].color = VALID_PATH_COLOR
-        screen_update(30)  # Then return to VALID_PATH_COLOR.
+    else:
+        popup('No Exit Found!', EXIT_COLOR)
 
-        return False
+    solver_running.val = False
 
-    return False
 
+def color_event(maze: MazeType, kind: int, index: int) -> None:
+    """Colors the cell a solver event is about.
 
-def breadth_first(maze: MazeType) -> bool:
-    """Uses Breadth First Search algorithm to find the exit to maze.
+    Args:
+        maze: Maze shown on screen.
+        kind: Solver event kind.
+        index: Flat index of the cell the event is about.
+    """
+    row, col = maze.pos(index)
 
-    This algorithm is allowed to move diagonal thus it prioritizes moving
-    diagonal since in any square grid style maze moving diagonal will always be
-    faster then not doing so.
+    if kind in (solver.ENQUEUE, solver.JUMP):
+        maze.set_color(row, col, SEARCH_COLOR)
 
-    Args:
-        maze: 2D list of Cell class objects.
+    elif kind in (solver.VISIT, solver.FOUND):
+        maze.set_color(row, col, START_COLOR)
 
-    Returns:
-        Once it finds the exit, returns True, otherwise if all valid Cells
-        have been visited, returns False.
-    """
-    queue = [[]]
-    path = []
-    cell = get_path_cell(maze, path)
+    elif kind == solver.BACKTRACK:
+        if speed_btn.selected() == '1x':
+            maze.set_color(row, col, EXIT_COLOR)
+            screen_update(20)  # Flash red to show backtracking.
 
-    while not critical_event_handler():
+        maze.set_color(row, col, VALID_PATH_COLOR)
 
-        if not queue:
-            return False
 
-        path = queue[0]
-        queue.pop(0)  # Dequeue
+def replay(maze: MazeType, trace: recording.Trace) -> None:
+    """Replays a recorded solve on maze at the selected speed.
 
-        for i in ['UL', 'UR', 'DL', 'DR', 'R', 'L', 'U', 'D']:
-            path = path + [i]
-            cell = get_path_cell(maze, path)
+    Left and right arrow keys seek back and forward by a tenth of the trace,
+    Space stops the replay.
 
-            if check_cell(cell) == 'exit':
-                color_path(maze, path, START_COLOR)
-                return True
+    Args:
+        maze: Maze shown on screen, must be the maze the trace was recorded
+            on.
+        trace: Trace of the solve to replay.
+    """
+    player = recording.TracePlayer(trace)
+    step_fps = SOLVER_FPS[trace.algorithm]
+    path_fps = PATH_FPS.get(trace.algorithm)
+    reset(maze)
+    frame_steps.val = 0
+    frame_deadline.val = 0.0
+    event_handler = functools.partial(replay_event_handler, maze, player)
 
-            if check_cell(cell) == 'valid':
-                queue.append(path)  # Enqueue
-                cell.color = SEARCH_COLOR
-                cell.visited = 1
+    for kind, index in player:
+        color_event(maze, kind, index)
 
-            path = path[:-1]
+        if kind == solver.FOUND:
+            fps = path_fps
 
-        screen_update(120)
+        else:
+            fps = step_fps.get(kind)
 
-    return False
+        if fps and solver_frame(fps, event_handler):
+            break
 
+    screen_update(60)
 
-def a_star(maze: MazeType) -> bool:
-    """Uses A* algorithm to find the exit to maze.
 
-    This algorithm is allowed to move diagonal. Do not use closed list that
-    is typically used with A* becasue cell.visited status is already tracked
-    and g only ever increases by 1 which removes the need for closed list.
+def replay_event_handler(maze: MazeType,
+                         player: recording.TracePlayer) -> bool:
+    """Handles events in pygame during a replay.
 
     Args:
-        maze: 2D list of Cell class objects.
+        maze: Maze shown on screen.
+        player: TracePlayer of the running replay.
 
     Returns:
-        Once it finds the exit, returns True, otherwise if all valid Cells
-        have been visited, returns False.
+        True if the user asked the replay to stop.
     """
-    start_cell = maze[maze_start.val[0]][maze_start.val[1]]
-    open_list = [start_cell]
-    possible_child = [[0, 1], [0, -1], [1, 0], [-1, 0], [1, 1], [1, -1],
-                      [-1, 1], [-1, -1]]
-
-    while open_list != []:
-
-        if critical_event_handler():
-            return False
-
-        open_list.sort(key=lambda cell: cell.f)
-        current_cell = open_list.pop(0)
-        current_cell.visited = 1
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
 
-        if current_cell.state == 3:
+        if event.type in MOUSE_EVENTS:
+            mouse_event(maze, event)
 
-            while current_cell.state != 2:
-                critical_event_handler()
-                current_cell.color = START_COLOR
-                screen_update(60)
-                current_cell = current_cell.parent
+        if event.type != pygame.KEYDOWN:
+            continue
 
+        if event.key == pygame.K_SPACE:
             return True
 
-        children = []
+        if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            step = len(player.trace) // 10
 
-        for child in possible_child:
+            if event.key == pygame.K_LEFT:
+                step = -step
 
-            row = current_cell.row + child[0]
-            col = current_cell.col + child[1]
+            player.seek(player.position + step)
+            show_marks(maze, player.marks)
 
-            if (0 <= row < MAZE_SIZE and 0 <= col < MAZE_SIZE and
-                    maze[row][col].state != 0 and
-                    maze[row][col].visited != 1 and
-                    maze[row][col] != start_cell):
-
-                children.append(maze[row][col])
-
-        for child in children:
+    return False
 
-            child.parent = current_cell
-            child.color = SEARCH_COLOR
-            child.visited = 1
-            screen_update(60)
 
-            child.g = current_cell.g + 1
+def show_marks(maze: MazeType, marks: bytearray) -> None:
+    """Colors every cell of maze from the marks of a TracePlayer."""
+    colors = maze.colors
 
-            child.h = math.sqrt((child.row - maze_exit.val[0])**2 +
-                                (child.col - maze_exit.val[1])**2)
+    for i in range(maze.size):
+        mark = marks[i]
 
-            child.f = child.g + child.h
+        if mark in MARK_COLORS:
+            colors[i] = PALETTE_INDEX[MARK_COLORS[mark]]
 
-            open_list.append(child)
+        else:
+            colors[i] = maze.state[i]
 
-    return False
+    view.blocks = None
+    full_redraw.val = True
 
 
 def main(maze: MazeType) -> None:
     """Handels the main execution of this program, pygame and user inputs.
 
     Loops infinitely, only way to exit is pygame window exit("x" button),
-    a system exit or if a critical error occurs.
+    a system exit or if a critical error occurs. A running solver is
+    stepped once per loop, so events are handled every frame while it runs.
 
     Args:
-        maze: 2D list of Cell class objects.
+        maze: Maze shown on screen.
     """
     while True:
 
@@ -804,26 +1273,63 @@ def main(maze: MazeType) -> None:
             if event.type == pygame.KEYDOWN:
                 maze = keyboard_event(maze, event)
 
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_event()
+            if event.type in MOUSE_EVENTS:
+                mouse_event(maze, event)
 
-        screen_update(60)
+        if solve_task.val is not None:
+            fps = solver_step(maze)
+            screen_update(fps, speed_btn.selected() != 'Instant')
+
+        else:
+            screen_update(60)
 
 
 # ------------
 #  Constants
 # ------------
-ALGO = ['A*', 'Breadth First', 'Random Backtracking']
+ALGO = ['A*', 'Breadth First', 'Random Backtracking', 'Bidirectional BFS',
+        'Bidirectional A*', 'Jump Point Search', 'Exit Distance Field',
+        'D* Lite']
+SOLVER_FPS = {'A*': {solver.ENQUEUE: 60},
+              'Breadth First': {solver.EXPAND: 120},
+              'Random Backtracking': {solver.VISIT: 30, solver.BACKTRACK: 30},
+              'Bidirectional BFS': {solver.EXPAND: 120},
+              'Bidirectional A*': {solver.ENQUEUE: 60},
+              'Jump Point Search': {solver.JUMP: 30},
+              'Exit Distance Field': {solver.EXPAND: 120},
+              'D* Lite': {solver.ENQUEUE: 60}}
+PATH_FPS = {'A*': 60, 'Breadth First': 45, 'Bidirectional BFS': 45,
+            'Bidirectional A*': 60, 'Jump Point Search': 60,
+            'Exit Distance Field': 60, 'D* Lite': 60}
+SPEED = ['1x', '10x', '100x', 'Max Speed', 'Instant']
+SPEED_STEPS = {'1x': 1, '10x': 10, '100x': 100}
+MAX_SPEED_FPS = 60
+# Part of a frame the solver may run for, the rest is left to draw its events.
+SEARCH_SHARE = 0.5
+MOUSE_EVENTS = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                pygame.MOUSEMOTION, pygame.MOUSEWHEEL)
 MAZE_SIZE = 30
-CELL_SIZE = (20, 20)
+# Zoom levels as (pixels, cells), drawing that many cells in that many
+# pixels across. Below a pixel per cell only every few cells are drawn.
+ZOOMS = [(1, 64), (1, 32), (1, 16), (1, 8), (1, 4), (1, 2), (1, 1), (2, 1),
+         (3, 1), (4, 1), (6, 1), (8, 1), (11, 1), (16, 1), (22, 1), (32, 1),
+         (44, 1), (64, 1)]
+MARGIN_ZOOM = 8  # Pixels per cell from which cells are drawn apart.
 CELL_MARGIN = 2
-TOP_PADDING = 160
+# Most changed cells drawn one by one at a pixel per cell or more, past it
+# one update of the whole view is cheaper than that many small ones.
+MAX_DIRTY_RECTS = 512
+VIEW_SIZE = 660
+TOP_PADDING = 200
 MAZE_BG_PADDING = 25
-MAZE_BG_W = MAZE_SIZE * (CELL_SIZE[0] + CELL_MARGIN) + CELL_MARGIN
-MAZE_BG_H = MAZE_SIZE * (CELL_SIZE[1] + CELL_MARGIN) + CELL_MARGIN
+MAZE_BG_W = VIEW_SIZE + CELL_MARGIN
+MAZE_BG_H = VIEW_SIZE + CELL_MARGIN
 CELL_OFFSET_X = MAZE_BG_PADDING + CELL_MARGIN
 CELL_OFFSET_Y = MAZE_BG_PADDING + CELL_MARGIN + TOP_PADDING
-SCREEN_W = MAZE_BG_W + 2 * MAZE_BG_PADDING
+HUD_X = MAZE_BG_W + 2 * MAZE_BG_PADDING
+HUD_W = 240
+HUD_INTERVAL = 0.25  # Seconds between redraws of the performance panel.
+SCREEN_W = HUD_X + HUD_W
 SCREEN_H = MAZE_BG_H + 2 * MAZE_BG_PADDING + TOP_PADDING
 SCREEN_BG_COLOR = (0, 0, 0)
 MAZE_BG_COLOR = (100, 100, 100)
@@ -836,6 +1342,24 @@ NOT_SELECTED = (190, 190, 190)
 SELECTED = (0, 222, 20)
 TEXT_COLOR = (220, 220, 220)
 FONT_SIZE = 20
+# Cell colors, the first four are indexed by cell state.
+PALETTE = [WALL_COLOR, VALID_PATH_COLOR, START_COLOR, EXIT_COLOR, SEARCH_COLOR]
+PALETTE_INDEX = {color: i for i, color in enumerate(PALETTE)}
+# PALETTE indices from lowest to highest rank. Zoomed out, a pixel showing
+# many cells takes the color of the highest ranked one.
+COLOR_RANKS = [PALETTE_INDEX[color] for color in (
+    WALL_COLOR, VALID_PATH_COLOR, SEARCH_COLOR, START_COLOR, EXIT_COLOR)]
+# Translate tables, PALETTE index to a bit for its rank and OR-ed rank bits
+# back to the PALETTE index of the highest rank.
+RANK_BITS = bytes(1 << COLOR_RANKS.index(i) if i in COLOR_RANKS else 0
+                  for i in range(256))
+TOP_RANK = bytes(COLOR_RANKS[max(bits.bit_length() - 1, 0)]
+                 if bits < 1 << len(COLOR_RANKS) else 0 for bits in range(256))
+# Colors of the marks a replayed trace leaves, others show the cell state.
+MARK_COLORS = {solver.VISIT + 1: START_COLOR,
+               solver.ENQUEUE + 1: SEARCH_COLOR,
+               solver.JUMP + 1: SEARCH_COLOR,
+               solver.FOUND + 1: START_COLOR}
 STARTING_MAZE = [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
                  [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
                  [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0],
@@ -874,7 +1398,18 @@ STARTING_MAZE = [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0,
 maze_start = Mem((0, 14))
 maze_exit = Mem((29, 14))
 solver_running = Mem(False)
-maze = list(maze_maker(MAZE_SIZE, STARTING_MAZE))
+full_redraw = Mem(True)
+frame_steps = Mem(0)
+frame_deadline = Mem(0.0)
+last_trace = Mem(None)
+solve_task = Mem(None)
+solve_recorder = Mem(None)
+solve_paused = Mem(False)
+solve_single = Mem(False)
+drag_button = Mem(None)
+drag_cell = Mem(None)
+result_cache = solver.ResultCache()
+maze = maze_maker(MAZE_SIZE, STARTING_MAZE)
 
 
 # ------------
@@ -896,11 +1431,29 @@ instructions_run = font.render("Space = Start/Stop Maze Solver", True,
                                TEXT_COLOR)
 instructions_reset = font.render("R = Reset Maze", True, TEXT_COLOR)
 instructions_clear = font.render("C = Clear Maze", True, TEXT_COLOR)
+instructions_pause = font.render("Enter = Pause, Right = Step", True,
+                                 TEXT_COLOR)
+instructions_replay = font.render("P = Replay Last Solve", True, TEXT_COLOR)
+hud_header = font.render("Performance:", True, (220, 220, 10))
+instructions_zoom = font.render("Mouse Wheel = Zoom", True, TEXT_COLOR)
+instructions_pan = font.render("Middle Drag = Pan", True, TEXT_COLOR)
+instructions_fit = font.render("F = Fit Maze", True, TEXT_COLOR)
 maze_bg = pygame.Rect(MAZE_BG_PADDING, MAZE_BG_PADDING + TOP_PADDING, MAZE_BG_W,
                       MAZE_BG_H)
-algo_btn = Btn(ALGO, SCREEN_W - 225, 5, 200, 45, 5)
+background = draw_background()
+algo_btn = Btn(ALGO, HUD_X - 410, 5, 190, 28, 5, rows=4)
+hud = Hud(HUD_X, 5, HUD_W - MAZE_BG_PADDING, 9 * 22)
+view = Viewport(CELL_OFFSET_X, CELL_OFFSET_Y, VIEW_SIZE, VIEW_SIZE)
+view.fit(maze)
 algo_btn.states[2] = True
 algo_btn.colors[2] = SELECTED
+speed_btn = Btn(SPEED, MAZE_BG_PADDING, TOP_PADDING - 10,
+                (MAZE_BG_W - 4 * 5) // 5, 28, 5, True)
+speed_btn.states[0] = True
+speed_btn.colors[0] = SELECTED
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        maze = maze_loader(sys.argv[1])
+
     main(maze)
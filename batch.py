@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Batch solving of many mazes over a pool of processes.
+
+solve_many() fans mazes out over a concurrent.futures.ProcessPoolExecutor
+and yields results as they complete. In memory grids are copied once into
+multiprocessing.shared_memory blocks that the workers solve in place instead
+of pickling the grid, maze files are opened by the workers themselves (see
+maze_io.py). At most max_in_flight mazes are queued or being solved at a
+time, so memory stays bounded however many mazes are passed in.
+
+Usage:
+    python batch.py MAZE_FILE [MAZE_FILE ...] [--algorithm A*] [--workers N]
+"""
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import (Any, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
+
+import maze_io
+import solver
+from grid import EXIT, START, Grid, PosType
+
+
+# ------------
+#  Type Alias
+# ------------
+MazeSource = Union[Grid, str, "os.PathLike[str]"]
+BatchResult = Tuple[int, solver.SolveResult]
+
+
+# ------------
+#  Functions
+# ------------
+def solve_shared(name: str, width: int, height: int,
+                 start: Optional[PosType], exit_pos: Optional[PosType],
+                 algorithm: str,
+                 options: Dict[str, Any]) -> solver.SolveResult:
+    """Solves a grid held in a shared memory block, run by a worker.
+
+    Args:
+        name: Name of the shared memory block holding the cell states.
+        width: Number of columns in the grid.
+        height: Number of rows in the grid.
+        start: (row, col) of the maze start, None if it has none.
+        exit_pos: (row, col) of the maze exit, None if it has none.
+        algorithm: Name of the algorithm to run.
+        options: Extra keyword arguments for the algorithm.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    state = block.buf[:width * height]
+
+    try:
+        result = solve_grid(Grid(width, height, state), start, exit_pos,
+                            algorithm, options)
+
+    finally:
+        state.release()  # block can not close while state is exported.
+        block.close()
+
+    return result
+
+
+def solve_file(path: str, algorithm: str,
+               options: Dict[str, Any]) -> solver.SolveResult:
+    """Loads and solves a maze file, run by a worker.
+
+    Binary maze files are memory mapped, so nothing but the path and the
+    result cross between processes.
+    """
+    grid, start, exit_pos = maze_io.read(path)
+
+    return solve_grid(grid, start, exit_pos, algorithm, options)
+
+
+def solve_grid(grid: Grid, start: Optional[PosType],
+               exit_pos: Optional[PosType], algorithm: str,
+               options: Dict[str, Any]) -> solver.SolveResult:
+    """Solves grid, a maze without a start or exit gives an empty result."""
+    if start is None or exit_pos is None:
+        return solver.SolveResult(algorithm, None, solver.SolveStats())
+
+    return solver.solve(grid, start, exit_pos, algorithm, **options)
+
+
+def share(grid: Grid) -> shared_memory.SharedMemory:
+    """Copies the cell states of grid into a new shared memory block."""
+    block = shared_memory.SharedMemory(create=True, size=max(grid.size, 1))
+    block.buf[:grid.size] = grid.state
+
+    return block
+
+
+def solve_many(mazes: Iterable[MazeSource], algorithm: str = 'A*',
+               workers: Optional[int] = None,
+               max_in_flight: Optional[int] = None,
+               **options: Any) -> Iterator[BatchResult]:
+    """Solves many mazes in parallel, yielding results as they complete.
+
+    Args:
+        mazes: Grids, with their start and exit cells set, or paths of maze
+            files. Read lazily, only as fast as the workers keep up.
+        algorithm: Name of the algorithm to run, a key of solver.ALGORITHMS.
+        workers: Number of worker processes, os.cpu_count() by default.
+        max_in_flight: Most mazes queued or being solved at once, twice the
+            number of workers by default so no worker waits for work.
+        **options: Extra keyword arguments for the algorithm, they must be
+            picklable.
+
+    Yields:
+        Tuples of the position of the maze in mazes and its SolveResult, in
+        the order the solves complete.
+
+    Raises:
+        KeyError: algorithm is not a key of solver.ALGORITHMS.
+    """
+    solver.ALGORITHMS[algorithm]  # Fail before starting any processes.
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    blocks = {}
+    pending = {}
+    sources = enumerate(mazes)
+    exhausted = False
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    item = next(sources, None)
+
+                    if item is None:
+                        exhausted = True
+                        break
+
+                    position, maze = item
+
+                    if isinstance(maze, Grid):
+                        block = share(maze)
+                        future = pool.submit(
+                            solve_shared, block.name, maze.width,
+                            maze.height, maze.find(START), maze.find(EXIT),
+                            algorithm, options)
+                        blocks[future] = block
+
+                    else:
+                        future = pool.submit(solve_file, os.fspath(maze),
+                                             algorithm, options)
+
+                    pending[future] = position
+
+                if not pending:
+                    break
+
+                done = wait(pending, return_when=FIRST_COMPLETED)[0]
+
+                for future in done:
+                    position = pending.pop(future)
+                    release(blocks.pop(future, None))
+                    yield position, future.result()
+
+        finally:
+            for future in pending:
+                future.cancel()
+
+            for block in blocks.values():
+                release(block)
+
+
+def release(block: Optional[shared_memory.SharedMemory]) -> None:
+    """Closes and frees a shared memory block made by share()."""
+    if block is not None:
+        block.close()
+        block.unlink()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Solves maze files from the command line and prints the results."""
+    parser = argparse.ArgumentParser(
+        description='Solve many maze files in parallel.')
+    parser.add_argument('mazes', nargs='+', help='maze files to solve')
+    parser.add_argument('--algorithm', default='A*',
+                        choices=list(solver.ALGORITHMS),
+                        help='algorithm to run')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes, one per core by default')
+    args = parser.parse_args(argv)
+
+    for position, result in solve_many(args.mazes, args.algorithm,
+                                       args.workers):
+        print('%s: %s, length %d, %d expanded, %.4f s' % (
+            args.mazes[position], 'found' if result.found else 'no path',
+            max(len(result.path) - 1, 0), result.stats.expanded,
+            result.stats.elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Command line benchmark for the maze solver pathfinders.
+
+Runs the solvers headlessly over a matrix of maze sizes, wall densities and
+seeds and reports wall time, nodes expanded, peak memory, path length and
+the optimality gap versus Breadth First Search.
+
+Example:
+    python benchmark.py --sizes 30 256 1024 --densities 0.1 0.3 \\
+        --seeds 3 --json results.json --csv results.csv
+"""
+import argparse
+import csv
+import json
+import random as rand
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import maze_generators
+import solver
+from grid import EXIT, PATH, START, WALL, Grid
+
+
+# ------------
+#  Type Alias
+# ------------
+RowType = Dict[str, Any]
+
+
+# ------------
+#  Constants
+# ------------
+FIELDS = ['size', 'density', 'seed', 'algorithm', 'found', 'path_length',
+          'expanded', 'enqueued', 'peak_frontier', 'heap_ops', 'wall_time',
+          'peak_memory', 'optimality_gap', 'cancelled']
+REFERENCE = 'Breadth First'
+
+
+# ------------
+#  Functions
+# ------------
+def random_grid(size: int, density: float, seed: int) -> Grid:
+    """Makes a size x size grid with randomly placed walls.
+
+    The start is the top left corner and the exit the bottom right corner.
+
+    Args:
+        size: Number of rows and columns.
+        density: Chance of each cell being a wall, 0.0 to 1.0.
+        seed: Seed for the wall placement.
+
+    Returns:
+        The generated Grid.
+    """
+    rng = rand.Random(seed)
+    cells = size * size
+    walls = int(cells * density)
+    state = bytearray([PATH]) * cells
+
+    for i in rng.sample(range(cells), walls):
+        state[i] = WALL
+
+    state[0] = START
+    state[-1] = EXIT
+
+    return Grid(size, size, state)
+
+
+def make_grid(generator: str, size: int, density: float, seed: int) -> Grid:
+    """Makes the maze for one cell of the benchmark matrix.
+
+    Args:
+        generator: 'random' for random_grid() or a key of
+            maze_generators.GENERATORS.
+        size: Number of rows and columns.
+        density: Wall density for 'random', starting fill for 'cave' and not
+            used by the other generators.
+        seed: Seed for the maze.
+    """
+    if generator == 'random':
+        return random_grid(size, density, seed)
+
+    if generator == 'cave':
+        return maze_generators.generate(generator, size, seed=seed,
+                                        fill=density)
+
+    return maze_generators.generate(generator, size, seed=seed)
+
+
+def deadline_handler(limit: float) -> solver.EventHandler:
+    """Returns an "on_event" callback that cancels a solve after limit seconds.
+
+    The clock is only checked every 4096 events to keep the callback cheap.
+    """
+    deadline = time.perf_counter() + limit
+    count = [0]
+
+    def on_event(kind: int, index: int) -> bool:
+        count[0] += 1
+        return not count[0] & 4095 and time.perf_counter() > deadline
+
+    return on_event
+
+
+def run_one(grid: Grid, algorithm: str, seed: int, memory: bool,
+            time_limit: Optional[float]
+            ) -> Tuple[solver.SolveResult, Optional[int]]:
+    """Solves grid once, from cold.
+
+    The fields, indexes, planners and graphs solver.py keeps between solves
+    are dropped first, so every run measures a whole solve rather than
+    reusing the work of the previous run on the same grid.
+
+    Args:
+        grid: Grid to solve, with its start and exit cells set.
+        algorithm: Name of the algorithm to run.
+        seed: Seed for algorithms that use randomness.
+        memory: True to trace allocations while solving.
+        time_limit: Seconds after which the solve is cancelled, None for no
+            limit.
+
+    Returns:
+        Tuple of the SolveResult and the peak traced memory in bytes, None if
+        memory was False.
+    """
+    options = {'seed': seed} if algorithm == 'Random Backtracking' else {}
+    on_event = deadline_handler(time_limit) if time_limit else None
+    peak = None
+    solver.reset_caches()
+
+    if memory:
+        tracemalloc.start()
+
+    result = solver.solve(grid, grid.find(START), grid.find(EXIT), algorithm,
+                          on_event, **options)
+
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result, peak
+
+
+def benchmark(sizes: Sequence[int], densities: Sequence[float],
+              seeds: Sequence[int], algorithms: Sequence[str],
+              memory: bool = True, time_limit: Optional[float] = None,
+              generator: str = 'random') -> Iterator[RowType]:
+    """Runs every algorithm over every maze in the matrix.
+
+    Wall time comes from an untraced run, peak memory from a second run
+    under tracemalloc since tracing slows the solver down.
+
+    Args:
+        sizes: Maze sizes, each maze is size x size.
+        densities: Wall densities.
+        seeds: Seeds, each gives a different maze per size and density.
+        algorithms: Names of the algorithms to run.
+        memory: True to measure peak memory.
+        time_limit: Seconds after which a single solve is cancelled.
+        generator: Maze generator, see make_grid().
+
+    Yields:
+        A dict per solve with the keys in FIELDS.
+    """
+    for size in sizes:
+        for density in densities:
+            for seed in seeds:
+                grid = make_grid(generator, size, density, seed)
+                reference = None
+
+                if REFERENCE in solver.ALGORITHMS:
+                    reference = run_one(grid, REFERENCE, seed, False,
+                                        time_limit)[0]
+
+                for algorithm in algorithms:
+                    if algorithm == REFERENCE and reference:
+                        result = reference
+
+                    else:
+                        result = run_one(grid, algorithm, seed, False,
+                                         time_limit)[0]
+
+                    peak = None
+
+                    if memory:
+                        peak = run_one(grid, algorithm, seed, True,
+                                       time_limit)[1]
+
+                    gap = None
+
+                    if (result.found and reference and reference.found and
+                            not reference.stats.cancelled):
+                        gap = len(result.path) - len(reference.path)
+
+                    yield {'size': size,
+                           'density': density,
+                           'seed': seed,
+                           'algorithm': algorithm,
+                           'found': result.found,
+                           'path_length': max(len(result.path) - 1, 0),
+                           'expanded': result.stats.expanded,
+                           'enqueued': result.stats.enqueued,
+                           'peak_frontier': result.stats.peak_frontier,
+                           'heap_ops': result.stats.heap_ops,
+                           'wall_time': result.stats.elapsed,
+                           'peak_memory': peak,
+                           'optimality_gap': gap,
+                           'cancelled': result.stats.cancelled}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the maze solver pathfinders headlessly.')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[30, 64, 128, 256],
+                        help='maze sizes, each maze is size x size')
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=[0.0, 0.2, 0.35],
+                        help='chance of each cell being a wall')
+    parser.add_argument('--seeds', type=int, default=3,
+                        help='number of seeds (mazes) per size and density')
+    parser.add_argument('--algorithms', nargs='+',
+                        default=list(solver.ALGORITHMS),
+                        choices=list(solver.ALGORITHMS),
+                        help='algorithms to run')
+    parser.add_argument('--generator', default='random',
+                        choices=['random'] + list(
+                            maze_generators.GENERATORS),
+                        help='maze generator, density is the wall chance '
+                        'for random and the starting fill for cave')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='seconds after which a solve is cancelled')
+    parser.add_argument('--json', help='write results to this JSON file')
+    parser.add_argument('--csv', help='write results to this CSV file')
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the benchmark from the command line and reports the results."""
+    args = parse_args(argv)
+    rows = []
+    print('%6s %7s %4s %-20s %5s %8s %10s %9s %11s %4s' % (
+        'size', 'density', 'seed', 'algorithm', 'found', 'length',
+        'expanded', 'time (s)', 'peak (KiB)', 'gap'))
+
+    for row in benchmark(args.sizes, args.densities, range(args.seeds),
+                         args.algorithms, not args.no_memory,
+                         args.time_limit, args.generator):
+        rows.append(row)
+        peak = row['peak_memory']
+        gap = row['optimality_gap']
+        print('%6d %7.2f %4d %-20s %5s %8d %10d %9.4f %11s %4s' % (
+            row['size'], row['density'], row['seed'], row['algorithm'],
+            'yes' if row['found'] else 'no', row['path_length'],
+            row['expanded'], row['wall_time'],
+            '-' if peak is None else '%.1f' % (peak / 1024),
+            '-' if gap is None else gap))
+        sys.stdout.flush()
+
+    if args.json:
+        with open(args.json, 'w') as out:
+            json.dump(rows, out, indent=2)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as out:
+            writer = csv.DictWriter(out, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
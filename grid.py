@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""Compact array-backed maze grid.
+
+A maze is stored as one flat buffer holding a byte per cell, indexed by
+row * width + col. The scratch data a search needs (visited, g and parent)
+lives in separate typed arrays so the grid itself stays small and scans over
+it stay cache friendly. For mazes bigger than memory the state buffer can be
+a memory mapped file (see maze_io.py) and MappedScratch keeps the scratch
+arrays in memory mapped temporary files.
+
+Correlation table for cell states:
+    0 = Maze wall
+    1 = Valid path
+    2 = Start of maze
+    3 = Exit of maze
+"""
+import mmap
+import tempfile
+from array import array
+from collections import deque
+from typing import Any, BinaryIO, List, Optional, Tuple
+
+
+# ------------
+#  Type Alias
+# ------------
+PosType = Tuple[int, int]
+DefaultMaze = List[List[int]]
+
+
+# ------------
+#  Constants
+# ------------
+WALL = 0
+PATH = 1
+START = 2
+EXIT = 3
+FIND_CHUNK = 1 << 20  # Bytes searched at a time by Grid.find_index().
+BLOCK_SIZE = 1 << 16  # Entries per block of a BlockQueue.
+MASK64 = (1 << 64) - 1
+
+
+# ------------
+#   Classes
+# ------------
+class Grid(object):
+    """Maze grid backed by a flat buffer of cell states.
+
+    Attributes:
+        width: Number of columns in the grid.
+        height: Number of rows in the grid.
+        size: Number of cells in the grid.
+        state: Writable buffer with one byte per cell. A bytearray unless a
+            different buffer was passed in.
+        version: Number of edits that changed which cells are walls. Caches
+            of search results compare it to tell if they are still valid.
+        watchers: List of callbacks called with the flat index of each cell
+            that turns into a wall or stops being one, or with -1 after
+            touch() since any cell may have changed.
+        zobrist: Zobrist hash of the cell states, see zobrist_key().
+    """
+
+    def __init__(self, width: int, height: int, state: Any = None) -> None:
+        """Inits Grid, all walls unless a state buffer is given.
+
+        Raises:
+            ValueError: state does not hold exactly width * height bytes.
+        """
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+        if state is None:
+            state = bytearray(self.size)
+
+        if len(state) != self.size:
+            raise ValueError('state holds %d cells, expected %d x %d'
+                             % (len(state), width, height))
+
+        self.state = state
+        self.version = 0
+        self.watchers = []
+        self._zobrist = None
+
+    @classmethod
+    def from_rows(cls, rows: DefaultMaze) -> "Grid":
+        """Makes a Grid from a 2D list of cell states."""
+        width = len(rows[0]) if rows else 0
+        state = bytearray()
+
+        for row in rows:
+            if len(row) != width:
+                raise ValueError('all rows must have the same length')
+
+            state.extend(row)
+
+        return cls(width, len(rows), state)
+
+    def rows(self) -> DefaultMaze:
+        """Returns the grid as a 2D list of cell states."""
+        return [list(self.state[i:i + self.width])
+                for i in range(0, self.size, self.width)]
+
+    def index(self, row: int, col: int) -> int:
+        """Returns the flat index of (row, col)."""
+        return row * self.width + col
+
+    def pos(self, index: int) -> PosType:
+        """Returns the (row, col) of a flat index."""
+        return divmod(index, self.width)
+
+    def in_bounds(self, row: int, col: int) -> bool:
+        """Checks if (row, col) is inside the grid."""
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def get(self, row: int, col: int) -> int:
+        """Returns the state of the cell at (row, col)."""
+        return self.state[row * self.width + col]
+
+    def set(self, row: int, col: int, value: int) -> None:
+        """Sets the state of the cell at (row, col).
+
+        Bumps version and tells the watchers if the cell turns into a wall
+        or stops being one.
+        """
+        index = row * self.width + col
+        old = self.state[index]
+        flipped = (old == WALL) != (value == WALL)
+        self.state[index] = value
+
+        if self._zobrist is not None and old != value:
+            self._zobrist ^= zobrist_key(index, old) ^ zobrist_key(index, value)
+
+        if flipped:
+            self.version += 1
+
+            for watcher in self.watchers:
+                watcher(index)
+
+    def touch(self) -> None:
+        """Bumps version after writing to state directly instead of set()."""
+        self.version += 1
+        self._zobrist = None
+
+        for watcher in self.watchers:
+            watcher(-1)
+
+    @property
+    def zobrist(self) -> int:
+        """Zobrist hash of the cell states.
+
+        The xor of zobrist_key() of every cell. Worked out over the whole
+        grid the first time it is read, after that set() keeps it up to date
+        in constant time per edit. touch() makes it be worked out again.
+        """
+        if self._zobrist is None:
+            value = 0
+
+            for index, cell in enumerate(self.state):
+                if cell != WALL:
+                    value ^= zobrist_key(index, cell)
+
+            self._zobrist = value
+
+        return self._zobrist
+
+    def find(self, value: int) -> Optional[PosType]:
+        """Returns the (row, col) of the first cell in value state, or None."""
+        index = self.find_index(value)
+
+        if index < 0:
+            return None
+
+        return self.pos(index)
+
+    def find_index(self, value: int, reverse: bool = False) -> int:
+        """Returns the flat index of the first cell in value state, or -1.
+
+        Buffers without find() and rfind(), such as a memoryview of a memory
+        mapped file, are searched FIND_CHUNK bytes at a time so the whole
+        grid is never copied.
+
+        Args:
+            value: Cell state to look for.
+            reverse: True to return the last cell in value state instead.
+        """
+        needle = bytes([value])
+        state = self.state
+
+        if hasattr(state, 'find'):
+            return state.rfind(needle) if reverse else state.find(needle)
+
+        starts = range(0, self.size, FIND_CHUNK)
+
+        for start in reversed(starts) if reverse else starts:
+            chunk = bytes(state[start:start + FIND_CHUNK])
+            index = chunk.rfind(needle) if reverse else chunk.find(needle)
+
+            if index >= 0:
+                return start + index
+
+        return -1
+
+    def copy(self) -> "Grid":
+        """Returns a Grid with its own copy of the state buffer."""
+        return Grid(self.width, self.height, bytearray(self.state))
+
+
+class Scratch(object):
+    """Per-search scratch arrays for a Grid.
+
+    Every array is indexed by row * width + col of the grid it was made for.
+
+    Attributes:
+        size: Number of cells each array holds.
+        visited: bytearray, nonzero once a search has seen the cell.
+        g: array of signed ints, number of moves from the start.
+        parent: array of signed ints, flat index of the cell a search came
+            from, -1 if none.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Inits Scratch with every cell unvisited and without a parent."""
+        self.size = size
+        self.visited = bytearray(size)
+        self.g = array('i', bytes(4 * size))
+        self.parent = array('i', [-1]) * size
+
+    def clear(self) -> None:
+        """Resets every array so the Scratch can be reused by a new search."""
+        self.visited[:] = bytes(self.size)
+        self.g[:] = array('i', bytes(4 * self.size))
+        self.parent[:] = array('i', [-1]) * self.size
+
+    def path_to(self, grid: Grid, index: int) -> List[PosType]:
+        """Follows parent indices from index back to the start of a search.
+
+        Returns:
+            List of (row, col) positions from the start to index inclusive.
+        """
+        path = []
+
+        while index != -1:
+            path.append(grid.pos(index))
+            index = self.parent[index]
+
+        path.reverse()
+        return path
+
+    def queue(self) -> Any:
+        """Returns an empty FIFO queue of cell indices for a search."""
+        return deque()
+
+
+class MappedScratch(Scratch):
+    """Scratch whose arrays live in memory mapped temporary files.
+
+    For mazes too big to keep the scratch arrays in memory. The operating
+    system pages the arrays in and out as the search touches them, so
+    resident memory stays bounded however large the maze is. Queues made by
+    queue() spill to a temporary file as well. The files are deleted when
+    the MappedScratch is closed or garbage collected.
+
+    Attributes:
+        size: Number of cells each array holds.
+        visited: mmap of a byte per cell, nonzero once a search has seen the
+            cell.
+        g: memoryview of signed ints over an mmap, moves from the start.
+        parent: memoryview of signed ints over an mmap, flat index of the
+            cell a search came from, -1 if none.
+        directory: Directory the temporary files are made in, None for the
+            system default.
+    """
+
+    def __init__(self, size: int, directory: Optional[str] = None) -> None:
+        """Inits MappedScratch with every cell unvisited and without a parent.
+
+        Args:
+            size: Number of cells each array holds.
+            directory: Directory to make the temporary files in, best on a
+                fast local disk with room for 9 bytes per cell.
+        """
+        self.size = size
+        self.directory = directory
+        self._files = []
+        self._maps = [self._map(size), self._map(4 * size),
+                      self._map(4 * size)]
+        self.visited = self._maps[0]
+        self.g = memoryview(self._maps[1]).cast('i')
+        self.parent = memoryview(self._maps[2]).cast('i')
+        self._spill = None
+        self.clear()
+
+    def clear(self) -> None:
+        """Resets every array, a block at a time in file order."""
+        for data, fill in zip(self._maps, (b'\0', b'\0', b'\xff')):
+            chunk = fill * FIND_CHUNK
+
+            for start in range(0, len(data), FIND_CHUNK):
+                end = min(start + FIND_CHUNK, len(data))
+                data[start:end] = chunk[:end - start]
+
+    def queue(self) -> "BlockQueue":
+        """Returns an empty BlockQueue that spills to a temporary file."""
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(dir=self.directory)
+
+        return BlockQueue(self._spill)
+
+    def close(self) -> None:
+        """Unmaps the arrays and deletes the temporary files."""
+        self.g.release()
+        self.parent.release()
+
+        for data in self._maps:
+            data.close()
+
+        for scratch_file in self._files:
+            scratch_file.close()
+
+        if self._spill is not None:
+            self._spill.close()
+
+        self._files = []
+        self._maps = []
+
+    def _map(self, nbytes: int) -> mmap.mmap:
+        """Returns a read/write mmap of a new temporary file of nbytes."""
+        scratch_file = tempfile.TemporaryFile(dir=self.directory)
+        scratch_file.truncate(max(nbytes, 1))
+        self._files.append(scratch_file)
+
+        return mmap.mmap(scratch_file.fileno(), max(nbytes, 1))
+
+
+class BlockQueue(object):
+    """FIFO queue of ints that keeps at most two blocks in memory.
+
+    Entries are appended to a tail block and popped from a head block. Full
+    tail blocks in between are written to the end of a spill file and read
+    back in order, so the file is only ever accessed a block at a time.
+    Several queues can share one spill file.
+
+    Attributes:
+        spill: Binary file full blocks are written to.
+        block_size: Number of entries per block.
+    """
+
+    def __init__(self, spill: BinaryIO, block_size: int = BLOCK_SIZE) -> None:
+        """Inits an empty BlockQueue spilling into spill."""
+        self.spill = spill
+        self.block_size = block_size
+        self._head = array('i')
+        self._head_pos = 0
+        self._tail = array('i')
+        self._blocks = deque()  # File offsets of the spilled blocks.
+        self._len = 0
+
+    def __len__(self) -> int:
+        """Number of entries in the queue."""
+        return self._len
+
+    def append(self, value: int) -> None:
+        """Adds value to the end of the queue."""
+        tail = self._tail
+        tail.append(value)
+        self._len += 1
+
+        if len(tail) == self.block_size:
+            self.spill.seek(0, 2)
+            self._blocks.append(self.spill.tell())
+            tail.tofile(self.spill)
+            self._tail = array('i')
+
+    def popleft(self) -> int:
+        """Removes and returns the first entry of the queue.
+
+        Raises:
+            IndexError: The queue is empty.
+        """
+        if self._head_pos == len(self._head):
+            self._head = array('i')
+            self._head_pos = 0
+
+            if self._blocks:
+                self.spill.seek(self._blocks.popleft())
+                self._head.fromfile(self.spill, self.block_size)
+
+            elif self._tail:
+                self._head, self._tail = self._tail, self._head
+
+            else:
+                raise IndexError('pop from an empty BlockQueue')
+
+        value = self._head[self._head_pos]
+        self._head_pos += 1
+        self._len -= 1
+
+        return value
+
+
+# ------------
+#  Functions
+# ------------
+def zobrist_key(index: int, value: int) -> int:
+    """Returns the random 64 bit key of a cell being in value state.
+
+    Keys are mixed out of the index and state with splitmix64 instead of
+    being kept in a table, so they cost no memory and are the same in every
+    run. Walls have key 0, so an all wall grid hashes to 0 and only open
+    cells have to be visited to hash a grid.
+    """
+    if value == WALL:
+        return 0
+
+    z = (index * 4 + value) * 0x9e3779b97f4a7c15 & MASK64
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9 & MASK64
+    z = (z ^ (z >> 27)) * 0x94d049bb133111eb & MASK64
+
+    return z ^ (z >> 31)
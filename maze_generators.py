@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""Procedural maze generators for large grids.
+
+Every generator writes straight into the state buffer of a grid.Grid and
+takes a seed, the same seed always gives the same maze.
+
+The perfect maze generators (recursive division, Prim, Kruskal and Wilson)
+work on a lattice of nodes at odd (row, col) positions, the cells between
+two nodes are the passages and every cell at an even (row, col) is a wall.
+Diagonal moves can only cut the corner between two passages of the same
+node, so the solvers can not slip through a wall.
+
+The cave generator is a cellular automaton. It uses NumPy to update the
+whole grid at once when it is installed and falls back to plain Python
+otherwise, both give the same cave for the same seed.
+"""
+import random as rand
+from array import array
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from grid import EXIT, PATH, START, WALL, Grid
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only used to speed up caves.
+    np = None
+
+
+# ------------
+#  Constants
+# ------------
+NODE_MOVES = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+# ------------
+#  Functions
+# ------------
+def lattice(grid: Grid) -> Tuple[int, int]:
+    """Returns the (rows, cols) of the node lattice that fits in grid."""
+    return (grid.height - 1) // 2, (grid.width - 1) // 2
+
+
+def node_cell(grid: Grid, node: int, cols: int) -> int:
+    """Returns the flat index in grid of a lattice node."""
+    row, col = divmod(node, cols)
+    return (2 * row + 1) * grid.width + 2 * col + 1
+
+
+def open_edge(grid: Grid, node_a: int, node_b: int, cols: int) -> None:
+    """Opens the two nodes and the passage between them."""
+    cell_a = node_cell(grid, node_a, cols)
+    cell_b = node_cell(grid, node_b, cols)
+    state = grid.state
+    state[cell_a] = PATH
+    state[cell_b] = PATH
+    state[(cell_a + cell_b) // 2] = PATH
+
+
+def recursive_division(grid: Grid, rng: rand.Random) -> None:
+    """Builds a perfect maze by splitting open chambers with walls.
+
+    Every wall is written with a single slice assignment, rows as a
+    contiguous slice and columns as a slice with a step of grid.width.
+
+    Args:
+        grid: Grid to write the maze into.
+        rng: Random number generator to use.
+    """
+    state = grid.state
+    width = grid.width
+    rows, cols = lattice(grid)
+    state[:] = bytes(grid.size)
+
+    for row in range(rows):
+        start = (2 * row + 1) * width + 1
+        state[start:start + 2 * cols - 1] = bytes([PATH]) * (2 * cols - 1)
+
+        if row < rows - 1:
+            state[start + width:start + width + 2 * cols - 1:2] = (
+                bytes([PATH]) * cols)
+
+    chambers = [(0, 0, rows, cols)]  # Node rows/cols, end exclusive.
+
+    while chambers:
+        row0, col0, row1, col1 = chambers.pop()
+        height = row1 - row0
+        width_n = col1 - col0
+
+        if height < 2 or width_n < 2:
+            continue
+
+        if height > width_n or (height == width_n and rng.random() < 0.5):
+            split = rng.randrange(row0 + 1, row1)
+            gap = rng.randrange(col0, col1)
+            wall_row = (2 * split) * width
+            state[wall_row + 2 * col0 + 1:wall_row + 2 * col1] = (
+                bytes(2 * width_n - 1))
+            state[wall_row + 2 * gap + 1] = PATH
+            chambers.append((row0, col0, split, col1))
+            chambers.append((split, col0, row1, col1))
+
+        else:
+            split = rng.randrange(col0 + 1, col1)
+            gap = rng.randrange(row0, row1)
+            wall_col = 2 * split
+            top = (2 * row0 + 1) * width + wall_col
+            state[top:top + (2 * height - 1) * width:width] = (
+                bytes(2 * height - 1))
+            state[(2 * gap + 1) * width + wall_col] = PATH
+            chambers.append((row0, col0, row1, split))
+            chambers.append((row0, split, row1, col1))
+
+
+def prim(grid: Grid, rng: rand.Random) -> None:
+    """Builds a perfect maze with randomized Prim's algorithm.
+
+    Grows the maze from a random node, each step picks a random node on the
+    frontier and connects it to a random neighbor already in the maze.
+
+    Args:
+        grid: Grid to write the maze into.
+        rng: Random number generator to use.
+    """
+    grid.state[:] = bytes(grid.size)
+    rows, cols = lattice(grid)
+    nodes = rows * cols
+
+    if not nodes:
+        return
+
+    # 0 = not seen, 1 = on the frontier, 2 = in the maze.
+    seen = bytearray(nodes)
+    frontier = array('i')
+    first = rng.randrange(nodes)
+    seen[first] = 2
+    grid.state[node_cell(grid, first, cols)] = PATH
+    add_frontier(first, rows, cols, seen, frontier)
+
+    while frontier:
+        pick = rng.randrange(len(frontier))
+        node = frontier[pick]
+        frontier[pick] = frontier[-1]
+        frontier.pop()
+        row, col = divmod(node, cols)
+        links = []
+
+        for move in NODE_MOVES:
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if (0 <= n_row < rows and 0 <= n_col < cols and
+                    seen[n_row * cols + n_col] == 2):
+                links.append(n_row * cols + n_col)
+
+        open_edge(grid, node, links[rng.randrange(len(links))], cols)
+        seen[node] = 2
+        add_frontier(node, rows, cols, seen, frontier)
+
+
+def add_frontier(node: int, rows: int, cols: int, seen: bytearray,
+                 frontier: array) -> None:
+    """Adds the unseen neighbors of node to the Prim frontier."""
+    row, col = divmod(node, cols)
+
+    for move in NODE_MOVES:
+        n_row = row + move[0]
+        n_col = col + move[1]
+
+        if 0 <= n_row < rows and 0 <= n_col < cols:
+            neighbor = n_row * cols + n_col
+
+            if seen[neighbor] == 0:
+                seen[neighbor] = 1
+                frontier.append(neighbor)
+
+
+def kruskal(grid: Grid, rng: rand.Random) -> None:
+    """Builds a perfect maze with randomized Kruskal's algorithm.
+
+    Visits every edge of the lattice in random order and opens it if it joins
+    two different sets, tracked with a union-find using path halving and
+    union by size.
+
+    Args:
+        grid: Grid to write the maze into.
+        rng: Random number generator to use.
+    """
+    grid.state[:] = bytes(grid.size)
+    rows, cols = lattice(grid)
+    nodes = rows * cols
+
+    if not nodes:
+        return
+
+    parent = array('i', range(nodes))
+    size = array('i', [1]) * nodes
+    # Edge 2 * node joins node to the right, 2 * node + 1 joins it below.
+    edges = array('i', range(2 * nodes))
+    rng.shuffle(edges)
+    joined = 1
+
+    for edge in edges:
+        node = edge >> 1
+
+        if edge & 1:
+            other = node + cols
+
+            if other >= nodes:
+                continue
+
+        else:
+            if node % cols == cols - 1:
+                continue
+
+            other = node + 1
+
+        root_a = find_root(parent, node)
+        root_b = find_root(parent, other)
+
+        if root_a == root_b:
+            continue
+
+        if size[root_a] < size[root_b]:
+            root_a, root_b = root_b, root_a
+
+        parent[root_b] = root_a
+        size[root_a] += size[root_b]
+        open_edge(grid, node, other, cols)
+        joined += 1
+
+        if joined == nodes:
+            break
+
+    if nodes == 1:
+        grid.state[node_cell(grid, 0, cols)] = PATH
+
+
+def find_root(parent: array, node: int) -> int:
+    """Finds the root of node in a union-find, halving the path on the way."""
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+
+    return node
+
+
+def wilson(grid: Grid, rng: rand.Random) -> None:
+    """Builds a uniform spanning tree maze with Wilson's algorithm.
+
+    Loop-erased random walks from each node not yet in the maze until they
+    hit the maze, then the walk is added. The next step of each walk is kept
+    in one array so erasing a loop is just overwriting it.
+
+    Args:
+        grid: Grid to write the maze into.
+        rng: Random number generator to use.
+    """
+    grid.state[:] = bytes(grid.size)
+    rows, cols = lattice(grid)
+    nodes = rows * cols
+
+    if not nodes:
+        return
+
+    in_maze = bytearray(nodes)
+    step = array('i', [-1]) * nodes
+    first = rng.randrange(nodes)
+    in_maze[first] = 1
+    grid.state[node_cell(grid, first, cols)] = PATH
+
+    for begin in range(nodes):
+        if in_maze[begin]:
+            continue
+
+        node = begin
+
+        while not in_maze[node]:
+            row, col = divmod(node, cols)
+
+            while True:
+                move = NODE_MOVES[rng.randrange(4)]
+                n_row = row + move[0]
+                n_col = col + move[1]
+
+                if 0 <= n_row < rows and 0 <= n_col < cols:
+                    break
+
+            step[node] = n_row * cols + n_col
+            node = step[node]
+
+        node = begin
+
+        while not in_maze[node]:
+            in_maze[node] = 1
+            open_edge(grid, node, step[node], cols)
+            node = step[node]
+
+
+def cave(grid: Grid, rng: rand.Random, fill: float = 0.45,
+         iterations: int = 5) -> None:
+    """Builds a cave with a cellular automaton.
+
+    Starts from random noise and then, iterations times, turns every cell
+    into a wall if 5 or more of the 9 cells around and including it are walls
+    and into a path otherwise. Cells past the edge count as walls. The cave is
+    not guaranteed to be connected.
+
+    Args:
+        grid: Grid to write the cave into.
+        rng: Random number generator to use.
+        fill: Chance of each cell starting as a wall.
+        iterations: Number of smoothing steps.
+    """
+    threshold = int(fill * 256)
+    noise = bytes(WALL if i < threshold else PATH for i in range(256))
+    grid.state[:] = rng.randbytes(grid.size).translate(noise)
+
+    if np is not None:
+        cave_numpy(grid, iterations)
+
+    else:
+        cave_python(grid, iterations)
+
+
+def cave_numpy(grid: Grid, iterations: int) -> None:
+    """Runs the cave automaton with NumPy, writing into grid in place."""
+    cells = np.frombuffer(grid.state, dtype=np.uint8).reshape(
+        grid.height, grid.width)
+    walls = np.ones((grid.height + 2, grid.width + 2), dtype=np.uint8)
+
+    for _ in range(iterations):
+        walls[1:-1, 1:-1] = cells == WALL
+        count = np.zeros((grid.height, grid.width), dtype=np.uint8)
+
+        for d_row in range(3):
+            for d_col in range(3):
+                count += walls[d_row:d_row + grid.height,
+                               d_col:d_col + grid.width]
+
+        cells[...] = np.where(count >= 5, WALL, PATH)
+
+
+def cave_python(grid: Grid, iterations: int) -> None:
+    """Runs the cave automaton in plain Python, writing into grid in place."""
+    width = grid.width
+    height = grid.height
+
+    for _ in range(iterations):
+        walls = bytes(1 if i == WALL else 0 for i in grid.state)
+        new = bytearray(grid.size)
+
+        for row in range(height):
+            for col in range(width):
+                count = 0
+
+                for d_row in (-1, 0, 1):
+                    n_row = row + d_row
+
+                    for d_col in (-1, 0, 1):
+                        n_col = col + d_col
+
+                        if (not (0 <= n_row < height and 0 <= n_col < width)
+                                or walls[n_row * width + n_col]):
+                            count += 1
+
+                new[row * width + col] = WALL if count >= 5 else PATH
+
+        grid.state[:] = new
+
+
+def place_endpoints(grid: Grid) -> None:
+    """Makes the first open cell the start and the last open cell the exit.
+
+    Open cells are searched in row major order, so for the lattice mazes
+    these are the top left and bottom right nodes.
+    """
+    state = grid.state
+    first = grid.find_index(PATH)
+    last = grid.find_index(PATH, reverse=True)
+
+    if first != -1:
+        state[first] = START
+
+    if last != -1 and last != first:
+        state[last] = EXIT
+
+
+def generate(name: str, width: int, height: Optional[int] = None,
+             seed: Optional[int] = None, grid: Optional[Grid] = None,
+             **options: Any) -> Grid:
+    """Generates a maze with one of the GENERATORS.
+
+    Args:
+        name: Name of the generator, a key of GENERATORS.
+        width: Number of columns. Lattice mazes use odd sizes, with an even
+            size the last column or row stays wall.
+        height: Number of rows, defaults to width.
+        seed: Seed for the random number generator.
+        grid: Optional Grid of width x height to write into instead of making
+            a new one, for example one backed by a memory mapped file.
+        **options: Extra keyword arguments for the generator, such as fill
+            and iterations for caves.
+
+    Returns:
+        The Grid with the maze written into it and its start and exit set.
+
+    Raises:
+        KeyError: name is not a key of GENERATORS.
+    """
+    generator = GENERATORS[name]
+
+    if height is None:
+        height = width
+
+    if grid is None:
+        grid = Grid(width, height)
+
+    generator(grid, rand.Random(seed), **options)
+    place_endpoints(grid)
+    grid.touch()
+
+    return grid
+
+
+GENERATORS: Dict[str, Callable[..., None]] = {
+    'recursive division': recursive_division,
+    'prim': prim,
+    'kruskal': kruskal,
+    'wilson': wilson,
+    'cave': cave,
+}
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Saving and loading mazes.
+
+Binary maze files start with a 64 byte header followed by the body:
+
+    offset  size  field
+    0       4     magic b'MAZE'
+    4       2     format version
+    6       1     cell encoding, ENCODING_BYTES or ENCODING_PACKED
+    7       1     reserved, 0
+    8       4     width
+    12      4     height
+    16      8     flat index of the start, -1 if none
+    24      8     flat index of the exit, -1 if none
+    32      32    reserved, 0
+
+All numbers are little endian. With ENCODING_BYTES the body is one byte per
+cell in the same layout as grid.Grid.state, so load() memory maps the file
+and uses the body as the grid buffer without copying or parsing it. With
+ENCODING_PACKED each byte holds 4 cells, 2 bits each with the first cell in
+the low bits, which is a quarter of the size but has to be unpacked on load.
+
+Text mazes have one line per row and one character per cell, see
+TEXT_CHARS. They are meant for small hand-edited mazes.
+
+Usage:
+    python maze_io.py IN_FILE OUT_FILE [--packed]
+converts between the formats, picked by file extension (.txt is text).
+"""
+import argparse
+import mmap
+import os
+import struct
+from typing import List, Optional, Tuple
+
+from grid import EXIT, PATH, START, WALL, Grid, PosType
+
+
+# ------------
+#  Type Alias
+# ------------
+LoadedType = Tuple[Grid, Optional[PosType], Optional[PosType]]
+
+
+# ------------
+#  Constants
+# ------------
+MAGIC = b'MAZE'
+VERSION = 1
+ENCODING_BYTES = 0
+ENCODING_PACKED = 1
+HEADER = struct.Struct('<4sHBBIIqq32x')
+TEXT_CHARS = {WALL: '#', PATH: '.', START: 'S', EXIT: 'E'}
+TEXT_STATES = {'#': WALL, '.': PATH, ' ': PATH, 'S': START, 'E': EXIT}
+# Tables for bytes.translate(), UNPACK[i] pulls cell i out of a packed byte
+# and PACK[i] moves a cell state into the bits of cell i.
+UNPACK = [bytes((byte >> (2 * i)) & 3 for byte in range(256))
+          for i in range(4)]
+PACK = [bytes(((byte & 3) << (2 * i)) for byte in range(256))
+        for i in range(4)]
+
+
+# ------------
+#  Functions
+# ------------
+def pack(state: bytes) -> bytes:
+    """Packs a byte per cell state buffer into 2 bits per cell.
+
+    Each of the 4 cells of a packed byte is shifted into place with
+    bytes.translate() and the 4 parts are combined as big integers. The bits
+    of the parts never overlap so adding them is the same as or-ing them.
+    """
+    size = len(state)
+    padded = bytes(state) + bytes(-size % 4)
+    length = len(padded) // 4
+    total = 0
+
+    for i in range(4):
+        total += int.from_bytes(padded[i::4].translate(PACK[i]), 'little')
+
+    return total.to_bytes(length, 'little')
+
+
+def unpack(data: bytes, size: int) -> bytearray:
+    """Unpacks size cells packed 2 bits per cell into a byte per cell."""
+    state = bytearray(len(data) * 4)
+
+    for i in range(4):
+        state[i::4] = data.translate(UNPACK[i])
+
+    del state[size:]
+    return state
+
+
+def index_or_none(grid: Grid, pos: Optional[PosType]) -> int:
+    """Returns the flat index of pos in grid, or -1 for None."""
+    if pos is None:
+        return -1
+
+    return grid.index(pos[0], pos[1])
+
+
+def pos_or_none(width: int, index: int) -> Optional[PosType]:
+    """Returns the (row, col) of a flat index, or None for -1."""
+    if index < 0:
+        return None
+
+    return divmod(index, width)
+
+
+def save(grid: Grid, path: str, start: Optional[PosType] = None,
+         exit_pos: Optional[PosType] = None, packed: bool = False) -> None:
+    """Saves grid to a binary maze file.
+
+    Args:
+        grid: Grid to save.
+        path: File to write.
+        start: (row, col) of the maze start, found in grid if not given.
+        exit_pos: (row, col) of the maze exit, found in grid if not given.
+        packed: True for ENCODING_PACKED, otherwise ENCODING_BYTES.
+    """
+    if start is None:
+        start = grid.find(START)
+
+    if exit_pos is None:
+        exit_pos = grid.find(EXIT)
+
+    encoding = ENCODING_PACKED if packed else ENCODING_BYTES
+    header = HEADER.pack(MAGIC, VERSION, encoding, 0, grid.width,
+                         grid.height, index_or_none(grid, start),
+                         index_or_none(grid, exit_pos))
+
+    with open(path, 'wb') as out:
+        out.write(header)
+
+        if packed:
+            out.write(pack(grid.state))
+
+        else:
+            out.write(grid.state)
+
+
+def read_header(data: bytes) -> Tuple[int, int, int, int, int]:
+    """Checks and unpacks the header of a binary maze file.
+
+    Returns:
+        Tuple of encoding, width, height, start index and exit index.
+
+    Raises:
+        ValueError: data is not a maze file or has an unknown version or
+            encoding.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError('file is too short to be a maze file')
+
+    (magic, version, encoding, _, width, height, start,
+     exit_index) = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise ValueError('not a maze file')
+
+    if version != VERSION:
+        raise ValueError('unsupported maze file version %d' % version)
+
+    if encoding not in (ENCODING_BYTES, ENCODING_PACKED):
+        raise ValueError('unknown cell encoding %d' % encoding)
+
+    return encoding, width, height, start, exit_index
+
+
+def load(path: str, mode: str = 'r') -> LoadedType:
+    """Loads a binary maze file.
+
+    ENCODING_BYTES files are memory mapped and the grid uses the mapped body
+    as its state buffer, so loading costs page faults instead of a parse.
+    ENCODING_PACKED files are read and unpacked into a bytearray.
+
+    Args:
+        path: File to load.
+        mode: How to map the file, like numpy.memmap:
+            'r' = Read only, the grid can not be edited.
+            'r+' = Edits to the grid are written to the file.
+            'c' = Copy on write, edits stay in memory.
+
+    Returns:
+        Tuple of the Grid, the (row, col) of the start and of the exit, either
+        None if the file has none.
+
+    Raises:
+        ValueError: The file is not a valid maze file or mode is unknown.
+    """
+    access = {'r': mmap.ACCESS_READ, 'r+': mmap.ACCESS_WRITE,
+              'c': mmap.ACCESS_COPY}
+
+    if mode not in access:
+        raise ValueError('mode must be one of %s' % sorted(access))
+
+    with open(path, 'r+b' if mode == 'r+' else 'rb') as maze_file:
+        encoding, width, height, start, exit_index = read_header(
+            maze_file.read(HEADER.size))
+        size = width * height
+
+        if encoding == ENCODING_PACKED:
+            data = maze_file.read()
+
+            if len(data) < (size + 3) // 4:
+                raise ValueError('maze file body is truncated')
+
+            grid = Grid(width, height, unpack(data, size))
+
+        else:
+            if os.fstat(maze_file.fileno()).st_size < HEADER.size + size:
+                raise ValueError('maze file body is truncated')
+
+            body = mmap.mmap(maze_file.fileno(), 0, access=access[mode])
+            grid = Grid(width, height,
+                        memoryview(body)[HEADER.size:HEADER.size + size])
+
+    return grid, pos_or_none(width, start), pos_or_none(width, exit_index)
+
+
+def create(path: str, width: int, height: int) -> Grid:
+    """Creates an all wall ENCODING_BYTES maze file and maps it read/write.
+
+    Useful for generating mazes straight into a file, edits to the returned
+    grid are written to the file. Start and exit in the header are left at
+    -1, save() or set_endpoints() can fill them in.
+
+    Returns:
+        The memory mapped Grid.
+    """
+    header = HEADER.pack(MAGIC, VERSION, ENCODING_BYTES, 0, width, height,
+                         -1, -1)
+
+    with open(path, 'wb') as out:
+        out.write(header)
+        out.truncate(HEADER.size + width * height)
+
+    return load(path, 'r+')[0]
+
+
+def set_endpoints(path: str, start: Optional[PosType],
+                  exit_pos: Optional[PosType]) -> None:
+    """Rewrites the start and exit in the header of a binary maze file."""
+    with open(path, 'r+b') as maze_file:
+        width = read_header(maze_file.read(HEADER.size))[1]
+        maze_file.seek(16)
+        maze_file.write(struct.pack(
+            '<qq',
+            -1 if start is None else start[0] * width + start[1],
+            -1 if exit_pos is None else exit_pos[0] * width + exit_pos[1]))
+
+
+def load_text(path: str) -> LoadedType:
+    """Loads a text maze.
+
+    Each line is a row, see TEXT_STATES for the characters. Short lines are
+    padded with walls to the length of the longest line.
+
+    Raises:
+        ValueError: The file has a character that is not in TEXT_STATES.
+    """
+    with open(path) as text:
+        lines = [line.rstrip('\r\n') for line in text]
+
+    while lines and not lines[-1]:
+        lines.pop()
+
+    width = max((len(line) for line in lines), default=0)
+    rows = []
+
+    for number, line in enumerate(lines, 1):
+        try:
+            rows.append([TEXT_STATES[char] for char in line] +
+                        [WALL] * (width - len(line)))
+
+        except KeyError as error:
+            raise ValueError('line %d: unknown maze character %s'
+                             % (number, error)) from None
+
+    grid = Grid.from_rows(rows)
+
+    return grid, grid.find(START), grid.find(EXIT)
+
+
+def save_text(grid: Grid, path: str) -> None:
+    """Saves grid as a text maze."""
+    table = bytes(ord(TEXT_CHARS.get(i, '#')) for i in range(256))
+
+    with open(path, 'w') as text:
+        for row in range(grid.height):
+            start = row * grid.width
+            text.write(bytes(grid.state[start:start + grid.width])
+                       .translate(table).decode('ascii'))
+            text.write('\n')
+
+
+def read(path: str, mode: str = 'r') -> LoadedType:
+    """Loads a text maze if path ends in .txt, otherwise a binary maze."""
+    if path.lower().endswith('.txt'):
+        return load_text(path)
+
+    return load(path, mode)
+
+
+def write(grid: Grid, path: str, packed: bool = False) -> None:
+    """Saves a text maze if path ends in .txt, otherwise a binary maze."""
+    if path.lower().endswith('.txt'):
+        save_text(grid, path)
+
+    else:
+        save(grid, path, packed=packed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Converts a maze file from the command line."""
+    parser = argparse.ArgumentParser(
+        description='Convert between text and binary maze files.')
+    parser.add_argument('source', help='maze file to read')
+    parser.add_argument('target', help='maze file to write')
+    parser.add_argument('--packed', action='store_true',
+                        help='write the binary body 2 bits per cell')
+    args = parser.parse_args(argv)
+    grid = read(args.source)[0]
+    write(grid, args.target, args.packed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""Recording and replaying of solver event traces.
+
+A TraceRecorder is passed to solver.solve() as (or from) its "on_event"
+callback and stores every event in a compact binary Trace. A TracePlayer
+replays a Trace at any speed and can seek to any step without running the
+search again.
+
+Each event is stored as a varint of (zigzag(index - last index) << 3 | kind),
+so runs of neighboring cells cost a byte or two per event. Events are grouped
+into blocks that are zlib compressed on their own. Every block starts with a
+keyframe, a zlib compressed snapshot of the marks left on the maze by all
+events before it, so seeking only replays events from the closest keyframe.
+"""
+import struct
+import zlib
+from array import array
+from typing import Any, Iterator, List, Optional, Tuple
+
+import solver
+from grid import Grid
+
+
+# ------------
+#  Type Alias
+# ------------
+EventType = Tuple[int, int]
+
+
+# ------------
+#  Constants
+# ------------
+# Marks left on a cell by the last event that changed how it looks. Mark 0
+# means no event changed the cell, otherwise the mark is the event kind + 1.
+NO_MARK = 0
+MIN_INTERVAL = 4096  # Fewest events between keyframes.
+MAGIC = b'MZTR'
+VERSION = 1
+HEADER = struct.Struct('<4sBIIIQH')  # magic, version, width, height,
+#                                      interval, events, algorithm length
+
+
+# ------------
+#   Classes
+# ------------
+class Trace(object):
+    """Compressed record of the events of one solve.
+
+    Attributes:
+        width: Width of the grid that was solved.
+        height: Height of the grid that was solved.
+        algorithm: Name of the algorithm that was run.
+        interval: Number of events per block, a keyframe starts each block.
+        events: Total number of events recorded.
+        blocks: List of zlib compressed event blocks.
+        keyframes: List of zlib compressed mark snapshots, one per block.
+    """
+
+    def __init__(self, width: int, height: int, algorithm: str,
+                 interval: int) -> None:
+        """Inits an empty Trace."""
+        self.width = width
+        self.height = height
+        self.algorithm = algorithm
+        self.interval = interval
+        self.events = 0
+        self.blocks = []
+        self.keyframes = []
+
+    def __len__(self) -> int:
+        """Number of events in the trace."""
+        return self.events
+
+    @property
+    def nbytes(self) -> int:
+        """Compressed size of the blocks and keyframes in bytes."""
+        return (sum(len(i) for i in self.blocks) +
+                sum(len(i) for i in self.keyframes))
+
+    def to_bytes(self) -> bytes:
+        """Serializes the trace into a single binary buffer."""
+        name = self.algorithm.encode('utf-8')
+        out = [HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                           self.interval, self.events, len(name)), name]
+
+        for keyframe, block in zip(self.keyframes, self.blocks):
+            out.append(struct.pack('<II', len(keyframe), len(block)))
+            out.append(keyframe)
+            out.append(block)
+
+        return b''.join(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Trace":
+        """Loads a trace serialized by to_bytes().
+
+        Raises:
+            ValueError: data is not a trace or has an unknown version.
+        """
+        (magic, version, width, height, interval, events,
+         name_len) = HEADER.unpack_from(data)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a version %d maze solver trace' % VERSION)
+
+        pos = HEADER.size
+        trace = cls(width, height, data[pos:pos + name_len].decode('utf-8'),
+                    interval)
+        trace.events = events
+        pos += name_len
+
+        while pos < len(data):
+            key_len, block_len = struct.unpack_from('<II', data, pos)
+            pos += 8
+            trace.keyframes.append(bytes(data[pos:pos + key_len]))
+            pos += key_len
+            trace.blocks.append(bytes(data[pos:pos + block_len]))
+            pos += block_len
+
+        return trace
+
+
+class TraceRecorder(object):
+    """Records solver events into a Trace.
+
+    Call it like an "on_event" callback, it never cancels the solve.
+
+    Attributes:
+        trace: Trace being recorded.
+        marks: bytearray of the current mark of each cell.
+    """
+
+    def __init__(self, grid: Grid, algorithm: str,
+                 interval: Optional[int] = None) -> None:
+        """Inits TraceRecorder for a solve of grid.
+
+        Args:
+            grid: Grid that will be solved.
+            algorithm: Name of the algorithm that will be run.
+            interval: Events between keyframes. Defaults to a quarter of the
+                grid size so keyframes cost at most a few bytes per event,
+                but never less than MIN_INTERVAL.
+        """
+        if interval is None:
+            interval = max(MIN_INTERVAL, grid.size // 4)
+
+        self.trace = Trace(grid.width, grid.height, algorithm, interval)
+        self.marks = bytearray(grid.size)
+        self._block = bytearray()
+        self._count = 0
+        self._last = 0
+
+    def __call__(self, kind: int, index: int) -> bool:
+        """Records an event, same arguments as an "on_event" callback."""
+        self.record(kind, index)
+        return False
+
+    def record(self, kind: int, index: int) -> None:
+        """Records one event of kind about the cell at index."""
+        if self._count == 0:
+            self.trace.keyframes.append(zlib.compress(bytes(self.marks)))
+            self._last = 0
+
+        delta = index - self._last
+        value = (((delta << 1) ^ (delta >> 63)) << 3) | kind
+        block = self._block
+
+        while value > 0x7f:
+            block.append((value & 0x7f) | 0x80)
+            value >>= 7
+
+        block.append(value)
+        self._last = index
+        apply_event(self.marks, kind, index)
+        self._count += 1
+        self.trace.events += 1
+
+        if self._count == self.trace.interval:
+            self._flush()
+
+    def finish(self, path: List[Tuple[int, int]]) -> Trace:
+        """Records the final path as FOUND events and returns the Trace.
+
+        Args:
+            path: List of (row, col) positions of the path found, empty if
+                none was found.
+        """
+        for row, col in path:
+            self.record(solver.FOUND, row * self.trace.width + col)
+
+        if self._count:
+            self._flush()
+
+        return self.trace
+
+    def _flush(self) -> None:
+        """Compresses the current block into the trace."""
+        self.trace.blocks.append(zlib.compress(bytes(self._block)))
+        self._block = bytearray()
+        self._count = 0
+
+
+class TracePlayer(object):
+    """Replays a Trace, tracking the marks its events leave on each cell.
+
+    Attributes:
+        trace: Trace being replayed.
+        marks: bytearray of the mark of each cell at the current position.
+        position: Number of events replayed so far.
+    """
+
+    def __init__(self, trace: Trace) -> None:
+        """Inits TracePlayer at the start of trace."""
+        self.trace = trace
+        self.marks = bytearray(trace.width * trace.height)
+        self.position = 0
+        self._block = -1
+        self._events = None
+
+    def __iter__(self) -> Iterator[EventType]:
+        """Yields the remaining events, applying each before it is yielded."""
+        while self.position < self.trace.events:
+            yield self.next()
+
+    def next(self) -> EventType:
+        """Applies and returns the event at the current position.
+
+        Raises:
+            IndexError: All events have been replayed.
+        """
+        if self.position >= self.trace.events:
+            raise IndexError('end of trace')
+
+        block, offset = divmod(self.position, self.trace.interval)
+        self._load(block)
+        kind = self._events[2 * offset]
+        index = self._events[2 * offset + 1]
+        apply_event(self.marks, kind, index)
+        self.position += 1
+
+        return kind, index
+
+    def seek(self, step: int) -> None:
+        """Moves to step, as if the first step events had been replayed.
+
+        Marks are restored from the closest keyframe before step and only the
+        events between the keyframe and step are replayed.
+        """
+        step = max(0, min(step, self.trace.events))
+
+        if step == self.trace.events and step % self.trace.interval == 0:
+            block = step // self.trace.interval - 1
+
+        else:
+            block = step // self.trace.interval
+
+        if block < 0:
+            self.marks[:] = bytes(len(self.marks))
+            self.position = 0
+            return
+
+        self.marks[:] = zlib.decompress(self.trace.keyframes[block])
+        self.position = block * self.trace.interval
+
+        while self.position < step:
+            self.next()
+
+    def _load(self, block: int) -> None:
+        """Decodes block into self._events if it is not already loaded."""
+        if block != self._block:
+            self._events = decode_block(self.trace.blocks[block])
+            self._block = block
+
+
+# ------------
+#  Functions
+# ------------
+def apply_event(marks: bytearray, kind: int, index: int) -> None:
+    """Updates marks with the mark an event of kind leaves on index.
+
+    EXPAND events do not change how a cell looks so they leave no mark.
+    """
+    if kind != solver.EXPAND:
+        marks[index] = kind + 1
+
+
+def decode_block(block: bytes) -> array:
+    """Decodes a compressed event block.
+
+    Returns:
+        array of the events in the block flattened to kind, index pairs.
+    """
+    data = zlib.decompress(block)
+    events = array('q')
+    last = 0
+    value = 0
+    shift = 0
+
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+
+        if byte & 0x80:
+            shift += 7
+            continue
+
+        zigzag = value >> 3
+        last += (zigzag >> 1) ^ -(zigzag & 1)
+        events.append(value & 7)
+        events.append(last)
+        value = 0
+        shift = 0
+
+    return events
+
+
+def record(grid: Grid, start: Tuple[int, int], exit_pos: Tuple[int, int],
+           algorithm: str = 'A*',
+           **options: Any) -> Tuple[solver.SolveResult, Trace]:
+    """Solves grid headlessly and records the trace of the solve.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        algorithm: Name of the algorithm to run, a key of solver.ALGORITHMS.
+        **options: Extra keyword arguments for the algorithm.
+
+    Returns:
+        Tuple of the SolveResult and the recorded Trace.
+    """
+    recorder = TraceRecorder(grid, algorithm)
+    result = solver.solve(grid, start, exit_pos, algorithm, recorder,
+                          **options)
+
+    return result, recorder.finish(result.path)
@@ -0,0 +1,3134 @@
+#!/usr/bin/env python3
+"""Headless pathfinding engine for the maze solver.
+
+Nothing in this module touches pygame, so mazes can be solved in batch jobs
+without opening a window or waiting on frame pacing. The GUI in Main.py
+consumes the same solvers by passing an "on_event" callback that colors the
+maze as the search progresses. Mazes are grid.Grid objects, see grid.py for
+the cell states.
+"""
+import functools
+import heapq
+import itertools
+import random as rand
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict, deque
+from typing import (Any, Callable, Dict, Generator, Iterator, List, Optional,
+                    Tuple)
+
+from grid import WALL, Grid, MappedScratch, Scratch
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, only used by the wavefront.
+    np = None
+
+
+# ------------
+#  Type Alias
+# ------------
+PosType = Tuple[int, int]
+PathType = List[PosType]
+EventHandler = Callable[[int, int], Optional[bool]]
+EventType = Tuple[int, int]
+StepsType = Generator[EventType, None, Optional[PathType]]
+
+
+# ------------
+#  Constants
+# ------------
+# Solver event kinds passed to "on_event" callbacks.
+VISIT = 0  # Cell was entered. (Random Backtracking)
+ENQUEUE = 1  # Cell was added to the frontier.
+EXPAND = 2  # Cell was taken off the frontier.
+BACKTRACK = 3  # Cell was a deadend and left again.
+FOUND = 4  # Cell is part of the final path.
+JUMP = 5  # Jump point was taken off the frontier. (Jump Point Search)
+
+# Breadth First checks diagonals first: UL, UR, DL, DR, R, L, U, D.
+BFS_MOVES = [(-1, -1), (-1, 1), (1, -1), (1, 1), (0, 1), (0, -1), (-1, 0),
+             (1, 0)]
+ADJACENT = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1),
+            (-1, -1)]
+# Diagonal moves may cut corners, a diagonal move is allowed even when one or
+# both of the cells beside it are walls. The forced neighbor rules of Jump
+# Point Search in jump() and jump_directions() are the ones for this rule.
+# The 8 cells around a cell in clockwise order, bit i of a ring mask is set
+# if RING[i] is open. See RING_CONNECTED at the end of the module.
+RING = [(-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1)]
+# Every ordering of ADJACENT, Random Backtracking picks one per cell instead
+# of shuffling a fresh list.
+ADJACENT_ORDERS = [tuple(ADJACENT[i] for i in order)
+                   for order in itertools.permutations(range(8))]
+# Rows and columns of cells per HPA* cluster, the most rows and columns of
+# clusters searched at once when refining an abstract path, and the number of
+# crossing pairs from which a group gets a crossing at each end instead of
+# one.
+CLUSTER_SIZE = 32
+REFINE_SPAN = 3
+LONG_CROSSING = 6
+# Table for bytes.translate(), 1 for open cell states and 0 for walls.
+OPEN_CELLS = bytes(int(value != WALL) for value in range(256))
+
+
+# ------------
+#   Classes
+# ------------
+class SolveStats(object):
+    """Counters collected while a solver runs.
+
+    Attributes:
+        expanded: Number of cells taken off the frontier (or entered by
+            Random Backtracking).
+        enqueued: Number of cells added to the frontier.
+        elapsed: Wall time of the solve in seconds.
+        cancelled: True if the "on_event" callback stopped the solver.
+        cached: True if the path came from a ResultCache without solving.
+        frontier: Number of entries on the frontier at the last expansion,
+            stale heap entries included. The stack depth for Random
+            Backtracking.
+        peak_frontier: Largest frontier seen.
+        heap_ops: Number of pushes and pops on the solver's heaps, 0 for
+            solvers without one.
+    """
+
+    def __init__(self) -> None:
+        """Inits SolveStats with all counters at zero."""
+        self.expanded = 0
+        self.enqueued = 0
+        self.elapsed = 0.0
+        self.cancelled = False
+        self.cached = False
+        self.frontier = 0
+        self.peak_frontier = 0
+        self.heap_ops = 0
+
+    def track(self, frontier: int, heap_ops: int = 0) -> None:
+        """Records the frontier size and the heap operations done so far."""
+        self.frontier = frontier
+        self.heap_ops = heap_ops
+
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+
+
+class SolveResult(object):
+    """Outcome of a single solve.
+
+    Attributes:
+        algorithm: Name of the algorithm that was run.
+        path: List of (row, col) positions from start to exit inclusive. Empty
+            if no exit was found.
+        stats: SolveStats collected during the solve.
+    """
+
+    def __init__(self, algorithm: str, path: Optional[PathType],
+                 stats: SolveStats) -> None:
+        """Inits SolveResult from a solver's return value."""
+        self.algorithm = algorithm
+        self.path = path or []
+        self.stats = stats
+
+    @property
+    def found(self) -> bool:
+        """True if a path from start to exit was found."""
+        return bool(self.path)
+
+
+class OpenList(object):
+    """Binary heap open list for A* style searches.
+
+    Entries are ordered by f, ties prefer the higher g (the cell closer to
+    the exit), then the lower tie-breaker given to push() and then the
+    earlier push so results are deterministic. Cells
+    are never removed or updated in place, a better g is pushed as a new
+    entry and entries whose g no longer matches are skipped by pop().
+
+    Attributes:
+        heap: heapq list of (f, -g, tie-breaker, push count, index) tuples.
+        g: Array of the current best g of each cell, shared with the search.
+        pushes: Number of entries pushed so far.
+        pops: Number of entries popped so far, stale ones included.
+    """
+
+    def __init__(self, g: Any) -> None:
+        """Inits an empty OpenList reading current g values from g."""
+        self.heap = []
+        self.g = g
+        self.pushes = 0
+        self.pops = 0
+
+    def __len__(self) -> int:
+        """Number of entries on the heap, stale ones included."""
+        return len(self.heap)
+
+    def top(self) -> int:
+        """Returns the lowest f on the heap, stale entries included."""
+        return self.heap[0][0]
+
+    def push(self, index: int, g: int, f: int, tie: int = 0) -> None:
+        """Adds the cell at index with cost g and total cost f."""
+        heapq.heappush(self.heap, (f, -g, tie, self.pushes, index))
+        self.pushes += 1
+
+    def pop(self) -> int:
+        """Removes and returns the index of the best cell.
+
+        Returns:
+            Index of the cell with the lowest f, or -1 if only stale entries
+            were left.
+        """
+        heap = self.heap
+        g = self.g
+
+        while heap:
+            entry = heapq.heappop(heap)
+            self.pops += 1
+
+            if -entry[1] == g[entry[4]]:
+                return entry[4]
+
+        return -1
+
+
+class BucketOpenList(object):
+    """Open list for A* on mazes too big for memory.
+
+    Entries are kept in one FIFO queue per f value, made by a Scratch so a
+    MappedScratch spills them to disk a block at a time. With a consistent
+    heuristic a child's f is at most 2 more than its parent's, so only a few
+    buckets are ever alive. Ties on f are broken first in first out instead
+    of by g, which may expand more cells than OpenList but finds paths of
+    the same length. Stale entries are skipped by pop() like in OpenList.
+
+    Attributes:
+        buckets: Dict of f to a queue of index, g pairs.
+        g: Array of the current best g of each cell, shared with the search.
+        lowest: Lowest f that may have entries.
+        pushes: Number of entries pushed so far.
+        pops: Number of entries popped so far, stale ones included.
+    """
+
+    def __init__(self, g: Any, scratch: Scratch) -> None:
+        """Inits an empty BucketOpenList with queues made by scratch."""
+        self.buckets = {}
+        self.g = g
+        self.lowest = 0
+        self.pushes = 0
+        self.pops = 0
+        self._scratch = scratch
+        self._len = 0
+
+    def __len__(self) -> int:
+        """Number of entries in the buckets, stale ones included."""
+        return self._len
+
+    def push(self, index: int, g: int, f: int, tie: int = 0) -> None:
+        """Adds the cell at index with cost g and total cost f."""
+        bucket = self.buckets.get(f)
+
+        if bucket is None:
+            bucket = self.buckets[f] = self._scratch.queue()
+
+        bucket.append(index)
+        bucket.append(g)
+        self.lowest = min(self.lowest, f) if self._len else f
+        self._len += 1
+        self.pushes += 1
+
+    def pop(self) -> int:
+        """Removes and returns the index of the oldest cell with the lowest f.
+
+        Returns:
+            Index of the cell, or -1 if only stale entries were left.
+        """
+        buckets = self.buckets
+        g = self.g
+
+        while self._len:
+            bucket = buckets.get(self.lowest)
+
+            if bucket is None:
+                self.lowest = min(buckets)
+                continue
+
+            index = bucket.popleft()
+            entry_g = bucket.popleft()
+            self.pops += 1
+            self._len -= 1
+
+            if not bucket:
+                del buckets[self.lowest]
+
+            if entry_g == g[index]:
+                return index
+
+        return -1
+
+
+class DistanceField(object):
+    """Number of moves from every cell of a grid to one exit.
+
+    Built by a single Breadth First Search outward from the exit, the
+    vectorized wavefront_field() when NumPy is installed and no "on_event"
+    callback is given. Moves are the same in both directions, so the path
+    from any start is read out by stepping to a neighbor one move closer
+    until the exit is reached, in time proportional to the length of the
+    path.
+
+    The field only holds a weak reference to its grid, so a FieldCache does
+    not keep grids alive.
+
+    Attributes:
+        grid: Grid the field was built for, None once the grid is freed.
+        exit_index: Flat index of the exit.
+        version: grid.version when the field was built.
+        dist: array of signed ints, moves from each cell to the exit, -1 for
+            walls and cells that can not reach it.
+    """
+
+    def __init__(self, grid: Grid, exit_pos: PosType,
+                 stats: Optional[SolveStats] = None,
+                 on_event: Optional[EventHandler] = None) -> None:
+        """Inits DistanceField by searching grid outward from exit_pos.
+
+        Args:
+            grid: Grid to build the field for.
+            exit_pos: (row, col) of the maze exit.
+            stats: Optional SolveStats to count the search in.
+            on_event: Optional callback for EXPAND and ENQUEUE events.
+
+        Raises:
+            Cancelled: on_event asked to stop, the field is not usable.
+        """
+        self._grid = weakref.ref(grid)
+        self.exit_index = grid.index(exit_pos[0], exit_pos[1])
+        self.version = grid.version
+        self.dist = array('i', [-1]) * grid.size
+        state = grid.state
+        width = grid.width
+        height = grid.height
+        dist = self.dist
+
+        if state[self.exit_index] == WALL:
+            return
+
+        if np is not None and on_event is None:
+            dist[:] = array('i', wavefront_field(grid, exit_pos,
+                                                 stats=stats).tobytes())
+            return
+
+        dist[self.exit_index] = 0
+        queue = deque([self.exit_index])
+
+        while queue:
+            current = queue.popleft()
+            emit(on_event, EXPAND, current)
+            row, col = divmod(current, width)
+            child_dist = dist[current] + 1
+
+            if stats is not None:
+                stats.expanded += 1
+                stats.track(len(queue))
+
+            for move in BFS_MOVES:
+                n_row = row + move[0]
+                n_col = col + move[1]
+
+                if not (0 <= n_row < height and 0 <= n_col < width):
+                    continue
+
+                cell = n_row * width + n_col
+
+                if dist[cell] != -1 or state[cell] == WALL:
+                    continue
+
+                dist[cell] = child_dist
+                queue.append(cell)
+                emit(on_event, ENQUEUE, cell)
+
+                if stats is not None:
+                    stats.enqueued += 1
+
+    @property
+    def grid(self) -> Optional[Grid]:
+        """Grid the field was built for, None once the grid is freed."""
+        return self._grid()
+
+    def path_from(self, start: PosType) -> Optional[PathType]:
+        """Returns the shortest path from start to the exit.
+
+        Returns:
+            List of (row, col) positions from start to the exit inclusive, or
+            None if start can not reach the exit.
+        """
+        return descend(self.grid, self.dist, start)
+
+
+class FieldCache(object):
+    """Least recently used cache of DistanceFields.
+
+    Fields are keyed by grid, grid.version and exit. A field whose grid has
+    been edited since it was built is dropped the next time it is looked up,
+    the fields of a grid are dropped as soon as the grid is freed.
+
+    Attributes:
+        max_fields: Most fields kept before the least recently used is
+            dropped, each costs 4 bytes per cell.
+        fields: OrderedDict of (id(grid), exit index) to DistanceField, least
+            recently used first.
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups that had to build a field.
+        watched: Set of id(grid) of the grids with a finalizer calling
+            forget().
+    """
+
+    def __init__(self, max_fields: int = 8) -> None:
+        """Inits an empty FieldCache."""
+        self.max_fields = max_fields
+        self.fields = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.watched = set()
+
+    def get(self, grid: Grid, exit_pos: PosType,
+            stats: Optional[SolveStats] = None,
+            on_event: Optional[EventHandler] = None) -> DistanceField:
+        """Returns the field of exit_pos in grid, building it if needed.
+
+        Args:
+            grid: Grid the field is for.
+            exit_pos: (row, col) of the maze exit.
+            stats: Optional SolveStats to count a new field's search in.
+            on_event: Optional callback for the search events of a new field.
+        """
+        key = (id(grid), grid.index(exit_pos[0], exit_pos[1]))
+        field = self.fields.get(key)
+
+        if (field is not None and field.grid is grid and
+                field.version == grid.version):
+            self.fields.move_to_end(key)
+            self.hits += 1
+            return field
+
+        self.misses += 1
+        self.fields.pop(key, None)
+        field = DistanceField(grid, exit_pos, stats, on_event)
+        self.fields[key] = field
+
+        if id(grid) not in self.watched:
+            self.watched.add(id(grid))
+            weakref.finalize(grid, self.forget, id(grid))
+
+        while len(self.fields) > self.max_fields:
+            self.fields.popitem(last=False)
+
+        return field
+
+    def forget(self, grid_id: int) -> None:
+        """Drops the fields of the grid with id grid_id, once it is freed."""
+        self.watched.discard(grid_id)
+
+        for key in [key for key in self.fields if key[0] == grid_id]:
+            del self.fields[key]
+
+    def clear(self) -> None:
+        """Drops every field."""
+        self.fields.clear()
+
+
+class DStarLite(object):
+    """D* Lite planner that keeps its search between solves of one grid.
+
+    Searches backwards from the exit, keeping for every cell g, its settled
+    number of moves to the exit, and rhs, the best number of moves through
+    its neighbors. A cell whose g and rhs differ is queued. When cells turn
+    into walls or paths only they and their neighbors get new rhs values,
+    and plan() settles the inconsistent cells near the change instead of
+    searching the whole maze again. The start may move between solves, km
+    grows by how far it moved so old queue keys stay valid lower bounds.
+
+    The planner watches grid for edits. Edits after grid.touch() could be
+    anywhere, so the next plan() starts over.
+
+    Attributes:
+        grid: Grid being solved.
+        exit_index: Flat index of the exit, the planner is only good for one
+            exit.
+        g: array of signed ints, settled moves from each cell to the exit.
+        rhs: array of signed ints, one step lookahead moves to the exit.
+        km: Sum of the heuristic distances the start has moved.
+        heap: heapq list of (key, index) entries, stale ones are skipped.
+        changed: Set of flat indices of cells that flipped since the last
+            plan(), None if the whole grid has to be searched again.
+        infinity: g and rhs of cells that can not reach the exit.
+    """
+
+    def __init__(self, grid: Grid, exit_pos: PosType) -> None:
+        """Inits DStarLite for exit_pos and starts watching grid for edits."""
+        self.grid = grid
+        self.exit_index = grid.index(exit_pos[0], exit_pos[1])
+        self.infinity = grid.size + 1
+        self.g = array('i', [self.infinity]) * grid.size
+        self.rhs = array('i', [self.infinity]) * grid.size
+        self.km = 0
+        self.heap = []
+        self.changed = None
+        self._start = -1
+        grid.watchers.append(self.cell_changed)
+
+    def close(self) -> None:
+        """Stops watching the grid for edits."""
+        if self.cell_changed in self.grid.watchers:
+            self.grid.watchers.remove(self.cell_changed)
+
+    def cell_changed(self, index: int) -> None:
+        """Grid watcher, notes that the cell at index flipped."""
+        if index == -1:
+            self.changed = None
+
+        elif self.changed is not None:
+            self.changed.add(index)
+
+    def plan(self, start: PosType, stats: Optional[SolveStats] = None,
+             on_event: Optional[EventHandler] = None) -> Optional[PathType]:
+        """Repairs the search for the edits since the last plan and start.
+
+        Args:
+            start: (row, col) of the maze start.
+            stats: Optional SolveStats to count the repair in.
+            on_event: Optional callback for EXPAND and ENQUEUE events of the
+                cells repaired.
+
+        Returns:
+            The path from start to exit, or None if start can not reach the
+            exit.
+        """
+        if stats is None:
+            stats = SolveStats()
+
+        start_index = self.grid.index(start[0], start[1])
+
+        try:
+            if self.changed is None or self._start == -1:
+                self._start = start_index
+                self._restart(stats, on_event)
+
+            else:
+                self.km += self._distance(self._start, start_index)
+                self._start = start_index
+
+                for index in self.changed:
+                    self._update(index, stats, on_event)
+
+                    for cell in neighbors(self.grid, index):
+                        self._update(cell, stats, on_event)
+
+            self.changed = set()
+            self._settle(stats, on_event)
+
+        except Cancelled:
+            self.changed = None  # Half repaired, start over next time.
+            raise
+
+        if self.rhs[start_index] >= self.infinity:
+            return None
+
+        return [self.grid.pos(i) for i in self._walk()]
+
+    def _restart(self, stats: SolveStats,
+                 on_event: Optional[EventHandler]) -> None:
+        """Throws away the search and queues just the exit again."""
+        self.g[:] = array('i', [self.infinity]) * self.grid.size
+        self.rhs[:] = self.g
+        self.km = 0
+        self.heap = []
+
+        if self.grid.state[self.exit_index] != WALL:
+            self.rhs[self.exit_index] = 0
+            self._push(self.exit_index, stats, on_event)
+
+    def _distance(self, index: int, other: int) -> int:
+        """Returns the heuristic number of moves between two cells."""
+        row, col = divmod(index, self.grid.width)
+        return heuristic(other, row, col, self.grid.width)[0]
+
+    def _key(self, index: int) -> Tuple[int, int]:
+        """Returns the queue key of the cell at index."""
+        best = min(self.g[index], self.rhs[index])
+        return best + self._distance(index, self._start) + self.km, best
+
+    def _push(self, index: int, stats: SolveStats,
+              on_event: Optional[EventHandler]) -> None:
+        """Queues the cell at index with its current key."""
+        heapq.heappush(self.heap, (self._key(index), index))
+        stats.enqueued += 1
+        stats.heap_ops += 1
+        emit(on_event, ENQUEUE, index)
+
+    def _lookahead(self, index: int) -> int:
+        """Returns the best moves to the exit through a neighbor of index."""
+        if self.grid.state[index] == WALL:
+            return self.infinity
+
+        if index == self.exit_index:
+            return 0
+
+        g = self.g
+        state = self.grid.state
+        best = self.infinity
+
+        for cell in neighbors(self.grid, index):
+            if state[cell] != WALL and g[cell] + 1 < best:
+                best = g[cell] + 1
+
+        return best
+
+    def _update(self, index: int, stats: SolveStats,
+                on_event: Optional[EventHandler]) -> None:
+        """Recomputes rhs of the cell at index and queues it if needed."""
+        self.rhs[index] = self._lookahead(index)
+
+        if self.g[index] != self.rhs[index]:
+            self._push(index, stats, on_event)
+
+    def _settle(self, stats: SolveStats,
+                on_event: Optional[EventHandler]) -> None:
+        """Settles queued cells until the start's g is known to be right."""
+        start_index = self._start
+        heap = self.heap
+        g = self.g
+        rhs = self.rhs
+        state = self.grid.state
+        infinity = self.infinity
+
+        while heap:
+            key, index = heap[0]
+
+            if (key >= self._key(start_index) and
+                    rhs[start_index] <= g[start_index]):
+                break
+
+            heapq.heappop(heap)
+            stats.heap_ops += 1
+
+            if g[index] == rhs[index]:
+                continue  # Stale entry of a cell already settled.
+
+            new_key = self._key(index)
+
+            if key < new_key:
+                heapq.heappush(heap, (new_key, index))
+                stats.heap_ops += 1
+                continue
+
+            stats.expanded += 1
+            stats.track(len(heap), stats.heap_ops)
+            emit(on_event, EXPAND, index)
+
+            if g[index] > rhs[index]:
+                g[index] = rhs[index]
+                child_rhs = g[index] + 1
+
+                for cell in neighbors(self.grid, index):
+                    if (state[cell] != WALL and cell != self.exit_index and
+                            child_rhs < rhs[cell]):
+                        rhs[cell] = child_rhs
+                        self._push(cell, stats, on_event)
+
+            else:
+                old_g = g[index]
+                g[index] = infinity
+                self._update(index, stats, on_event)
+
+                for cell in neighbors(self.grid, index):
+                    if rhs[cell] == old_g + 1 and cell != self.exit_index:
+                        self._update(cell, stats, on_event)
+
+    def _walk(self) -> List[int]:
+        """Follows the lowest g from the start to the exit."""
+        g = self.g
+        state = self.grid.state
+        path = [self._start]
+        current = self._start
+
+        while current != self.exit_index and len(path) <= self.grid.size:
+            best = self.infinity
+            step = -1
+
+            for cell in neighbors(self.grid, current):
+                if state[cell] != WALL and g[cell] < best:
+                    best = g[cell]
+                    step = cell
+
+            if step == -1:
+                break
+
+            current = step
+            path.append(current)
+
+        return path
+
+
+class ConnectivityIndex(object):
+    """Connected components of the open cells of a grid.
+
+    Every open cell has a label, and labels that turned out to be the same
+    component are merged in a union-find over labels. The index watches the
+    grid for edits. A cell that opens gets a new label merged with its open
+    neighbors' in near constant time. A cell that closes can only split its
+    component if its open neighbors are not connected around it (see
+    RING_CONNECTED). In that case the parts it may have cut off are searched
+    for at once, see _split(), which only walks the smaller parts in full.
+
+    Attributes:
+        grid: Grid being indexed.
+        labels: array of signed ints, label of each open cell, -1 for walls.
+            None until the index is first used or after grid.touch().
+        roots: List of the union-find parent of each label. Compacted to one
+            label per component once it has grown by a quarter of the grid.
+        limit: Length of roots at which it is next compacted.
+    """
+
+    def __init__(self, grid: Grid) -> None:
+        """Inits ConnectivityIndex and starts watching grid for edits."""
+        self.grid = grid
+        self.labels = None
+        self.roots = []
+        self.limit = 0
+        grid.watchers.append(self.cell_changed)
+
+    def close(self) -> None:
+        """Stops watching the grid for edits."""
+        if self.cell_changed in self.grid.watchers:
+            self.grid.watchers.remove(self.cell_changed)
+
+    def cell_changed(self, index: int) -> None:
+        """Grid watcher, updates the index for the cell at index."""
+        if index == -1 or self.labels is None:
+            self.labels = None
+            return
+
+        grid = self.grid
+        labels = self.labels
+
+        if grid.state[index] == WALL:
+            labels[index] = -1
+
+            if not RING_CONNECTED[self._ring_mask(index)]:
+                self._split(index)
+
+        else:
+            label = len(self.roots)
+            self.roots.append(label)
+            labels[index] = label
+
+            for cell in neighbors(grid, index):
+                if labels[cell] != -1:
+                    self.roots[self._find(labels[cell])] = label
+
+        if len(self.roots) >= self.limit:
+            self._compact()
+
+    def connected(self, start: PosType, exit_pos: PosType) -> bool:
+        """Returns True if an open path joins start and exit_pos."""
+        start_label = self.component(start)
+        exit_label = self.component(exit_pos)
+
+        return start_label != -1 and start_label == exit_label
+
+    def component(self, pos: PosType) -> int:
+        """Returns the component id of the cell at pos, -1 for walls.
+
+        Ids are only comparable until the grid is next edited.
+        """
+        if self.labels is None:
+            self._build()
+
+        label = self.labels[self.grid.index(pos[0], pos[1])]
+
+        if label == -1:
+            return -1
+
+        return self._find(label)
+
+    def _find(self, label: int) -> int:
+        """Returns the root label of label, halving the path on the way."""
+        roots = self.roots
+
+        while roots[label] != label:
+            roots[label] = roots[roots[label]]
+            label = roots[label]
+
+        return label
+
+    def _ring_mask(self, index: int) -> int:
+        """Returns the ring mask of the open cells around index."""
+        grid = self.grid
+        row, col = divmod(index, grid.width)
+        mask = 0
+
+        for bit, move in enumerate(RING):
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if (0 <= n_row < grid.height and 0 <= n_col < grid.width and
+                    grid.state[n_row * grid.width + n_col] != WALL):
+                mask |= 1 << bit
+
+        return mask
+
+    def _flood(self, index: int, seen: bytearray) -> None:
+        """Gives every open cell connected to index one fresh label."""
+        label = len(self.roots)
+        self.roots.append(label)
+        labels = self.labels
+        state = self.grid.state
+        seen[index] = 1
+        labels[index] = label
+        queue = deque([index])
+
+        while queue:
+            for cell in neighbors(self.grid, queue.popleft()):
+                if not seen[cell] and state[cell] != WALL:
+                    seen[cell] = 1
+                    labels[cell] = label
+                    queue.append(cell)
+
+    def _build(self) -> None:
+        """Labels every component of the grid from scratch."""
+        grid = self.grid
+        self.labels = array('i', [-1]) * grid.size
+        self.roots = []
+        seen = bytearray(grid.size)
+
+        for index in range(grid.size):
+            if not seen[index] and grid.state[index] != WALL:
+                self._flood(index, seen)
+
+        self.limit = len(self.roots) + grid.size // 4 + 1
+
+    def _compact(self) -> None:
+        """Renumbers the labels to one per component, dropping the rest."""
+        labels = self.labels
+        renumber = {}
+
+        for index, label in enumerate(labels):
+            if label != -1:
+                root = self._find(label)
+                new = renumber.get(root)
+
+                if new is None:
+                    new = renumber[root] = len(renumber)
+
+                labels[index] = new
+
+        self.roots = list(range(len(renumber)))
+        self.limit = len(self.roots) + self.grid.size // 4 + 1
+
+    def _split(self, index: int) -> None:
+        """Gives fresh labels to the parts cut off by the wall at index.
+
+        Searches breadth first from each open neighbor of index, taking one
+        cell from each search in turn. Searches that reach each other's
+        cells are grouped, they are in the same part. A group whose
+        searches all run out of cells has walked its whole part and gives
+        it a fresh label. Once a single group is left searching, its part
+        keeps the old label, so a wall that did not cut anything off stops
+        as soon as the searches meet and otherwise only the smaller parts
+        are walked in full.
+        """
+        grid = self.grid
+        state = grid.state
+        labels = self.labels
+        owner = {}
+        queues = []
+
+        for cell in neighbors(grid, index):
+            if state[cell] != WALL:
+                owner[cell] = len(queues)
+                queues.append(deque([cell]))
+
+        group = list(range(len(queues)))
+        searching = set(group)
+
+        def find(search: int) -> int:
+            while group[search] != search:
+                search = group[search]
+
+            return search
+
+        while len(searching) > 1:
+            for search, queue in enumerate(queues):
+                if not queue:
+                    continue
+
+                for cell in neighbors(grid, queue.popleft()):
+                    if state[cell] == WALL:
+                        continue
+
+                    other = owner.get(cell)
+
+                    if other is None:
+                        owner[cell] = search
+                        queue.append(cell)
+
+                    elif find(other) != find(search):
+                        searching.discard(find(other))
+                        group[find(other)] = find(search)
+
+            for root in list(searching):
+                if any(queues[search] for search in range(len(queues))
+                       if find(search) == root):
+                    continue
+
+                searching.discard(root)
+                label = len(self.roots)
+                self.roots.append(label)
+
+                for cell, search in owner.items():
+                    if find(search) == root:
+                        labels[cell] = label
+
+
+class ClusterGraph(object):
+    """Abstract graph of a grid cut into square clusters, for HPA*.
+
+    Open cells of each cluster are labeled by their connected component
+    inside the cluster. Where two neighboring clusters touch (diagonal
+    neighbors too), the pairs of open cells crossing between them are
+    grouped by the components on either side and each group gets one
+    crossing, or one at each end if it has LONG_CROSSING pairs or more. The
+    cells of the crossings are the nodes of the graph. Nodes of a cluster
+    are linked by the number of moves between them inside the cluster, the
+    two cells of a crossing by one move.
+
+    Clusters are labeled and linked lazily, the first time a search reaches
+    them. The graph watches the grid for edits. An edited cluster is
+    relabeled before the next search, and a neighbor is only relinked if the
+    crossings it shares with the edited cluster changed.
+
+    Attributes:
+        grid: Grid being abstracted.
+        size: Number of rows and columns of cells per cluster.
+        columns: Number of clusters per row of clusters.
+        labels: array of signed ints, component label of each open cell of a
+            labeled cluster, -1 otherwise. Labels are unique across clusters.
+        labeled: bytearray, 1 for each cluster whose cells are labeled.
+        crossings: Dict of (cluster, higher neighbor cluster) to the list of
+            (cell, neighbor cell) flat index pairs of their crossings.
+        links: Dict of cluster to a dict of each of its nodes to a list of
+            (node, moves) edges, for the clusters linked so far.
+        dirty: Set of labeled clusters edited since the last search.
+    """
+
+    def __init__(self, grid: Grid, size: int = CLUSTER_SIZE) -> None:
+        """Inits an empty ClusterGraph and starts watching grid for edits."""
+        self.grid = grid
+        self.size = size
+        self.columns = -(-grid.width // size)
+        self.labels = array('i', [-1]) * grid.size
+        self.labeled = bytearray(self.columns * -(-grid.height // size))
+        self.crossings = {}
+        self.links = {}
+        self.dirty = set()
+        self._next_label = 0
+        grid.watchers.append(self.cell_changed)
+
+    def close(self) -> None:
+        """Stops watching the grid for edits."""
+        if self.cell_changed in self.grid.watchers:
+            self.grid.watchers.remove(self.cell_changed)
+
+    def cell_changed(self, index: int) -> None:
+        """Grid watcher, notes the cluster of the cell at index as edited."""
+        if index == -1:
+            self.labeled = bytearray(len(self.labeled))
+            self.crossings = {}
+            self.links = {}
+            self.dirty = set()
+            return
+
+        cluster = self._cluster(index)
+
+        if self.labeled[cluster]:
+            self.dirty.add(cluster)
+            self.links.pop(cluster, None)
+
+    def plan(self, start: PosType, exit_pos: PosType,
+             stats: Optional[SolveStats] = None,
+             on_event: Optional[EventHandler] = None) -> Optional[PathType]:
+        """Searches the abstract graph, then refines the path it found.
+
+        Start and exit are joined to the nodes of their clusters for this
+        search only. The abstract path is then searched for a few clusters
+        at a time, see _refine(), so only the clusters on and around it are
+        searched cell by cell.
+
+        Args:
+            start: (row, col) of the maze start.
+            exit_pos: (row, col) of the maze exit.
+            stats: Optional SolveStats, counts the abstract nodes and the
+                cells reached while refining.
+            on_event: Optional callback for EXPAND and ENQUEUE events of the
+                abstract nodes.
+
+        Returns:
+            The path from start to exit, or None if start can not reach the
+            exit.
+        """
+        if stats is None:
+            stats = SolveStats()
+
+        self._refresh()
+        grid = self.grid
+        width = grid.width
+        origin = grid.index(start[0], start[1])
+        target = grid.index(exit_pos[0], exit_pos[1])
+        exit_row, exit_col = exit_pos
+
+        if grid.state[origin] == WALL or grid.state[target] == WALL:
+            return None
+
+        start_cluster = self._cluster(origin)
+        exit_cluster = self._cluster(target)
+        start_links = self._links(start_cluster)
+        exit_links = self._links(exit_cluster)
+        mask, stride, top, left = self._mask(start_cluster)
+        dist = self._distances(mask, stride,
+                               self._local(origin, stride, top, left))
+        first = [(node, dist[self._local(node, stride, top, left)])
+                 for node in start_links]
+
+        if start_cluster == exit_cluster:
+            first.append((target, dist[self._local(target, stride, top,
+                                                   left)]))
+
+        first = [edge for edge in first if edge[1] != -1]
+        mask, stride, top, left = self._mask(exit_cluster)
+        dist = self._distances(mask, stride,
+                               self._local(target, stride, top, left))
+        last = {node: dist[self._local(node, stride, top, left)]
+                for node in exit_links}
+        last = {node: moves for node, moves in last.items() if moves != -1}
+        g = {origin: 0}
+        parent = {origin: -1}
+        closed = set()
+        heap = [(0, origin)]
+
+        while heap:
+            node = heapq.heappop(heap)[1]
+            stats.heap_ops += 1
+
+            if node in closed:
+                continue
+
+            closed.add(node)
+            stats.expanded += 1
+            stats.track(len(heap), stats.heap_ops)
+            emit(on_event, EXPAND, node)
+
+            if node == target:
+                break
+
+            edges = self._links(self._cluster(node)).get(node, [])
+
+            if node == origin:
+                edges = edges + first
+
+            if node in last:
+                edges = edges + [(target, last[node])]
+
+            for other, moves in edges:
+                other_g = g[node] + moves
+
+                if other in g and g[other] <= other_g:
+                    continue
+
+                g[other] = other_g
+                parent[other] = node
+                row, col = divmod(other, width)
+                heapq.heappush(heap, (other_g + max(abs(row - exit_row),
+                                                    abs(col - exit_col)),
+                                      other))
+                stats.enqueued += 1
+                stats.heap_ops += 1
+                emit(on_event, ENQUEUE, other)
+
+        if target not in closed:
+            return None
+
+        nodes = [target]
+
+        while parent[nodes[-1]] != -1:
+            nodes.append(parent[nodes[-1]])
+
+        return self._refine(nodes[::-1], stats)
+
+    def _cluster(self, index: int) -> int:
+        """Returns the cluster of the cell at index."""
+        row, col = divmod(index, self.grid.width)
+
+        return row // self.size * self.columns + col // self.size
+
+    def _bounds(self, cluster: int) -> Tuple[int, int, int, int]:
+        """Returns the top, bottom, left and right (exclusive) of cluster."""
+        row, col = divmod(cluster, self.columns)
+        top = row * self.size
+        left = col * self.size
+
+        return (top, min(top + self.size, self.grid.height), left,
+                min(left + self.size, self.grid.width))
+
+    def _neighbors(self, cluster: int) -> List[int]:
+        """Returns the up to 8 clusters around cluster."""
+        rows = len(self.labeled) // self.columns
+        row, col = divmod(cluster, self.columns)
+
+        return [(row + d_row) * self.columns + col + d_col
+                for d_row, d_col in RING
+                if 0 <= row + d_row < rows and 0 <= col + d_col < self.columns]
+
+    def _mask(self, *clusters: int) -> Tuple[bytearray, int, int, int]:
+        """Copies the open cells of clusters into a padded local mask.
+
+        Local indices count cells of the box around the clusters plus a
+        border of walls, so the 8 moves are fixed offsets without bounds
+        checks. Cells of the box outside the clusters are walls.
+
+        Returns:
+            Tuple of the mask, 1 for open cells and 0 for walls, its stride
+            and the top and left of the box in the grid.
+        """
+        state = self.grid.state
+        width = self.grid.width
+        bounds = [self._bounds(cluster) for cluster in clusters]
+        top = min(bound[0] for bound in bounds)
+        left = min(bound[2] for bound in bounds)
+        stride = max(bound[3] for bound in bounds) - left + 2
+        mask = bytearray(stride * (max(bound[1] for bound in bounds) - top +
+                                   2))
+
+        for c_top, c_bottom, c_left, c_right in bounds:
+            for row in range(c_top, c_bottom):
+                at = (row - top + 1) * stride + c_left - left + 1
+                mask[at:at + c_right - c_left] = bytes(
+                    state[row * width + c_left:row * width + c_right]
+                ).translate(OPEN_CELLS)
+
+        return mask, stride, top, left
+
+    def _local(self, index: int, stride: int, top: int, left: int) -> int:
+        """Returns the local mask index of the cell at flat index."""
+        row, col = divmod(index, self.grid.width)
+
+        return (row - top + 1) * stride + col - left + 1
+
+    def _distances(self, mask: bytearray, stride: int,
+                   origin: int) -> array:
+        """Breadth First Search over a local mask from the local origin.
+
+        Returns:
+            array of signed ints, moves from origin to each local cell, -1
+            for walls and cells that can not be reached inside the cluster.
+        """
+        offsets = [d_row * stride + d_col for d_row, d_col in BFS_MOVES]
+        dist = array('i', [-1]) * len(mask)
+        dist[origin] = 0
+        queue = deque([origin])
+
+        while queue:
+            current = queue.popleft()
+            child_dist = dist[current] + 1
+
+            for offset in offsets:
+                cell = current + offset
+
+                if mask[cell] and dist[cell] == -1:
+                    dist[cell] = child_dist
+                    queue.append(cell)
+
+        return dist
+
+    def _route(self, mask: bytearray, stride: int, origin: int,
+               target: int, stats: SolveStats) -> List[int]:
+        """A* over a local mask from the local origin to the local target.
+
+        Ties on f go to the higher g, the cell closer to the target. Counts
+        the cells it reaches in stats.enqueued.
+
+        Returns:
+            List of the local indices after origin up to target inclusive.
+        """
+        offsets = [d_row * stride + d_col for d_row, d_col in BFS_MOVES]
+        target_row, target_col = divmod(target, stride)
+        g = {origin: 0}
+        parent = {origin: -1}
+        heap = [(0, 0, origin)]
+
+        while heap:
+            current = heapq.heappop(heap)[2]
+
+            if current == target:
+                break
+
+            child_g = g[current] + 1
+
+            for offset in offsets:
+                cell = current + offset
+
+                if not mask[cell] or (cell in g and g[cell] <= child_g):
+                    continue
+
+                g[cell] = child_g
+                parent[cell] = current
+                row, col = divmod(cell, stride)
+                heapq.heappush(heap, (child_g + max(abs(row - target_row),
+                                                    abs(col - target_col)),
+                                      -child_g, cell))
+
+        stats.enqueued += len(g)
+        route = []
+
+        while target != origin:
+            route.append(target)
+            target = parent[target]
+
+        return route[::-1]
+
+    def _label(self, cluster: int) -> None:
+        """Labels the components of the open cells of cluster."""
+        mask, stride, top, left = self._mask(cluster)
+        offsets = [d_row * stride + d_col for d_row, d_col in BFS_MOVES]
+        local = array('i', [-1]) * len(mask)
+
+        for index, is_open in enumerate(mask):
+            if not is_open or local[index] != -1:
+                continue
+
+            label = self._next_label
+            self._next_label += 1
+            local[index] = label
+            queue = deque([index])
+
+            while queue:
+                current = queue.popleft()
+
+                for offset in offsets:
+                    cell = current + offset
+
+                    if mask[cell] and local[cell] == -1:
+                        local[cell] = label
+                        queue.append(cell)
+
+        width = self.grid.width
+        cols = stride - 2
+
+        for row in range(len(mask) // stride - 2):
+            at = (row + 1) * stride + 1
+            start = (top + row) * width + left
+            self.labels[start:start + cols] = local[at:at + cols]
+
+        self.labeled[cluster] = 1
+
+    def _crossing(self, cluster: int, other: int) -> List[Tuple[int, int]]:
+        """Returns the crossings between two neighboring clusters.
+
+        Returns:
+            List of (cell, other cell) flat index pairs, the first cell in
+            the lower numbered cluster.
+        """
+        low, high = min(cluster, other), max(cluster, other)
+        pairs = self.crossings.get((low, high))
+
+        if pairs is not None:
+            return pairs
+
+        for part in (low, high):
+            if not self.labeled[part]:
+                self._label(part)
+
+        grid = self.grid
+        width = grid.width
+        labels = self.labels
+        top, bottom, left, right = self._bounds(low)
+        groups = {}
+
+        for row in range(top, bottom):
+            if row in (top, bottom - 1):
+                cols = range(left, right)
+
+            else:
+                cols = sorted({left, right - 1})
+
+            for col in cols:
+                cell = row * width + col
+
+                if labels[cell] == -1:
+                    continue
+
+                for move in BFS_MOVES:
+                    n_row = row + move[0]
+                    n_col = col + move[1]
+
+                    if not (0 <= n_row < grid.height and
+                            0 <= n_col < width):
+                        continue
+
+                    other_cell = n_row * width + n_col
+
+                    if (labels[other_cell] != -1 and
+                            self._cluster(other_cell) == high):
+                        groups.setdefault(
+                            (labels[cell], labels[other_cell]), []).append(
+                                (cell, other_cell))
+
+        pairs = []
+
+        for group in groups.values():
+            if len(group) >= LONG_CROSSING:
+                pairs.extend((group[0], group[-1]))
+
+            else:
+                pairs.append(group[len(group) // 2])
+
+        self.crossings[(low, high)] = pairs
+        return pairs
+
+    def _links(self, cluster: int) -> Dict[int, List[Tuple[int, int]]]:
+        """Returns the edges of the nodes of cluster, linking it if needed."""
+        links = self.links.get(cluster)
+
+        if links is not None:
+            return links
+
+        partners = {}
+
+        for other in self._neighbors(cluster):
+            for pair in self._crossing(cluster, other):
+                node, partner = pair if cluster < other else pair[::-1]
+                partners.setdefault(node, []).append(partner)
+
+        mask, stride, top, left = self._mask(cluster)
+        local = {node: self._local(node, stride, top, left)
+                 for node in partners}
+        links = {}
+
+        for node, crossing in partners.items():
+            dist = self._distances(mask, stride, local[node])
+            links[node] = ([(other, dist[local[other]]) for other in partners
+                            if other != node and dist[local[other]] != -1] +
+                           [(partner, 1) for partner in crossing])
+
+        self.links[cluster] = links
+        return links
+
+    def _refresh(self) -> None:
+        """Relabels the edited clusters and updates their crossings."""
+        if not self.dirty:
+            return
+
+        for cluster in self.dirty:
+            self._label(cluster)
+
+        for cluster in self.dirty:
+            for other in self._neighbors(cluster):
+                key = (min(cluster, other), max(cluster, other))
+                old = self.crossings.pop(key, None)
+
+                if old is not None and self._crossing(cluster, other) != old:
+                    self.links.pop(other, None)
+
+        self.dirty = set()
+
+    def _refine(self, nodes: List[int], stats: SolveStats) -> PathType:
+        """Turns a path of abstract nodes into a path of cells.
+
+        The abstract path is cut into runs of nodes whose clusters fit in a
+        box of REFINE_SPAN by REFINE_SPAN clusters. Each run is searched cell
+        by cell over every cluster of its box, so the path only has to pass
+        through the crossings where runs meet and can cut the corners the
+        abstract path goes around.
+        """
+        grid = self.grid
+        path = [grid.pos(nodes[0])]
+        first = 0
+
+        while first < len(nodes) - 1:
+            last = first + 1
+            rows, cols = zip(*(divmod(self._cluster(node), self.columns)
+                               for node in nodes[first:last + 1]))
+
+            while last < len(nodes) - 1:
+                row, col = divmod(self._cluster(nodes[last + 1]),
+                                  self.columns)
+
+                if (max(max(rows), row) - min(min(rows), row) >= REFINE_SPAN
+                        or max(max(cols), col) - min(min(cols), col) >=
+                        REFINE_SPAN):
+                    break
+
+                rows += (row,)
+                cols += (col,)
+                last += 1
+
+            mask, stride, top, left = self._mask(*(
+                row * self.columns + col
+                for row in range(min(rows), max(rows) + 1)
+                for col in range(min(cols), max(cols) + 1)))
+
+            for cell in self._route(mask, stride,
+                                    self._local(nodes[first], stride, top,
+                                                left),
+                                    self._local(nodes[last], stride, top,
+                                                left), stats):
+                row, col = divmod(cell, stride)
+                path.append((top + row - 1, left + col - 1))
+
+            first = last
+
+        return path
+
+
+class ResultCache(object):
+    """Least recently used cache of solved paths.
+
+    Keyed by the grid's size and Zobrist hash (see Grid.zobrist), the start,
+    the exit, the algorithm and its options, so an edited grid misses
+    without the cache having to be told about the edit. Paths are stored as
+    arrays of flat indices. Solves of randomized algorithms without a seed
+    are never cached.
+
+    Attributes:
+        max_entries: Most paths kept.
+        max_bytes: Most bytes of stored paths kept.
+        entries: OrderedDict of key to array of the path's flat indices,
+            least recently used first.
+        nbytes: Bytes of the stored paths.
+        hits: Number of lookups answered from the cache.
+        misses: Number of lookups that were not.
+    """
+
+    def __init__(self, max_entries: int = 256,
+                 max_bytes: int = 64 << 20) -> None:
+        """Inits an empty ResultCache with the given budgets."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, grid: Grid, start: PosType, exit_pos: PosType,
+            algorithm: str, options: Dict[str, Any]) -> Optional[Tuple]:
+        """Returns the cache key of a solve, None if it can not be cached."""
+        if algorithm in RANDOMIZED and options.get('seed') is None:
+            return None
+
+        # Scratch memory, callbacks and counters do not change the path, so
+        # they are left out instead of making every key unique.
+        extra = tuple(sorted(
+            (name, value) for name, value in options.items()
+            if name not in ('on_event', 'stats')
+            and not isinstance(value, Scratch)))
+
+        try:
+            hash(extra)
+
+        except TypeError:
+            return None
+
+        return (grid.width, grid.height, grid.zobrist, tuple(start),
+                tuple(exit_pos), algorithm, extra)
+
+    def get(self, grid: Grid, key: Tuple) -> Optional[PathType]:
+        """Returns the cached path of key as (row, col) positions, or None."""
+        path = self.entries.get(key)
+
+        if path is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return [divmod(i, grid.width) for i in path]
+
+    def put(self, grid: Grid, key: Tuple, path: PathType) -> None:
+        """Stores path under key, evicting least recently used paths."""
+        stored = array('i', [row * grid.width + col for row, col in path])
+        old = self.entries.pop(key, None)
+
+        if old is not None:
+            self.nbytes -= old.itemsize * len(old)
+
+        if stored.itemsize * len(stored) > self.max_bytes:
+            return
+
+        self.entries[key] = stored
+        self.nbytes += stored.itemsize * len(stored)
+
+        while (len(self.entries) > self.max_entries or
+               self.nbytes > self.max_bytes):
+            old = self.entries.popitem(last=False)[1]
+            self.nbytes -= old.itemsize * len(old)
+
+    def clear(self) -> None:
+        """Drops every path, the counters are kept."""
+        self.entries.clear()
+        self.nbytes = 0
+
+
+class SolveWorker(object):
+    """State a SolveTask shares with its worker thread.
+
+    Kept apart from the SolveTask so the thread never refers to the task,
+    and dropping the task can release the thread.
+
+    Attributes:
+        run_solve: Runs the solve, given its "on_event" callback as a
+            keyword argument.
+        done: True once the solve has finished or was cancelled.
+        result: SolveResult of the solve, None until done.
+        error: Exception the solve raised, None if it did not.
+        events: (kind, index) events of the current step.
+        deadline: time.perf_counter() time the current step ends at.
+        until: Callback ending the current step, see SolveTask.step().
+        cancelled: True once the solve was asked to stop.
+        resume: Semaphore the worker waits on between steps.
+        paused: Semaphore the caller waits on while a step runs.
+    """
+
+    def __init__(self, run_solve: Callable[..., SolveResult]) -> None:
+        """Inits SolveWorker, the solve runs once run() is called."""
+        self.run_solve = run_solve
+        self.done = False
+        self.result = None
+        self.error = None
+        self.events = []
+        self.deadline = 0.0
+        self.until = None
+        self.cancelled = False
+        self.resume = threading.Semaphore(0)
+        self.paused = threading.Semaphore(0)
+
+    def run(self) -> None:
+        """Body of the worker thread."""
+        try:
+            self.result = self.run_solve(on_event=self.on_event)
+
+        except Exception as error:  # Raised again in the caller's thread.
+            self.error = error
+
+        self.done = True
+        self.paused.release()
+
+    def on_event(self, kind: int, index: int) -> bool:
+        """Stores an event and pauses the worker when the step is over."""
+        if self.cancelled:
+            return True
+
+        self.events.append((kind, index))
+
+        if ((self.until is not None and self.until(kind, index)) or
+                time.perf_counter() > self.deadline):
+            self.paused.release()
+            self.resume.acquire()
+
+        return self.cancelled
+
+
+class SolveTask(object):
+    """Solve that runs a step at a time, for callers with their own loop.
+
+    Algorithms in STEPPERS run as generators, see solve_steps(), and each
+    step takes events from the generator in the caller's thread. The others
+    can only report progress through their "on_event" callback, so they run
+    in a worker thread whose callback stores each event and, once a step is
+    over, hands control back to the caller and waits for the next step()
+    call. Either way the solve only runs during step(), so the caller may
+    read the grid between steps but must not edit it until the task is done.
+
+    A started worker thread is held until the solve is done. A task given
+    up on before then must release it: call close() or cancel(), or use the
+    task in a with statement. Dropping the last reference to the task also
+    closes it.
+
+    Attributes:
+        algorithm: Name of the algorithm being run.
+        stats: SolveStats the solve counts in, up to date between steps.
+    """
+
+    def __init__(self, grid: Grid, start: PosType, exit_pos: PosType,
+                 algorithm: str = 'A*', cache: Optional[ResultCache] = None,
+                 **options: Any) -> None:
+        """Inits SolveTask, the solve starts at the first step() call.
+
+        Same arguments as solve() without "on_event".
+        """
+        self.algorithm = algorithm
+        self.stats = SolveStats()
+        self._steps = None
+        self._done = False
+        self._result = None
+        self._worker = None
+        self._thread = None
+
+        if algorithm in STEPPERS:
+            self._steps = solve_steps(grid, start, exit_pos, algorithm,
+                                      cache=cache, stats=self.stats,
+                                      **options)
+
+        else:
+            self._worker = SolveWorker(functools.partial(
+                solve, grid, start, exit_pos, algorithm, cache=cache,
+                stats=self.stats, **options))
+
+    def __enter__(self) -> 'SolveTask':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+    @property
+    def done(self) -> bool:
+        """True once the solve has finished or was cancelled."""
+        if self._worker is None:
+            return self._done
+
+        return self._worker.done
+
+    @property
+    def result(self) -> Optional[SolveResult]:
+        """SolveResult of the solve, None until done."""
+        if self._worker is None:
+            return self._result
+
+        return self._worker.result
+
+    def step(self, budget: Optional[float] = None,
+             until: Optional[EventHandler] = None) -> List[EventType]:
+        """Runs the solve until the step is over or the solve is done.
+
+        Args:
+            budget: Seconds the step may run for, no limit if None.
+            until: Optional callback taking (kind, index) of each event, the
+                step ends after the event it returns a truthy value for.
+
+        Returns:
+            List of the (kind, index) events of the step, in order.
+        """
+        if self.done:
+            return []
+
+        deadline = (float('inf') if budget is None else
+                    time.perf_counter() + budget)
+
+        if self._worker is None:
+            return self._run_steps(deadline, until)
+
+        worker = self._worker
+        worker.events = []
+        worker.until = until
+        worker.deadline = deadline
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=worker.run, daemon=True)
+            self._thread.start()
+
+        else:
+            worker.resume.release()
+
+        worker.paused.acquire()
+
+        if worker.error is not None:
+            raise worker.error
+
+        return worker.events
+
+    def cancel(self) -> None:
+        """Stops the solve, result is then a cancelled SolveResult.
+
+        Waits for the worker thread to end if there is one.
+        """
+        if self._worker is None:
+            if not self._done:
+                self._steps.close()
+                self.stats.cancelled = True
+                self._finish(SolveResult(self.algorithm, None, self.stats))
+
+            return
+
+        worker = self._worker
+
+        if worker.done:
+            if self._thread is not None:
+                self._thread.join()
+
+            return
+
+        worker.cancelled = True
+
+        if self._thread is None:
+            self.stats.cancelled = True
+            worker.result = SolveResult(self.algorithm, None, self.stats)
+            worker.done = True
+            return
+
+        worker.resume.release()
+        worker.paused.acquire()
+        self._thread.join()
+
+    def close(self) -> None:
+        """Releases the worker thread, cancelling the solve if unfinished."""
+        self.cancel()
+
+    def _run_steps(self, deadline: float,
+                   until: Optional[EventHandler]) -> List[EventType]:
+        """Takes the events of a step from the generator of the solve."""
+        steps = self._steps
+        events = []
+
+        try:
+            while True:
+                kind, index = next(steps)
+                events.append((kind, index))
+
+                if ((until is not None and until(kind, index)) or
+                        time.perf_counter() > deadline):
+                    return events
+
+        except StopIteration as finished:
+            self._finish(finished.value)
+
+        except Exception:
+            self._finish(None)
+            raise
+
+        return events
+
+    def _finish(self, result: Optional[SolveResult]) -> None:
+        """Marks a generator solve as done with result."""
+        self._done = True
+        self._result = result
+
+
+class Cancelled(Exception):
+    """Raised inside a solver when its "on_event" callback asks to stop."""
+
+
+# ------------
+#  Functions
+# ------------
+def emit(on_event: Optional[EventHandler], kind: int, index: int) -> None:
+    """Passes a solver event to the callback if there is one.
+
+    Args:
+        on_event: Callback taking (kind, index). A truthy return value
+            cancels the solve.
+        kind: One of the solver event kinds.
+        index: Flat index of the cell the event is about.
+
+    Raises:
+        Cancelled: The callback asked the solver to stop.
+    """
+    if on_event is not None and on_event(kind, index):
+        raise Cancelled()
+
+
+def run_steps(steps: StepsType, on_event: Optional[EventHandler] = None
+              ) -> Optional[PathType]:
+    """Runs a generator solver to the end, see STEPPERS.
+
+    Args:
+        steps: Generator of the solve's (kind, index) events.
+        on_event: Optional callback each event is passed to, see emit().
+
+    Returns:
+        The path the generator returned.
+    """
+    while True:
+        try:
+            kind, index = next(steps)
+
+        except StopIteration as finished:
+            return finished.value
+
+        emit(on_event, kind, index)
+
+
+def neighbors(grid: Grid, index: int,
+              moves: List[PosType] = ADJACENT) -> Iterator[int]:
+    """Yields the flat index of each in bounds cell adjacent to index.
+
+    Args:
+        grid: Grid the index belongs to.
+        index: Flat index of the cell.
+        moves: (row, col) offsets to try, in order.
+    """
+    row, col = divmod(index, grid.width)
+
+    for move in moves:
+        n_row = row + move[0]
+        n_col = col + move[1]
+
+        if 0 <= n_row < grid.height and 0 <= n_col < grid.width:
+            yield n_row * grid.width + n_col
+
+
+def backtrack_solver(grid: Grid, start: PosType, exit_pos: PosType,
+                     stats: SolveStats,
+                     on_event: Optional[EventHandler] = None,
+                     seed: Optional[int] = None) -> Optional[PathType]:
+    """Pathfinding algorithm using randomized backtracking.
+
+    Checks if the current cell is the exit and if not randomly chooses one of
+    the 8 adjacent cells to check next. Once it reaches a deadend or a cell
+    that has already been visited it backtracks and chooses another adjacent
+    cell randomly but not one it has already chosen.
+
+    Uses an explicit stack instead of recursion so the size of the maze is
+    not limited by Python's recursion limit. Each stack frame is the cell,
+    which of ADJACENT_ORDERS it tries its neighbors in and how many of them
+    it has tried, kept in three compact arrays.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit. Only used to tell when the
+            exit is reached, the search does not know where it is.
+        stats: SolveStats to update.
+        on_event: Optional callback for VISIT and BACKTRACK events.
+        seed: Seed for the random order cells are checked in. The same seed
+            always gives the same search.
+
+    Returns:
+        The path from start to exit, or None if all valid cells have been
+        visited.
+    """
+    state = grid.state
+    width = grid.width
+    height = grid.height
+    rng = rand.Random(seed)
+    orders_count = len(ADJACENT_ORDERS)
+    visited = bytearray(grid.size)
+    stack = array('i')
+    orders = array('H')
+    tried = bytearray()
+    start_index = grid.index(start[0], start[1])
+    exit_index = grid.index(exit_pos[0], exit_pos[1])
+
+    if state[start_index] == WALL:
+        return None
+
+    visited[start_index] = 1
+    stack.append(start_index)
+    orders.append(rng.randrange(orders_count))
+    tried.append(0)
+    stats.expanded += 1
+    emit(on_event, VISIT, start_index)
+
+    if start_index == exit_index:
+        return [start]
+
+    while stack:
+        current = stack[-1]
+        step = tried[-1]
+
+        if step == 8:
+            stack.pop()
+            orders.pop()
+            tried.pop()
+            emit(on_event, BACKTRACK, current)
+            continue
+
+        tried[-1] = step + 1
+        move = ADJACENT_ORDERS[orders[-1]][step]
+        row = current // width + move[0]
+        col = current % width + move[1]
+
+        if not (0 <= row < height and 0 <= col < width):
+            continue
+
+        child = row * width + col
+
+        if visited[child] or state[child] == WALL:
+            continue
+
+        visited[child] = 1
+        stack.append(child)
+        orders.append(rng.randrange(orders_count))
+        tried.append(0)
+        stats.expanded += 1
+        stats.track(len(stack))
+        emit(on_event, VISIT, child)
+
+        if child == exit_index:
+            return [grid.pos(i) for i in stack]
+
+    return None
+
+
+def breadth_first(grid: Grid, start: PosType, exit_pos: PosType,
+                  stats: SolveStats,
+                  on_event: Optional[EventHandler] = None,
+                  scratch: Optional[Scratch] = None) -> Optional[PathType]:
+    """Uses Breadth First Search algorithm to find the exit to grid.
+
+    This algorithm is allowed to move diagonal thus it prioritizes moving
+    diagonal since in any square grid style maze moving diagonal will always be
+    faster then not doing so. Each enqueued cell only records the index of
+    the cell it was reached from, the path is rebuilt from those once the exit
+    is found.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit. Only used to tell when the
+            exit is reached, the search does not head towards it.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events.
+        scratch: Optional cleared Scratch for grid, such as a MappedScratch
+            for mazes too big for memory. The queue is made by it too.
+
+    Returns:
+        The path from start to exit, or None if all valid cells have been
+        visited.
+    """
+    return run_steps(breadth_first_steps(grid, start, exit_pos, stats,
+                                         scratch), on_event)
+
+
+def breadth_first_steps(grid: Grid, start: PosType, exit_pos: PosType,
+                        stats: SolveStats,
+                        scratch: Optional[Scratch] = None) -> StepsType:
+    """Generator version of breadth_first(), runs it an event at a time.
+
+    Takes the same arguments as breadth_first() without "on_event".
+
+    Yields:
+        (kind, index) of each EXPAND and ENQUEUE event.
+
+    Returns:
+        The path from start to exit, or None if there is none.
+    """
+    state = grid.state
+    width = grid.width
+    height = grid.height
+
+    if scratch is None:
+        scratch = Scratch(grid.size)
+
+    visited = scratch.visited
+    parent = scratch.parent
+    start_index = grid.index(start[0], start[1])
+    exit_index = grid.index(exit_pos[0], exit_pos[1])
+
+    if state[start_index] == WALL or state[exit_index] == WALL:
+        return None
+
+    if start_index == exit_index:
+        return [start]
+
+    visited[start_index] = 1
+    queue = scratch.queue()
+    queue.append(start_index)
+
+    while queue:
+        current = queue.popleft()  # Dequeue
+        stats.expanded += 1
+        stats.track(len(queue))
+        yield EXPAND, current
+        row, col = divmod(current, width)
+
+        for move in BFS_MOVES:
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if not (0 <= n_row < height and 0 <= n_col < width):
+                continue
+
+            cell = n_row * width + n_col
+
+            if visited[cell]:
+                continue
+
+            if cell == exit_index:
+                parent[cell] = current
+                return scratch.path_to(grid, cell)
+
+            if state[cell] != WALL:
+                queue.append(cell)  # Enqueue
+                visited[cell] = 1
+                parent[cell] = current
+                stats.enqueued += 1
+                yield ENQUEUE, cell
+
+    return None
+
+
+def bidirectional_breadth_first(grid: Grid, start: PosType,
+                                exit_pos: PosType, stats: SolveStats,
+                                on_event: Optional[EventHandler] = None
+                                ) -> Optional[PathType]:
+    """Uses Breadth First Search from both the start and the exit.
+
+    Each round expands one whole level of whichever side has the smaller
+    frontier. A side meets the other when it reaches a cell the other side
+    has already seen. All meetings in that level are compared and the
+    shortest one is used, which is always a shortest path because every
+    cell closer to either end was seen in an earlier level. Each search only
+    has to reach about half way, so far fewer cells are expanded than with
+    breadth_first() on long paths.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events of both
+            searches.
+
+    Returns:
+        The path from start to exit, or None if the two searches can not
+        meet.
+    """
+    state = grid.state
+    width = grid.width
+    height = grid.height
+    start_index = grid.index(start[0], start[1])
+    exit_index = grid.index(exit_pos[0], exit_pos[1])
+
+    if state[start_index] == WALL or state[exit_index] == WALL:
+        return None
+
+    if start_index == exit_index:
+        return [start]
+
+    sides = [Scratch(grid.size), Scratch(grid.size)]
+    frontiers = [[start_index], [exit_index]]
+    sides[0].visited[start_index] = 1
+    sides[1].visited[exit_index] = 1
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        visited = sides[side].visited
+        parent = sides[side].parent
+        g = sides[side].g
+        other_visited = sides[1 - side].visited
+        other_g = sides[1 - side].g
+        best = grid.size
+        meet = None
+        level = []
+        stats.track(len(frontiers[0]) + len(frontiers[1]))
+
+        for current in frontiers[side]:
+            stats.expanded += 1
+            emit(on_event, EXPAND, current)
+            row, col = divmod(current, width)
+            child_g = g[current] + 1
+
+            for move in BFS_MOVES:
+                n_row = row + move[0]
+                n_col = col + move[1]
+
+                if not (0 <= n_row < height and 0 <= n_col < width):
+                    continue
+
+                cell = n_row * width + n_col
+
+                if visited[cell] or state[cell] == WALL:
+                    continue
+
+                if other_visited[cell]:
+                    if child_g + other_g[cell] < best:
+                        best = child_g + other_g[cell]
+                        meet = (current, cell)
+
+                    continue
+
+                visited[cell] = 1
+                parent[cell] = current
+                g[cell] = child_g
+                level.append(cell)
+                stats.enqueued += 1
+                emit(on_event, ENQUEUE, cell)
+
+        if meet is not None:
+            if side:
+                meet = (meet[1], meet[0])
+
+            back = sides[1].path_to(grid, meet[1])
+            back.reverse()
+            return sides[0].path_to(grid, meet[0]) + back
+
+        frontiers[side] = level
+
+    return None
+
+
+def heuristic(index: int, exit_row: int, exit_col: int,
+              width: int) -> Tuple[int, int]:
+    """Estimates the number of moves from index to the exit.
+
+    Octile distance is max(d_row, d_col) + (D2 - 1) * min(d_row, d_col) where
+    D2 is the cost of a diagonal move. A diagonal move costs 1 in these mazes
+    so the second term drops out of the estimate, which keeps it exact on an
+    open grid, never overestimating and consistent. min(d_row, d_col) is still
+    returned and used to break ties towards the straighter line to the exit.
+
+    Args:
+        index: Flat index of the cell.
+        exit_row: Row of the maze exit.
+        exit_col: Column of the maze exit.
+        width: Width of the grid the index belongs to.
+
+    Returns:
+        Tuple of the estimated moves to the exit and the tie-breaker.
+    """
+    row, col = divmod(index, width)
+    d_row = abs(row - exit_row)
+    d_col = abs(col - exit_col)
+
+    if d_row > d_col:
+        return d_row, d_col
+
+    return d_col, d_row
+
+
+def a_star(grid: Grid, start: PosType, exit_pos: PosType,
+           stats: SolveStats,
+           on_event: Optional[EventHandler] = None,
+           scratch: Optional[Scratch] = None) -> Optional[PathType]:
+    """Uses A* algorithm to find the exit to grid.
+
+    This algorithm is allowed to move diagonal. The open list is a binary
+    heap, a cell whose g improves is pushed again and the old entry is
+    skipped when it comes off the heap. Since the heuristic is consistent a
+    cell is never improved after it has been expanded.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events.
+        scratch: Optional cleared Scratch for grid. With a MappedScratch the
+            open list is a BucketOpenList spilling to disk.
+
+    Returns:
+        The path from start to exit, or None if all valid cells have been
+        visited.
+    """
+    return run_steps(a_star_steps(grid, start, exit_pos, stats, scratch),
+                     on_event)
+
+
+def a_star_steps(grid: Grid, start: PosType, exit_pos: PosType,
+                 stats: SolveStats,
+                 scratch: Optional[Scratch] = None) -> StepsType:
+    """Generator version of a_star(), runs it an event at a time.
+
+    Takes the same arguments as a_star() without "on_event".
+
+    Yields:
+        (kind, index) of each EXPAND and ENQUEUE event.
+
+    Returns:
+        The path from start to exit, or None if there is none.
+    """
+    state = grid.state
+    width = grid.width
+    height = grid.height
+
+    if scratch is None:
+        scratch = Scratch(grid.size)
+
+    closed = scratch.visited
+    g = scratch.g
+    exit_row, exit_col = exit_pos
+    start_index = grid.index(start[0], start[1])
+    exit_index = grid.index(exit_row, exit_col)
+
+    if state[start_index] == WALL or state[exit_index] == WALL:
+        return None
+
+    if isinstance(scratch, MappedScratch):
+        open_list = BucketOpenList(g, scratch)
+
+    else:
+        open_list = OpenList(g)
+    h, tie = heuristic(start_index, exit_row, exit_col, width)
+    open_list.push(start_index, 0, h, tie)
+
+    while open_list:
+        current = open_list.pop()
+
+        if current == -1:
+            break
+
+        closed[current] = 1
+        stats.expanded += 1
+        stats.track(len(open_list), open_list.pushes + open_list.pops)
+        yield EXPAND, current
+
+        if current == exit_index:
+            return scratch.path_to(grid, current)
+
+        row, col = divmod(current, width)
+        child_g = g[current] + 1
+
+        for move in ADJACENT:
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if not (0 <= n_row < height and 0 <= n_col < width):
+                continue
+
+            child = n_row * width + n_col
+
+            if (state[child] == WALL or closed[child] or
+                    child == start_index):
+                continue
+
+            if scratch.parent[child] != -1 and g[child] <= child_g:
+                continue
+
+            scratch.parent[child] = current
+            g[child] = child_g
+            h, tie = heuristic(child, exit_row, exit_col, width)
+            open_list.push(child, child_g, child_g + h, tie)
+            stats.enqueued += 1
+            yield ENQUEUE, child
+
+    return None
+
+
+def bidirectional_a_star(grid: Grid, start: PosType, exit_pos: PosType,
+                         stats: SolveStats,
+                         on_event: Optional[EventHandler] = None
+                         ) -> Optional[PathType]:
+    """Uses A* from the start towards the exit and from the exit back.
+
+    Each step expands a cell from whichever side has the smaller open list.
+    When a side reaches a cell the other side has a g for, the two halves
+    form a path and the shortest one seen so far is kept.
+
+    Both sides use the average of the two heuristics as their estimate, the
+    forward side (h_exit - h_start) / 2 and the backward side the negative
+    of that. Doubled to stay in whole numbers, a cell's key is
+    2 * g + h_exit - h_start going forward. The two estimates of a cell sum
+    to zero, so the keys of the two halves of any path sum to twice its
+    length and the search stops once the lowest keys of the two open lists
+    sum to at least twice the best path, when no shorter path can exist.
+    With plain A* heuristics on both sides the searches would have to pass
+    each other before the best path could be proven.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events of both
+            searches.
+
+    Returns:
+        The path from start to exit, or None if the two searches can not
+        meet.
+    """
+    state = grid.state
+    width = grid.width
+    height = grid.height
+    origins = [grid.index(start[0], start[1]),
+               grid.index(exit_pos[0], exit_pos[1])]
+    targets = [exit_pos, start]
+
+    if state[origins[0]] == WALL or state[origins[1]] == WALL:
+        return None
+
+    if origins[0] == origins[1]:
+        return [start]
+
+    sides = [Scratch(grid.size), Scratch(grid.size)]
+    open_lists = [OpenList(sides[0].g), OpenList(sides[1].g)]
+
+    def potential(index: int, side: int) -> Tuple[int, int]:
+        """Returns side's doubled estimate of index and a tie-breaker."""
+        to_target, tie = heuristic(index, targets[side][0], targets[side][1],
+                                   width)
+        to_origin = heuristic(index, targets[1 - side][0],
+                              targets[1 - side][1], width)[0]
+        return to_target - to_origin, tie
+
+    for side in (0, 1):
+        key, tie = potential(origins[side], side)
+        open_lists[side].push(origins[side], 0, key, tie)
+
+    best = grid.size
+    meet = -1
+
+    while open_lists[0] and open_lists[1]:
+        if open_lists[0].top() + open_lists[1].top() >= 2 * best:
+            break
+
+        side = 0 if len(open_lists[0]) <= len(open_lists[1]) else 1
+        current = open_lists[side].pop()
+
+        if current == -1:
+            break
+
+        scratch = sides[side]
+        other = sides[1 - side]
+        origin = origins[side]
+        other_origin = origins[1 - side]
+        g = scratch.g
+        scratch.visited[current] = 1
+        stats.expanded += 1
+        stats.track(len(open_lists[0]) + len(open_lists[1]),
+                    sum(side_list.pushes + side_list.pops
+                        for side_list in open_lists))
+        emit(on_event, EXPAND, current)
+        row, col = divmod(current, width)
+        child_g = g[current] + 1
+
+        for move in ADJACENT:
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if not (0 <= n_row < height and 0 <= n_col < width):
+                continue
+
+            child = n_row * width + n_col
+
+            if (state[child] == WALL or scratch.visited[child] or
+                    child == origin):
+                continue
+
+            if scratch.parent[child] != -1 and g[child] <= child_g:
+                continue
+
+            scratch.parent[child] = current
+            g[child] = child_g
+            key, tie = potential(child, side)
+            open_lists[side].push(child, child_g, 2 * child_g + key, tie)
+            stats.enqueued += 1
+            emit(on_event, ENQUEUE, child)
+
+            if ((other.parent[child] != -1 or child == other_origin) and
+                    child_g + other.g[child] < best):
+                best = child_g + other.g[child]
+                meet = child
+
+    if meet == -1:
+        return None
+
+    back = sides[1].path_to(grid, meet)
+    back.reverse()
+    return sides[0].path_to(grid, meet) + back[1:]
+
+
+def jump_straight(grid: Grid, row: int, col: int, d_row: int, d_col: int,
+                  exit_index: int) -> int:
+    """Moves from (row, col) along a row or column until a jump point.
+
+    A cell is a jump point if it is the exit or has a forced neighbor, a
+    cell diagonally ahead that can only be reached in the fewest moves
+    through it because the cell beside it is a wall. Cells beside the line
+    that are off the grid count as walls and never force a neighbor.
+
+    Args:
+        grid: Grid being solved.
+        row: Row of the cell to jump from.
+        col: Column of the cell to jump from.
+        d_row: Row direction, 0 when moving along a row.
+        d_col: Column direction, 0 when moving along a column.
+        exit_index: Flat index of the maze exit.
+
+    Returns:
+        Flat index of the jump point, or -1 if a wall or the edge of the grid
+        was reached first.
+    """
+    state = grid.state
+    width = grid.width
+    index = row * width + col
+
+    if d_row:
+        # Walk down a column, the sides are the cells left and right.
+        step = d_row * width
+        count = (grid.height - 1 - row) if d_row > 0 else row
+        left = col > 0
+        right = col < width - 1
+
+        for _ in range(count):
+            index += step
+
+            if state[index] == WALL:
+                return -1
+
+            if index == exit_index:
+                return index
+
+            ahead = index + step
+
+            if ((left and not state[index - 1] and
+                 0 <= ahead < grid.size and state[ahead - 1]) or
+                    (right and not state[index + 1] and
+                     0 <= ahead < grid.size and state[ahead + 1])):
+                return index
+
+        return -1
+
+    # Walk along a row, the sides are the cells above and below.
+    count = (width - 1 - col) if d_col > 0 else col
+    above = row > 0
+    below = row < grid.height - 1
+
+    for _ in range(count):
+        index += d_col
+        col += d_col
+
+        if state[index] == WALL:
+            return -1
+
+        if index == exit_index:
+            return index
+
+        if 0 <= col + d_col < width:
+            if ((above and not state[index - width] and
+                 state[index - width + d_col]) or
+                    (below and not state[index + width] and
+                     state[index + width + d_col])):
+                return index
+
+    return -1
+
+
+def jump(grid: Grid, row: int, col: int, d_row: int, d_col: int,
+         exit_index: int) -> int:
+    """Moves from (row, col) in one direction until reaching a jump point.
+
+    Straight moves are left to jump_straight(). Moving diagonally a cell is
+    a jump point if it is the exit, if it has a forced neighbor or if a
+    straight jump from it along either part of the diagonal reaches a jump
+    point. A diagonal forced neighbor is the cell diagonally back across the
+    line of travel when the cell beside it, on the side the move came from,
+    is a wall.
+
+    Args:
+        grid: Grid being solved.
+        row: Row of the cell to jump from.
+        col: Column of the cell to jump from.
+        d_row: Row direction, -1, 0 or 1.
+        d_col: Column direction, -1, 0 or 1.
+        exit_index: Flat index of the maze exit.
+
+    Returns:
+        Flat index of the jump point, or -1 if a wall or the edge of the grid
+        was reached first.
+    """
+    if not (d_row and d_col):
+        return jump_straight(grid, row, col, d_row, d_col, exit_index)
+
+    state = grid.state
+    width = grid.width
+    height = grid.height
+
+    def free(r: int, c: int) -> bool:
+        """True if (r, c) is in the grid and not a wall."""
+        return 0 <= r < height and 0 <= c < width and state[r * width + c]
+
+    while True:
+        row += d_row
+        col += d_col
+
+        if not free(row, col):
+            return -1
+
+        index = row * width + col
+
+        if index == exit_index:
+            return index
+
+        if ((free(row + d_row, col - d_col) and
+             not free(row, col - d_col)) or
+                (free(row - d_row, col + d_col) and
+                 not free(row - d_row, col))):
+            return index
+
+        if (jump_straight(grid, row, col, d_row, 0, exit_index) != -1 or
+                jump_straight(grid, row, col, 0, d_col, exit_index) != -1):
+            return index
+
+
+def jump_directions(grid: Grid, index: int,
+                    parent: int) -> List[PosType]:
+    """Returns the directions Jump Point Search continues in from index.
+
+    From the start every direction is tried. Otherwise only the natural
+    neighbors, the cells straight on in the direction of travel, and the
+    forced neighbors are, the rest are reached at least as fast without
+    passing through index.
+
+    Args:
+        grid: Grid being solved.
+        index: Flat index of the jump point.
+        parent: Flat index of the jump point it was reached from, -1 for the
+            start.
+    """
+    if parent == -1:
+        return ADJACENT
+
+    state = grid.state
+    width = grid.width
+    height = grid.height
+    row, col = divmod(index, width)
+    p_row, p_col = divmod(parent, width)
+    d_row = (row > p_row) - (row < p_row)
+    d_col = (col > p_col) - (col < p_col)
+
+    def free(r: int, c: int) -> bool:
+        """True if (r, c) is in the grid and not a wall."""
+        return 0 <= r < height and 0 <= c < width and state[r * width + c]
+
+    if d_row and d_col:
+        directions = [(d_row, 0), (0, d_col), (d_row, d_col)]
+
+        if not free(row, col - d_col):
+            directions.append((d_row, -d_col))
+
+        if not free(row - d_row, col):
+            directions.append((-d_row, d_col))
+
+    elif d_row:
+        directions = [(d_row, 0)]
+
+        if not free(row, col + 1):
+            directions.append((d_row, 1))
+
+        if not free(row, col - 1):
+            directions.append((d_row, -1))
+
+    else:
+        directions = [(0, d_col)]
+
+        if not free(row + 1, col):
+            directions.append((1, d_col))
+
+        if not free(row - 1, col):
+            directions.append((-1, d_col))
+
+    return directions
+
+
+def jump_point_search(grid: Grid, start: PosType, exit_pos: PosType,
+                      stats: SolveStats,
+                      on_event: Optional[EventHandler] = None
+                      ) -> Optional[PathType]:
+    """Uses Jump Point Search to find the exit to grid.
+
+    A* on the same open list and heuristic as a_star(), but instead of
+    pushing every neighbor it jumps in straight and diagonal lines over
+    cells that any shortest path could skip and only pushes the jump points
+    where the path might have to turn. Moves cost 1 in every direction, so
+    the cost between two jump points is the number of moves along the line
+    joining them. Diagonal moves may cut corners like in the other solvers,
+    see ADJACENT. The path has the same length as the one a_star() finds
+    while far fewer cells are pushed and expanded in open rooms.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update, expanded and enqueued count jump points.
+        on_event: Optional callback for JUMP events of the jump points that
+            are expanded.
+
+    Returns:
+        The path from start to exit, or None if all jump points have been
+        expanded.
+    """
+    return run_steps(jump_point_search_steps(grid, start, exit_pos, stats),
+                     on_event)
+
+
+def jump_point_search_steps(grid: Grid, start: PosType, exit_pos: PosType,
+                            stats: SolveStats) -> StepsType:
+    """Generator version of jump_point_search(), runs it an event at a time.
+
+    Takes the same arguments as jump_point_search() without "on_event".
+
+    Yields:
+        (kind, index) of each JUMP event.
+
+    Returns:
+        The path from start to exit, or None if there is none.
+    """
+    state = grid.state
+    width = grid.width
+    scratch = Scratch(grid.size)
+    closed = scratch.visited
+    parent = scratch.parent
+    g = scratch.g
+    exit_row, exit_col = exit_pos
+    start_index = grid.index(start[0], start[1])
+    exit_index = grid.index(exit_row, exit_col)
+
+    if state[start_index] == WALL:
+        return None
+
+    open_list = OpenList(g)
+    h, tie = heuristic(start_index, exit_row, exit_col, width)
+    open_list.push(start_index, 0, h, tie)
+
+    while open_list:
+        current = open_list.pop()
+
+        if current == -1:
+            break
+
+        closed[current] = 1
+        stats.expanded += 1
+        stats.track(len(open_list), open_list.pushes + open_list.pops)
+        yield JUMP, current
+
+        if current == exit_index:
+            points = scratch.path_to(grid, current)
+            path = [points[0]]
+
+            for row, col in points[1:]:
+                p_row, p_col = path[-1]
+                d_row = (row > p_row) - (row < p_row)
+                d_col = (col > p_col) - (col < p_col)
+
+                while path[-1] != (row, col):
+                    p_row += d_row
+                    p_col += d_col
+                    path.append((p_row, p_col))
+
+            return path
+
+        row, col = divmod(current, width)
+
+        for d_row, d_col in jump_directions(grid, current, parent[current]):
+            child = jump(grid, row, col, d_row, d_col, exit_index)
+
+            if child == -1 or closed[child] or child == start_index:
+                continue
+
+            c_row, c_col = divmod(child, width)
+            child_g = g[current] + max(abs(c_row - row), abs(c_col - col))
+
+            if parent[child] != -1 and g[child] <= child_g:
+                continue
+
+            parent[child] = current
+            g[child] = child_g
+            h, tie = heuristic(child, exit_row, exit_col, width)
+            open_list.push(child, child_g, child_g + h, tie)
+            stats.enqueued += 1
+
+    return None
+
+
+def exit_distance_field(grid: Grid, start: PosType, exit_pos: PosType,
+                        stats: SolveStats,
+                        on_event: Optional[EventHandler] = None,
+                        cache: Optional[FieldCache] = None
+                        ) -> Optional[PathType]:
+    """Reads the path out of a cached distance field of the exit.
+
+    The first query for an exit on a grid runs one Breadth First Search out
+    from the exit over the whole maze. Queries from any other start are then
+    answered from the field without searching, until the walls of the grid
+    change or the field falls out of the cache.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update, left at zero when the cache was hit.
+        on_event: Optional callback for EXPAND and ENQUEUE events while a
+            new field is built.
+        cache: FieldCache to use, FIELD_CACHE by default.
+
+    Returns:
+        The path from start to exit, or None if start can not reach the
+        exit.
+    """
+    if cache is None:
+        cache = FIELD_CACHE
+
+    return cache.get(grid, exit_pos, stats, on_event).path_from(start)
+
+
+def descend(grid: Grid, dist: Any, start: PosType) -> Optional[PathType]:
+    """Reads a path out of a distance map by walking down its levels.
+
+    Args:
+        grid: Grid the distance map is for.
+        dist: Flat sequence of the moves from each cell to a target, -1 for
+            cells that can not reach it.
+        start: (row, col) to walk down from.
+
+    Returns:
+        List of (row, col) positions from start to the cell at distance 0
+        inclusive, or None if start can not reach it.
+    """
+    width = grid.width
+    height = grid.height
+    row, col = start
+    current = dist[row * width + col]
+
+    if current == -1:
+        return None
+
+    path = [(row, col)]
+
+    while current:
+        for move in BFS_MOVES:
+            n_row = row + move[0]
+            n_col = col + move[1]
+
+            if (0 <= n_row < height and 0 <= n_col < width and
+                    dist[n_row * width + n_col] == current - 1):
+                break
+
+        row = n_row
+        col = n_col
+        current -= 1
+        path.append((row, col))
+
+    return path
+
+
+def wavefront_field(grid: Grid, source: PosType,
+                    target: Optional[PosType] = None,
+                    stats: Optional[SolveStats] = None,
+                    on_event: Optional[EventHandler] = None) -> Any:
+    """Vectorized Breadth First Search levels of every cell from source.
+
+    Needs NumPy. The grid is padded with a border of walls so the 8 moves
+    are fixed offsets of the flat index. Each level shifts the frontier by
+    all 8 offsets at once, masks out walls and cells reached before, drops
+    duplicates and stamps the level on the rest. The work per level is a
+    handful of array operations instead of a Python loop per cell.
+
+    Args:
+        grid: Grid to search.
+        source: (row, col) the levels are counted from.
+        target: Optional (row, col) to stop at once it has been reached,
+            cells further away are left at -1.
+        stats: Optional SolveStats, each level counts its frontier as
+            expanded and the cells it reaches as enqueued.
+        on_event: Optional callback for an ENQUEUE event per reached cell.
+            Calling it is not vectorized, leave it out for speed.
+
+    Returns:
+        Flat int32 numpy array of the moves from source to each cell, -1 for
+        walls and cells that can not be reached.
+
+    Raises:
+        Cancelled: on_event asked to stop.
+    """
+    width = grid.width
+    height = grid.height
+    stride = width + 2
+    free = np.zeros((height + 2, stride), dtype=bool)
+    free[1:-1, 1:-1] = np.frombuffer(grid.state, dtype=np.uint8).reshape(
+        height, width) != WALL
+    free = free.ravel()
+    dist = np.full(free.size, -1, dtype=np.int32)
+    offsets = np.array([d_row * stride + d_col for d_row, d_col in BFS_MOVES],
+                       dtype=np.intp)
+    origin = (source[0] + 1) * stride + source[1] + 1
+    # Without a target the goal is the last border cell, never reached.
+    goal = -1 if target is None else (target[0] + 1) * stride + target[1] + 1
+    frontier = np.array([origin], dtype=np.intp)
+    level = 0
+
+    if free[origin]:
+        free[origin] = False
+        dist[origin] = 0
+
+    else:
+        frontier = frontier[:0]
+
+    while frontier.size and dist[goal] == -1:
+        level += 1
+        cells = (frontier[:, None] + offsets).ravel()
+        cells = cells[free[cells]]
+        free[cells] = False
+        # A cell reached from several frontier cells keeps only the copy
+        # whose position survives the scatter.
+        order = np.arange(cells.size, dtype=np.int32)
+        dist[cells] = order
+        cells = cells[dist[cells] == order]
+        dist[cells] = level
+
+        if stats is not None:
+            stats.expanded += frontier.size
+            stats.enqueued += cells.size
+            stats.track(int(cells.size))
+
+        if on_event is not None:
+            rows, cols = np.divmod(cells, stride)
+
+            for cell in ((rows - 1) * width + cols - 1).tolist():
+                emit(on_event, ENQUEUE, cell)
+
+        frontier = cells
+
+    return np.ascontiguousarray(
+        dist.reshape(height + 2, stride)[1:-1, 1:-1]).ravel()
+
+
+def wavefront(grid: Grid, start: PosType, exit_pos: PosType,
+              stats: SolveStats,
+              on_event: Optional[EventHandler] = None) -> Optional[PathType]:
+    """Finds the path with a vectorized wavefront from the exit.
+
+    Grows wavefront_field() levels out from the exit until start is reached,
+    then walks down the levels from start. Falls back to a DistanceField
+    built in plain Python when NumPy is not installed.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for ENQUEUE events, slows the wavefront
+            down to a Python call per cell.
+
+    Returns:
+        The path from start to exit, or None if start can not reach the
+        exit.
+    """
+    if np is None:
+        return DistanceField(grid, exit_pos, stats,
+                             on_event).path_from(start)
+
+    if grid.get(exit_pos[0], exit_pos[1]) == WALL:
+        return None
+
+    dist = wavefront_field(grid, exit_pos, start, stats, on_event)
+
+    return descend(grid, memoryview(dist), start)
+
+
+def ring_connected(mask: int) -> bool:
+    """Checks if the open cells of a ring mask all connect through each other.
+
+    If they do, walling off the cell in the middle can not split its
+    component since its neighbors still reach each other around it.
+    """
+    ring_open = [RING[i] for i in range(8) if mask >> i & 1]
+    seen = ring_open[:1]
+
+    for cell in seen:
+        seen.extend(other for other in ring_open if other not in seen and
+                    max(abs(other[0] - cell[0]), abs(other[1] - cell[1])) == 1)
+
+    return len(seen) == len(ring_open)
+
+
+def kept_for(registry: "OrderedDict[Any, weakref.ref]", limit: int,
+             key: Any, grid: Grid, make: Callable[[], Any]) -> Any:
+    """Returns the grid watcher registry keeps for key, making it if needed.
+
+    The registry only holds weak references. A watcher is kept alive by the
+    grid it is in grid.watchers of, so it is freed along with its grid. The
+    least recently used watcher is closed once there are more than limit.
+
+    Args:
+        registry: OrderedDict of key to weakref.ref of the watcher, least
+            recently used first.
+        limit: Most watchers kept open.
+        key: Key of the watcher, starting with id(grid).
+        grid: Grid the watcher is for.
+        make: Makes a new watcher for grid.
+    """
+    ref = registry.get(key)
+    kept = ref() if ref is not None else None
+
+    if kept is not None and kept.grid is grid:
+        registry.move_to_end(key)
+        return kept
+
+    if kept is not None:
+        kept.close()
+
+    kept = make()
+    registry[key] = weakref.ref(kept)
+    registry.move_to_end(key)
+
+    while len(registry) > limit:
+        old = registry.popitem(last=False)[1]()
+
+        if old is not None:
+            old.close()
+
+    return kept
+
+
+def connectivity_for(grid: Grid) -> ConnectivityIndex:
+    """Returns the ConnectivityIndex kept for grid, making it if needed.
+
+    Indexes are kept in INDEXES, see kept_for().
+    """
+    return kept_for(INDEXES, MAX_INDEXES, id(grid), grid,
+                    lambda: ConnectivityIndex(grid))
+
+
+def reachable(grid: Grid, start: PosType, exit_pos: PosType) -> bool:
+    """Returns True if any path joins start and exit_pos in grid.
+
+    Answered from the grid's ConnectivityIndex, so after the first call it
+    costs a couple of lookups instead of a search.
+    """
+    return connectivity_for(grid).connected(start, exit_pos)
+
+
+def planner_for(grid: Grid, exit_pos: PosType) -> DStarLite:
+    """Returns the DStarLite kept for grid and exit_pos, making it if needed.
+
+    Planners are kept in PLANNERS, see kept_for().
+    """
+    key = (id(grid), grid.index(exit_pos[0], exit_pos[1]))
+
+    return kept_for(PLANNERS, MAX_PLANNERS, key, grid,
+                    lambda: DStarLite(grid, exit_pos))
+
+
+def d_star_lite(grid: Grid, start: PosType, exit_pos: PosType,
+                stats: SolveStats,
+                on_event: Optional[EventHandler] = None,
+                planner: Optional[DStarLite] = None) -> Optional[PathType]:
+    """Uses D* Lite to find the exit, reusing the search of earlier solves.
+
+    The first solve for an exit searches like A* run backwards from the
+    exit. Later solves of the same grid and exit only repair the search
+    around the walls edited since, and around how far the start moved.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events.
+        planner: DStarLite to use, by default the one planner_for() keeps
+            for grid and exit_pos.
+
+    Returns:
+        The path from start to exit, or None if start can not reach the exit.
+    """
+    if planner is None:
+        planner = planner_for(grid, exit_pos)
+
+    return planner.plan(start, stats, on_event)
+
+
+def hierarchy_for(grid: Grid, size: int = CLUSTER_SIZE) -> ClusterGraph:
+    """Returns the ClusterGraph kept for grid and size, making it if needed.
+
+    Graphs are kept in HIERARCHIES, see kept_for().
+    """
+    return kept_for(HIERARCHIES, MAX_HIERARCHIES, (id(grid), size), grid,
+                    lambda: ClusterGraph(grid, size))
+
+
+def reset_caches() -> None:
+    """Drops every field, index, planner and graph kept between solves.
+
+    The next solve of any grid starts cold, like benchmark.py needs to
+    measure a solve rather than a cache lookup.
+    """
+    FIELD_CACHE.clear()
+
+    for registry in (INDEXES, PLANNERS, HIERARCHIES):
+        for ref in registry.values():
+            kept = ref()
+
+            if kept is not None:
+                kept.close()
+
+        registry.clear()
+
+
+def hpa_star(grid: Grid, start: PosType, exit_pos: PosType,
+             stats: SolveStats,
+             on_event: Optional[EventHandler] = None,
+             cluster_size: int = CLUSTER_SIZE) -> Optional[PathType]:
+    """Uses Hierarchical Pathfinding A* (HPA*) to find the exit.
+
+    Searches the ClusterGraph that hierarchy_for() keeps for grid, then
+    searches cell by cell only around the clusters on the abstract path. The
+    path is not always the shortest one. The abstract path may take a longer
+    way between clusters, and the path still passes through one crossing
+    every few clusters. Across random, cave and perfect mazes paths were up
+    to about a sixth longer than the shortest, most often the difference is
+    a few moves. The first searches over a grid also build the clusters
+    they reach.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        stats: SolveStats to update.
+        on_event: Optional callback for EXPAND and ENQUEUE events of the
+            abstract nodes.
+        cluster_size: Number of rows and columns of cells per cluster.
+
+    Returns:
+        The path from start to exit, or None if start can not reach the exit.
+    """
+    return hierarchy_for(grid, cluster_size).plan(start, exit_pos, stats,
+                                                  on_event)
+
+
+def solve(grid: Grid, start: PosType, exit_pos: PosType,
+          algorithm: str = 'A*',
+          on_event: Optional[EventHandler] = None,
+          cache: Optional[ResultCache] = None,
+          stats: Optional[SolveStats] = None,
+          **options: Any) -> SolveResult:
+    """Solves a maze without touching pygame.
+
+    Args:
+        grid: Grid to solve.
+        start: (row, col) of the maze start.
+        exit_pos: (row, col) of the maze exit.
+        algorithm: Name of the algorithm to run, a key of ALGORITHMS.
+        on_event: Optional callback taking (kind, index) for each solver
+            event, index being the flat index of the cell in grid. Returning a
+            truthy value cancels the solve.
+        cache: Optional ResultCache. A hit returns the stored path with
+            stats.cached set and without running the algorithm or sending
+            any events. Finished solves are stored in it.
+        stats: Optional SolveStats to count the solve in, so the counters
+            can be watched while it runs. A new one by default.
+        **options: Extra keyword arguments for the algorithm, such as seed
+            for Random Backtracking.
+
+    Returns:
+        SolveResult with the path found and the stats of the solve.
+
+    Raises:
+        KeyError: algorithm is not a key of ALGORITHMS.
+    """
+    solver = ALGORITHMS[algorithm]
+
+    if stats is None:
+        stats = SolveStats()
+
+    began = time.perf_counter()
+    key = None
+
+    if cache is not None:
+        key = cache.key(grid, start, exit_pos, algorithm, options)
+
+    if key is not None:
+        path = cache.get(grid, key)
+
+        if path is not None:
+            stats.cached = True
+            stats.elapsed = time.perf_counter() - began
+            return SolveResult(algorithm, path, stats)
+
+    try:
+        path = solver(grid, start, exit_pos, stats, on_event, **options)
+
+    except Cancelled:
+        path = None
+        stats.cancelled = True
+
+    if key is not None and not stats.cancelled:
+        cache.put(grid, key, path or [])
+
+    stats.elapsed = time.perf_counter() - began
+
+    return SolveResult(algorithm, path, stats)
+
+
+def solve_steps(grid: Grid, start: PosType, exit_pos: PosType,
+                algorithm: str = 'A*',
+                cache: Optional[ResultCache] = None,
+                stats: Optional[SolveStats] = None,
+                **options: Any) -> Generator[EventType, None, SolveResult]:
+    """Generator version of solve() for the algorithms in STEPPERS.
+
+    Takes the same arguments as solve() without "on_event". Closing the
+    generator early stops the solve.
+
+    Yields:
+        (kind, index) of each solver event.
+
+    Returns:
+        SolveResult with the path found and the stats of the solve.
+
+    Raises:
+        KeyError: algorithm is not a key of STEPPERS.
+    """
+    steps = STEPPERS[algorithm]
+
+    if stats is None:
+        stats = SolveStats()
+
+    began = time.perf_counter()
+    key = None
+
+    if cache is not None:
+        key = cache.key(grid, start, exit_pos, algorithm, options)
+
+    if key is not None:
+        path = cache.get(grid, key)
+
+        if path is not None:
+            stats.cached = True
+            stats.elapsed = time.perf_counter() - began
+            return SolveResult(algorithm, path, stats)
+
+    path = yield from steps(grid, start, exit_pos, stats, **options)
+
+    if key is not None:
+        cache.put(grid, key, path or [])
+
+    stats.elapsed = time.perf_counter() - began
+
+    return SolveResult(algorithm, path, stats)
+
+
+ALGORITHMS: Dict[str, Callable[..., Optional[PathType]]] = {
+    'A*': a_star,
+    'Breadth First': breadth_first,
+    'Random Backtracking': backtrack_solver,
+    'Bidirectional BFS': bidirectional_breadth_first,
+    'Bidirectional A*': bidirectional_a_star,
+    'Jump Point Search': jump_point_search,
+    'Exit Distance Field': exit_distance_field,
+    'D* Lite': d_star_lite,
+    'Wavefront': wavefront,
+    'HPA*': hpa_star,
+}
+# Generator versions of the algorithms that have one, see solve_steps().
+STEPPERS: Dict[str, Callable[..., StepsType]] = {
+    'A*': a_star_steps,
+    'Breadth First': breadth_first_steps,
+    'Jump Point Search': jump_point_search_steps,
+}
+FIELD_CACHE = FieldCache()
+MAX_HIERARCHIES = 4
+MAX_PLANNERS = 4
+MAX_INDEXES = 4
+# RING_CONNECTED[mask] is ring_connected(mask), looked up when a cell closes.
+RING_CONNECTED = [ring_connected(mask) for mask in range(256)]
+INDEXES: "OrderedDict[int, weakref.ref]" = OrderedDict()
+# Algorithms whose results depend on a random seed.
+RANDOMIZED = {'Random Backtracking'}
+PLANNERS: "OrderedDict[Tuple[int, int], weakref.ref]" = OrderedDict()
+HIERARCHIES: "OrderedDict[Tuple[int, int], weakref.ref]" = OrderedDict()
@@ -0,0 +1,10 @@
+"""Shared setup for the tests.
+
+Makes the modules at the top of the repository importable and lets Main.py
+open its window without a display.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
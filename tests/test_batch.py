@@ -0,0 +1,27 @@
+"""Tests for batch.py."""
+import pytest
+
+import batch
+from grid import EXIT, START, Grid
+
+
+def small_grid():
+    grid = Grid.from_rows([[1] * 8 for _ in range(8)])
+    grid.set(0, 0, START)
+    grid.set(7, 7, EXIT)
+
+    return grid
+
+
+def test_solve_many_solves_shared_grids():
+    results = dict(batch.solve_many([small_grid(), small_grid()], 'A*',
+                                    workers=1))
+
+    assert sorted(results) == [0, 1]
+    assert all(len(result.path) == 8 for result in results.values())
+
+
+def test_solve_many_raises_the_error_of_a_failed_worker_solve():
+    with pytest.raises(TypeError):
+        list(batch.solve_many([small_grid()], 'A*', workers=1,
+                              no_such_option=True))
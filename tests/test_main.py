@@ -0,0 +1,22 @@
+"""Tests for the input handling of Main.py."""
+import itertools
+
+import pytest
+
+Main = pytest.importorskip('Main')
+
+
+def test_line_cells_ends_on_end_with_neighboring_steps():
+    box = list(itertools.product(range(6), repeat=2))
+
+    for start, end in itertools.product(box, repeat=2):
+        cells = list(Main.line_cells(start, end))
+
+        assert cells[0] == start
+        assert cells[-1] == end
+        assert len(cells) == max(abs(end[0] - start[0]),
+                                 abs(end[1] - start[1])) + 1
+
+        for before, after in zip(cells, cells[1:]):
+            assert max(abs(after[0] - before[0]),
+                       abs(after[1] - before[1])) == 1
@@ -0,0 +1,212 @@
+"""Tests for solver.py."""
+import gc
+import random
+import threading
+
+import benchmark
+import maze_generators
+import solver
+from grid import PATH, WALL, Grid, Scratch
+
+
+def open_grid(size):
+    return Grid.from_rows([[1] * size for _ in range(size)])
+
+
+def open_cells(grid):
+    return [grid.pos(i) for i in range(grid.size) if grid.state[i] != WALL]
+
+
+def assert_valid_path(grid, path, start, exit_pos):
+    assert path[0] == start and path[-1] == exit_pos
+    assert all(grid.get(*cell) != WALL for cell in path)
+    assert all(max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1
+               for a, b in zip(path, path[1:]))
+
+
+def assert_shortest(grid, start, exit_pos, algorithms):
+    shortest = solver.solve(grid, start, exit_pos, 'Breadth First').path
+
+    for algorithm in algorithms:
+        path = solver.solve(grid, start, exit_pos, algorithm).path
+
+        assert len(path) == len(shortest), algorithm
+
+        if path:
+            assert_valid_path(grid, path, start, exit_pos)
+
+
+def test_solve_task_releases_thread_when_dropped():
+    before = threading.active_count()
+    task = solver.SolveTask(open_grid(60), (0, 0), (59, 59),
+                            'Bidirectional BFS')
+    task.step(until=lambda kind, index: True)
+
+    assert not task.done
+    assert threading.active_count() == before + 1
+
+    del task
+    gc.collect()
+
+    assert threading.active_count() == before
+
+
+def test_solve_task_closes_in_with_block():
+    for algorithm in ('A*', 'Bidirectional A*'):
+        with solver.SolveTask(open_grid(60), (0, 0), (59, 59),
+                              algorithm) as task:
+            task.step(until=lambda kind, index: True)
+
+        assert task.done
+        assert task.result.stats.cancelled
+
+
+def test_solve_task_steps_generator_solvers_without_a_thread():
+    grid = open_grid(40)
+    before = threading.active_count()
+
+    for algorithm in solver.STEPPERS:
+        task = solver.SolveTask(grid, (0, 0), (39, 20), algorithm)
+        events = []
+
+        while not task.done:
+            events += task.step(until=lambda kind, index: True)
+
+            assert threading.active_count() == before
+
+        recorded = []
+        result = solver.solve(grid, (0, 0), (39, 20), algorithm,
+                              lambda kind, index: recorded.append(
+                                  (kind, index)))
+
+        assert events == recorded
+        assert task.result.path == result.path
+
+
+def test_every_algorithm_stops_on_exit_pos():
+    grid = open_grid(8)
+
+    for algorithm in solver.ALGORITHMS:
+        result = solver.solve(grid, (3, 3), (3, 3), algorithm)
+
+        assert result.path == [(3, 3)], algorithm
+
+        path = solver.solve(grid, (0, 0), (5, 2), algorithm).path
+
+        assert path[0] == (0, 0)
+        assert path[-1] == (5, 2), algorithm
+
+
+def test_result_cache_key_leaves_out_scratch_and_callbacks():
+    grid = open_grid(8)
+    cache = solver.ResultCache()
+    plain = cache.key(grid, (0, 0), (7, 7), 'A*', {})
+    options = {'scratch': Scratch(grid.size), 'on_event': print,
+               'stats': solver.SolveStats()}
+
+    assert cache.key(grid, (0, 0), (7, 7), 'A*', options) == plain
+
+
+def test_connectivity_index_matches_a_fresh_one_after_edits():
+    rng = random.Random(7)
+
+    for _ in range(40):
+        size = rng.randint(3, 12)
+        grid = Grid.from_rows([[rng.random() < 0.7 for _ in range(size)]
+                               for _ in range(size)])
+        index = solver.ConnectivityIndex(grid)
+        index.component((0, 0))
+
+        for _ in range(60):
+            row, col = rng.randrange(size), rng.randrange(size)
+            grid.set(row, col, PATH if grid.get(row, col) == WALL else WALL)
+
+        fresh = solver.ConnectivityIndex(grid)
+        cells = [(row, col) for row in range(size) for col in range(size)]
+
+        for cell in cells:
+            for other in cells:
+                assert (index.component(cell) == index.component(other)) == (
+                    fresh.component(cell) == fresh.component(other))
+
+
+def test_hpa_star_paths_are_valid_and_close_to_shortest():
+    rng = random.Random(3)
+
+    for trial in range(4):
+        grid = benchmark.random_grid(90, 0.25, trial)
+        cells = open_cells(grid)
+
+        for _ in range(15):
+            start, exit_pos = rng.choice(cells), rng.choice(cells)
+            shortest = solver.solve(grid, start, exit_pos,
+                                    'Breadth First').path
+            path = solver.solve(grid, start, exit_pos, 'HPA*',
+                                cluster_size=16).path
+
+            assert bool(path) == bool(shortest)
+
+            if not path:
+                continue
+
+            assert_valid_path(grid, path, start, exit_pos)
+            assert len(path) - 1 <= (len(shortest) - 1) * 1.25
+
+
+def test_bidirectional_searches_find_shortest_paths():
+    rng = random.Random(13)
+
+    for trial in range(12):
+        grid = benchmark.random_grid(rng.randint(4, 40),
+                                     rng.choice([0.1, 0.3, 0.45]), trial)
+        cells = open_cells(grid)
+
+        for _ in range(10):
+            assert_shortest(grid, rng.choice(cells), rng.choice(cells),
+                            ['Bidirectional BFS', 'Bidirectional A*'])
+
+
+def test_jump_point_search_finds_shortest_paths():
+    rng = random.Random(14)
+    grids = [benchmark.random_grid(rng.randint(4, 50),
+                                   rng.choice([0.0, 0.15, 0.35]), trial)
+             for trial in range(10)]
+    grids += [maze_generators.generate(name, 41, seed=14)
+              for name in ('prim', 'recursive division', 'cave')]
+
+    for grid in grids:
+        cells = open_cells(grid)
+
+        for _ in range(10):
+            assert_shortest(grid, rng.choice(cells), rng.choice(cells),
+                            ['Jump Point Search'])
+
+
+def test_incremental_solvers_follow_set_and_touch_edits():
+    rng = random.Random(16)
+
+    for trial in range(8):
+        grid = benchmark.random_grid(rng.randint(6, 30), 0.25, trial)
+        cells = open_cells(grid)
+        start, exit_pos = rng.choice(cells), rng.choice(cells)
+
+        for edit in range(30):
+            if edit % 6 == 5:
+                for index in rng.sample(range(grid.size), 4):
+                    grid.state[index] = (PATH if grid.state[index] == WALL
+                                         else WALL)
+
+                grid.touch()
+
+            else:
+                row = rng.randrange(grid.height)
+                col = rng.randrange(grid.width)
+                grid.set(row, col,
+                         PATH if grid.get(row, col) == WALL else WALL)
+
+            shortest = solver.solve(grid, start, exit_pos,
+                                    'Breadth First').path
+
+            assert solver.reachable(grid, start, exit_pos) == bool(shortest)
+            assert_shortest(grid, start, exit_pos,
+                            ['D* Lite', 'Exit Distance Field'])